@@ -0,0 +1,233 @@
+# batchEvaluate.py — Parallel re-scoring of roster directories into Parquet tables
+import os
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import evaluateRoster
+from rosterDomain import load_inputs
+from rosterRules import RuleContext
+
+# ---- Output schemas ----
+ROSTER_SCHEMA = pa.schema(
+    [
+        ("roster_path", pa.string()),
+        ("scenario", pa.string()),
+        ("status", pa.string()),
+        ("error", pa.string()),
+        ("num_assignments", pa.int64()),
+        ("reward", pa.float64()),
+        ("demand_score", pa.float64()),
+        ("compliance_violations", pa.int64()),
+        ("fairness_penalty", pa.float64()),
+        ("preference_score", pa.float64()),
+    ]
+)
+
+VIOLATION_SCHEMA = pa.schema(
+    [
+        ("roster_path", pa.string()),
+        ("violation_index", pa.int64()),
+        ("rule", pa.string()),
+        ("violation", pa.string()),
+    ]
+)
+
+WRITE_BATCH_ROWS = 500
+
+# Static inputs, loaded once per worker process by _init_worker
+_static = None
+
+
+# ---- Input discovery ----
+def collect_roster_paths(patterns):
+    """Expand directories (recursively) and glob patterns into a sorted list of JSON files"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, "**", "*.json")
+        paths.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(paths)
+
+
+# ---- Worker side ----
+def _init_worker(nurses_path, rules_path, demand_path, shift_path):
+    global _static
+    # Parsed and validated once by the coordinator; workers load the cached tables
+    inputs = load_inputs(nurses_path, rules_path, demand_path, shift_path)
+    nurse_list, shift_def, rules, demand = inputs.raw
+    ctx = RuleContext.from_inputs(inputs)
+    _static = (nurse_list, rules, demand, shift_def, ctx)
+
+
+def _empty_row(path, status, error):
+    return {
+        "roster_path": path,
+        "scenario": None,
+        "status": status,
+        "error": error,
+        "num_assignments": 0,
+        "reward": None,
+        "demand_score": None,
+        "compliance_violations": None,
+        "fairness_penalty": None,
+        "preference_score": None,
+    }
+
+
+def _evaluate_file(path):
+    """Evaluate one roster file; returns (roster_row, violation_rows)"""
+    try:
+        with open(path) as f:
+            roster = json.load(f)
+    except (OSError, ValueError) as e:
+        return _empty_row(path, "error", str(e)), []
+
+    if not isinstance(roster, dict) or "departments" not in roster:
+        return _empty_row(path, "skipped", "not a roster (no 'departments')"), []
+
+    nurse_list, rules, demand, shift_def, ctx = _static
+    try:
+        result = evaluateRoster.evaluate_roster(
+            roster, nurse_list, rules, demand, shift_def, ctx=ctx
+        )
+    except Exception as e:
+        return _empty_row(path, "error", f"{type(e).__name__}: {e}"), []
+
+    scenario = roster.get("scenario") or roster.get("generation_metadata", {}).get(
+        "scenario_name"
+    )
+    breakdown = result["breakdown"]
+    row = {
+        "roster_path": path,
+        "scenario": scenario,
+        "status": "ok",
+        "error": None,
+        "num_assignments": sum(
+            len(n["shifts"]) for d in roster["departments"] for n in d["nurses"]
+        ),
+        "reward": result["reward"],
+        "demand_score": breakdown["demand_score"],
+        "compliance_violations": breakdown["compliance_violations"],
+        "fairness_penalty": breakdown["fairness_penalty"],
+        "preference_score": breakdown["preference_score"],
+    }
+    rule_of = [
+        rule for rule, msgs in result["violations_by_rule"].items() for _ in msgs
+    ]
+    violations = [
+        {"roster_path": path, "violation_index": i, "rule": rule, "violation": v}
+        for i, (rule, v) in enumerate(zip(rule_of, result["violations"]))
+    ]
+    return row, violations
+
+
+# ---- Coordinator side ----
+class _BufferedTableWriter:
+    """Accumulates row dicts and flushes them to a ParquetWriter in batches"""
+
+    def __init__(self, path, schema):
+        self.schema = schema
+        self.writer = pq.ParquetWriter(path, schema)
+        self.rows = []
+
+    def extend(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= WRITE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def evaluate_batch(
+    patterns,
+    out_dir="evaluation",
+    nurses_path=evaluateRoster.nurses_path,
+    rules_path=evaluateRoster.rules_path,
+    demand_path=evaluateRoster.demand_path,
+    shift_path=evaluateRoster.shift_path,
+    workers=None,
+):
+    """Evaluate every roster matched by `patterns` across a process pool.
+
+    Writes `rosters.parquet` (one row per file) and `violations.parquet`
+    (one row per violation message) into `out_dir` and returns a summary dict.
+    """
+    paths = collect_roster_paths(patterns)
+    os.makedirs(out_dir, exist_ok=True)
+    # Validate once up front (raises on bad inputs); the workers load the cached tables
+    load_inputs(nurses_path, rules_path, demand_path, shift_path)
+    rosters_out = os.path.join(out_dir, "rosters.parquet")
+    violations_out = os.path.join(out_dir, "violations.parquet")
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    start = time.time()
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+
+    roster_writer = _BufferedTableWriter(rosters_out, ROSTER_SCHEMA)
+    violation_writer = _BufferedTableWriter(violations_out, VIOLATION_SCHEMA)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(nurses_path, rules_path, demand_path, shift_path),
+        ) as pool:
+            for row, violations in pool.map(_evaluate_file, paths, chunksize=chunksize):
+                counts[row["status"]] += 1
+                roster_writer.extend([row])
+                violation_writer.extend(violations)
+    finally:
+        roster_writer.close()
+        violation_writer.close()
+
+    elapsed = time.time() - start
+    print(
+        f"✅ Evaluated {len(paths)} files in {elapsed:.1f}s "
+        f"({counts['ok']} ok, {counts['skipped']} skipped, {counts['error']} errors)"
+    )
+    print(f"📁 {rosters_out}\n📁 {violations_out}")
+    return {
+        "files": len(paths),
+        "elapsed_seconds": elapsed,
+        "rosters_path": rosters_out,
+        "violations_path": violations_out,
+        **counts,
+    }
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Evaluate every roster in a directory or glob into Parquet tables"
+    )
+    parser.add_argument("inputs", nargs="+", help="roster directories or glob patterns")
+    parser.add_argument("--out-dir", default="evaluation")
+    parser.add_argument("--nurses", default=evaluateRoster.nurses_path)
+    parser.add_argument("--rules", default=evaluateRoster.rules_path)
+    parser.add_argument("--demand", default=evaluateRoster.demand_path)
+    parser.add_argument("--shift", default=evaluateRoster.shift_path)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    evaluate_batch(
+        args.inputs,
+        out_dir=args.out_dir,
+        nurses_path=args.nurses,
+        rules_path=args.rules,
+        demand_path=args.demand,
+        shift_path=args.shift,
+        workers=args.workers,
+    )
@@ -0,0 +1,173 @@
+# batchInference.py — Offline scoring of every candidate assignment into roster_predictions.parquet
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from scoreTable import load_or_build
+from treeEvaluator import compile_model
+
+# generateRoster scores all (nurse, dept, day, slot) candidates at solve
+# time. This job does it ahead of time for a planning period: nurses are
+# scored in chunks and written as a Parquet dataset partitioned by
+# period=<period>/dept=<dept>, so generateRoster only reads the partitions it
+# needs (row pruning on period/dept, plus row-group stats on the digests) and
+# only the key and score columns (column pruning).
+#
+# Every row carries the digest of the model and of the scoring inputs (nurse
+# feature store hash + shift definition). If generateRoster finds no complete
+# set of rows for its own digests, the predictions are stale and it scores
+# at solve time as before.
+
+# ---- Output schema ----
+SCHEMA = pa.schema(
+    [
+        ("period", pa.string()),
+        ("dept", pa.string()),
+        ("day", pa.string()),
+        ("shift_type", pa.string()),
+        ("candidate_nurse", pa.string()),
+        ("score", pa.float32()),
+        ("model_digest", pa.string()),
+        ("inputs_digest", pa.string()),
+    ]
+)
+PARTITIONING = ds.partitioning(
+    pa.schema([("period", pa.string()), ("dept", pa.string())]), flavor="hive"
+)
+READ_COLUMNS = ["candidate_nurse", "dept", "day", "shift_type", "score"]
+INFERENCE_CHUNK_NURSES = 256
+
+
+def current_period():
+    """ISO week of today, e.g. 2026-W42"""
+    return datetime.now().strftime("%G-W%V")
+
+
+def inputs_digest(store, shift):
+    """Hash of everything besides the model that the scores depend on"""
+    h = hashlib.sha1(store.content_hash.encode())
+    h.update(json.dumps(shift, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+# ---- Write side ----
+def prediction_batches(nurses, shift, rules, model, period, chunk_nurses=INFERENCE_CHUNK_NURSES):
+    """RecordBatches of SCHEMA covering every candidate assignment, `chunk_nurses` nurses at a time"""
+    from generateRoster import DATA_DIR, assignment_feature_rows, nurse_feature_store
+
+    departments = rules["general"]["departments"]
+    days = rules["general"]["days"]
+    time_slots = list(shift["SHIFT_HOURS"].keys())
+    store = nurse_feature_store(nurses)
+    table = load_or_build(model, os.path.join(DATA_DIR, "score_table.npz"))
+    model_digest = model.digest()
+    digest = inputs_digest(store, shift)
+
+    for start in range(0, len(nurses), chunk_nurses):
+        chunk = nurses[start:start + chunk_nurses]
+        keys, rows = assignment_feature_rows(chunk, shift, departments, days, time_slots, store)
+        nids, depts, key_days, slots = zip(*keys)
+        yield pa.RecordBatch.from_arrays(
+            [
+                pa.array([period] * len(keys), pa.string()),
+                pa.array(depts, pa.string()),
+                pa.array(key_days, pa.string()),
+                pa.array(slots, pa.string()),
+                pa.array(nids, pa.string()),
+                pa.array(table.lookup(rows), pa.float32()),
+                pa.array([model_digest] * len(keys), pa.string()),
+                pa.array([digest] * len(keys), pa.string()),
+            ],
+            schema=SCHEMA,
+        )
+
+
+def write_predictions(nurses, shift, rules, model, out, period=None):
+    """Score every candidate of `period` and (re)write its partitions under `out`; returns the row count"""
+    period = period or current_period()
+    counts = {"rows": 0}
+
+    def batches():
+        for batch in prediction_batches(nurses, shift, rules, model, period):
+            counts["rows"] += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        batches(),
+        out,
+        schema=SCHEMA,
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"part-{period}-{{i}}.parquet",
+        # Replaces this period's partitions, keeps other periods
+        existing_data_behavior="delete_matching",
+    )
+    return counts["rows"]
+
+
+# ---- Read side ----
+def read_predictions(ctx, path, model, shift, period=None):
+    """(nurse, dept, day, slot) score array for `ctx` from a predictions dataset.
+
+    Returns None if the dataset does not cover every cell for the current
+    model and inputs (missing, stale or another nurse list).
+    """
+    from generateRoster import nurse_feature_store
+
+    period = period or current_period()
+    try:
+        dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+    except (FileNotFoundError, OSError):
+        return None
+    row_filter = (
+        (ds.field("period") == period)
+        & ds.field("dept").isin(ctx.depts)
+        & (ds.field("model_digest") == model.digest())
+        & (ds.field("inputs_digest") == inputs_digest(nurse_feature_store(ctx.nurses), shift))
+    )
+    table = dataset.to_table(columns=READ_COLUMNS, filter=row_filter)
+
+    scores = np.full(ctx.shape, np.nan, dtype=np.float32)
+    cols = table.to_pydict()
+    for nid, dept, day, slot, score in zip(*(cols[c] for c in READ_COLUMNS)):
+        n = ctx.nurse_pos.get(nid)
+        if n is None or day not in ctx.day_pos or slot not in ctx.slot_pos:
+            continue
+        scores[n, ctx.dept_pos[dept], ctx.day_pos[day], ctx.slot_pos[slot]] = score
+    if np.isnan(scores).any():
+        return None
+    return scores
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    # Only the CLI needs evaluateRoster (for its default paths); the container does not ship it
+    import evaluateRoster
+
+    parser = argparse.ArgumentParser(
+        description="Score every (nurse, dept, day, slot) candidate of a planning period into Parquet"
+    )
+    parser.add_argument("--model", default="data/model.tar.gz")
+    parser.add_argument("--period", default=None, help="planning period label (default: current ISO week)")
+    parser.add_argument("--out", default="data/roster_predictions.parquet", help="local dir or s3:// URI")
+    parser.add_argument("--nurses", default=evaluateRoster.nurses_path)
+    parser.add_argument("--rules", default=evaluateRoster.rules_path)
+    parser.add_argument("--shift", default=evaluateRoster.shift_path)
+    args = parser.parse_args()
+
+    with open(args.nurses) as f:
+        nurse_list = json.load(f)
+    with open(args.rules) as f:
+        rules = json.load(f)
+    with open(args.shift) as f:
+        shift_def = json.load(f)
+
+    period = args.period or current_period()
+    rows = write_predictions(nurse_list, shift_def, rules, compile_model(args.model), args.out, period)
+    print(f"✅ {rows} candidate scores for {period} -> {args.out}")
@@ -0,0 +1,102 @@
+# benchmarkSearch.py — Compare CP-SAT search modes of build_and_solve_hybrid
+import json
+import time
+import argparse
+
+from ortools.sat.python import cp_model
+
+import evaluateRoster
+import generateRoster
+from rosterDomain import load_inputs
+from treeEvaluator import compile_model
+
+# Each mode is solved once up to the largest time limit while a solution
+# callback records (elapsed, objective) for every improving solution. The
+# objective "at" a smaller limit is the best one found by then, which is
+# what a run stopped at that limit would have returned (same seed and
+# parameters; CP-SAT's multi-worker search is not bit-for-bit deterministic,
+# so repeat runs with --repeats to see the spread).
+
+
+class _SolutionLog(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.start = time.time()
+        self.solutions = []
+
+    def on_solution_callback(self):
+        self.solutions.append((time.time() - self.start, self.ObjectiveValue()))
+
+    def objective_at(self, seconds):
+        found = [obj for t, obj in self.solutions if t <= seconds]
+        return found[-1] if found else None
+
+
+def benchmark(modes, time_limits, repeats=1, data=None, model_path="data/model.tar.gz"):
+    """Rows of {mode, run, first_solution_time, num_solutions, objective_at_<t>s}"""
+    nurses, shift, rules, demand = data or _load_inputs()
+    xgb_model = compile_model(model_path)
+    rows = []
+    for run in range(repeats):
+        for mode in modes:
+            log = _SolutionLog()
+            generateRoster.build_and_solve_hybrid(
+                nurses,
+                shift,
+                rules,
+                demand,
+                xgb_model,
+                time_limit=max(time_limits),
+                search=mode,
+                solution_callback=log,
+            )
+            row = {
+                "mode": mode,
+                "run": run,
+                "first_solution_time": log.solutions[0][0] if log.solutions else None,
+                "num_solutions": len(log.solutions),
+            }
+            for t in time_limits:
+                row[f"objective_at_{t:g}s"] = log.objective_at(t)
+            rows.append(row)
+    return rows
+
+
+def _load_inputs():
+    inputs = load_inputs(
+        evaluateRoster.nurses_path,
+        evaluateRoster.rules_path,
+        evaluateRoster.demand_path,
+        evaluateRoster.shift_path,
+    )
+    return inputs.raw
+
+
+def print_table(rows, time_limits):
+    header = ["mode", "run", "first sol (s)", "#sols"] + [f"obj@{t:g}s" for t in time_limits]
+    print("\n" + " | ".join(header))
+    for r in rows:
+        first = f"{r['first_solution_time']:.2f}" if r["first_solution_time"] is not None else "-"
+        objs = [r[f"objective_at_{t:g}s"] for t in time_limits]
+        cells = [r["mode"], str(r["run"]), first, str(r["num_solutions"])]
+        cells += [f"{o:.0f}" if o is not None else "-" for o in objs]
+        print(" | ".join(cells))
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time to first solution and objective at fixed time limits per search mode"
+    )
+    parser.add_argument("--modes", nargs="+", default=list(generateRoster.SEARCH_MODES))
+    parser.add_argument("--time-limits", nargs="+", type=float, default=[10, 30, 60])
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--model", default="data/model.tar.gz")
+    parser.add_argument("--out", default=None, help="also write the rows as JSON")
+    args = parser.parse_args()
+
+    rows = benchmark(args.modes, args.time_limits, args.repeats, model_path=args.model)
+    print_table(rows, args.time_limits)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
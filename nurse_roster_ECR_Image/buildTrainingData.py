@@ -0,0 +1,353 @@
+# buildTrainingData.py — Incremental builder for the pairwise compliance training set
+import os
+import json
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+import evaluateRoster
+from batchEvaluate import collect_roster_paths
+from nurseFeatureStore import FEATURE_STORE_DIR, STATIC_FEATURES, WORKLOAD_FEATURES, open_store, workload_features
+from rosterDomain import load_inputs
+from rosterRules import RuleContext
+from scenarioOverlays import materialize_scenario
+
+# Rows follow the layout of pairwise_weekly_compliance.parquet: one row per
+# (roster assignment, candidate nurse), label = 1 for the nurse actually
+# rostered. The model features are computed as in generateRoster.build_features
+# against the whole roster, so training sees exactly what the solver scores
+# with, and every row also carries roster-level labels from evaluate_roster.
+# Archived scenarios are evaluated against their own inputs: the overlay
+# stored in the archive's scenarios table is applied to the base files.
+
+# ---- Output schema ----
+FEATURE_COLUMNS = STATIC_FEATURES + WORKLOAD_FEATURES
+
+SCHEMA = pa.schema(
+    [
+        ("nurse_key", pa.string()),
+        ("roster_key", pa.string()),
+        ("dept", pa.string()),
+        ("day", pa.string()),
+        ("shift_type", pa.string()),
+        ("target_nurse", pa.string()),
+        ("candidate_nurse", pa.string()),
+        ("label", pa.int64()),
+        ("cand_seniority", pa.string()),
+        ("cand_pref", pa.string()),
+        ("cand_skills", pa.string()),
+    ]
+    + [(c, pa.int64()) for c in FEATURE_COLUMNS]
+    + [
+        ("roster_reward", pa.float64()),
+        ("roster_demand_score", pa.float64()),
+        ("roster_compliance_violations", pa.int64()),
+        ("roster_fairness_penalty", pa.float64()),
+    ]
+)
+
+OVERLAY_COLUMNS = ["demand_ops", "extra_unavailability", "rule_overrides"]  # JSON in the archive
+STATE_FILE = "_processed.json"  # "_" prefix: skipped by Parquet dataset readers
+ROSTERS_PER_PART = 50
+JOBS_PER_WORKER = 4  # rosters submitted ahead of the results, per worker process
+
+# Static inputs, loaded once per worker process by _init_worker
+_static = None
+
+
+# ---- Roster discovery ----
+def json_roster_jobs(patterns):
+    """(roster_key, fingerprint, path, None) for roster JSON files; the fingerprint changes when the file does"""
+    for path in collect_roster_paths(patterns):
+        stat = os.stat(path)
+        yield path, f"{stat.st_size}:{int(stat.st_mtime)}", path, None
+
+
+def _scenario_overlays(batch_path):
+    """{scenario name: overlay} from the scenarios table of one archive batch partition"""
+    if not os.path.isdir(batch_path):
+        return {}
+    table = ds.dataset(batch_path, format="parquet").to_table(columns=["scenario"] + OVERLAY_COLUMNS)
+    return {
+        row["scenario"]: {c: json.loads(row[c]) for c in OVERLAY_COLUMNS if row[c]}
+        for row in table.to_pylist()
+    }
+
+
+def archive_roster_jobs(archive_root):
+    """(roster_key, fingerprint, roster dict, overlay) for every scenario in a rostergenerator Parquet archive.
+
+    Lazy: one archive batch is read (and its rosters built) at a time.
+    Scenarios without a row in the scenarios table are skipped, since
+    their inputs cannot be rebuilt.
+    """
+    assignments_dir = os.path.join(archive_root, "assignments")
+    if not os.path.isdir(assignments_dir):
+        return
+    for batch_dir in sorted(os.listdir(assignments_dir)):
+        if not batch_dir.startswith("batch="):
+            continue
+        table = ds.dataset(os.path.join(assignments_dir, batch_dir), format="parquet").to_table()
+        by_scenario = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+        for row in table.to_pylist():
+            by_scenario[row["scenario"]][row["dept"]][row["nurse_id"]].append(
+                {"day": row["day"], "shift": row["shift"]}
+            )
+        batch = batch_dir[len("batch="):]
+        overlays = _scenario_overlays(os.path.join(archive_root, "scenarios", batch_dir))
+        for scenario, depts in sorted(by_scenario.items()):
+            if scenario not in overlays:
+                continue
+            roster = {
+                "departments": [
+                    {"name": dept, "nurses": [{"id": nid, "shifts": shifts} for nid, shifts in nurses.items()]}
+                    for dept, nurses in depts.items()
+                ],
+                "scenario": scenario,
+            }
+            yield f"archive:{batch}/{scenario}", "archive", roster, overlays[scenario]
+
+
+# ---- Worker side ----
+def _init_worker(nurses_path, rules_path, demand_path, shift_path):
+    global _static
+    # Parsed and validated once by the coordinator; workers load the cached tables
+    inputs = load_inputs(nurses_path, rules_path, demand_path, shift_path)
+    nurse_list, shift_def, rules, demand = inputs.raw
+    ctx = RuleContext.from_inputs(inputs)
+    store = open_store(nurse_list, FEATURE_STORE_DIR)
+    _static = (nurses_path, nurse_list, rules, demand, shift_def, ctx, store)
+
+
+def _roster_rows(job):
+    """Pairwise rows of one roster as a pyarrow Table; None if it is not a usable roster"""
+    roster_key, _, source, overlay = job
+    if isinstance(source, dict):
+        roster = source
+    else:
+        try:
+            with open(source) as f:
+                roster = json.load(f)
+        except (OSError, ValueError):
+            return roster_key, None
+    if not isinstance(roster, dict) or "departments" not in roster:
+        return roster_key, None
+
+    nurses_path, nurse_list, rules, demand, shift_def, ctx, store = _static
+    if overlay:
+        base = {"nurses": nurse_list, "shift": shift_def, "rules": rules, "demand": demand}
+        nurse_list, shift_def, rules, demand = materialize_scenario(base, overlay)
+        ctx = RuleContext(nurse_list, shift_def, rules, demand)
+    try:
+        result = evaluateRoster.evaluate_roster(roster, nurse_list, rules, demand, shift_def, ctx=ctx)
+    except Exception:
+        return roster_key, None
+    breakdown = result["breakdown"]
+
+    # Weekly lookup: nurse -> all their shifts in this roster
+    assigned_shifts = defaultdict(list)
+    for dept in roster["departments"]:
+        for n in dept["nurses"]:
+            assigned_shifts[n["id"]].extend(n["shifts"])
+
+    known = {n["nurse_id"] for n in nurse_list}
+    columns = {field.name: [] for field in SCHEMA}
+    feature_cache = {}
+    for dept in roster["departments"]:
+        for n in dept["nurses"]:
+            if n["id"] not in known:
+                continue
+            for s in n["shifts"]:
+                for cand in nurse_list:
+                    cache_key = (cand["nurse_id"], s["day"], s["shift"])
+                    features = feature_cache.get(cache_key)
+                    if features is None:
+                        # Static columns from the store, workload against the whole roster
+                        features = store.features(cand["nurse_id"])
+                        features.update(
+                            workload_features(
+                                cand["nurse_id"], s["day"], s["shift"], assigned_shifts, shift_def
+                            )
+                        )
+                        feature_cache[cache_key] = features
+                    columns["nurse_key"].append(nurses_path)
+                    columns["roster_key"].append(roster_key)
+                    columns["dept"].append(dept["name"])
+                    columns["day"].append(s["day"])
+                    columns["shift_type"].append(s["shift"])
+                    columns["target_nurse"].append(n["id"])
+                    columns["candidate_nurse"].append(cand["nurse_id"])
+                    columns["label"].append(int(cand["nurse_id"] == n["id"]))
+                    columns["cand_seniority"].append(cand.get("seniority_level"))
+                    columns["cand_pref"].append(",".join(cand.get("preferences", [])))
+                    columns["cand_skills"].append(",".join(cand.get("skills", [])))
+                    for c in FEATURE_COLUMNS:
+                        columns[c].append(int(features[c]))
+                    columns["roster_reward"].append(result["reward"])
+                    columns["roster_demand_score"].append(breakdown["demand_score"])
+                    columns["roster_compliance_violations"].append(breakdown["compliance_violations"])
+                    columns["roster_fairness_penalty"].append(breakdown["fairness_penalty"])
+    return roster_key, pa.Table.from_pydict(columns, schema=SCHEMA)
+
+
+# ---- Coordinator side ----
+def load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(out_dir, state):
+    tmp_path = os.path.join(out_dir, STATE_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, os.path.join(out_dir, STATE_FILE))
+
+
+class _PartWriter:
+    """One Parquet part per ROSTERS_PER_PART rosters; the processed-state is only
+    advanced once a part is closed and renamed into the dataset"""
+
+    def __init__(self, out_dir, state):
+        self.out_dir = out_dir
+        self.state = state
+        self.stamp = time.strftime("%Y%m%d_%H%M%S")
+        self.parts = 0
+        self.writer = None
+        self.pending = {}
+
+    def write(self, roster_key, fingerprint, table):
+        if table is not None and table.num_rows:
+            if self.writer is None:
+                name = f"part-{self.stamp}-{os.getpid()}-{self.parts:04d}.parquet"
+                self.final_path = os.path.join(self.out_dir, name)
+                self.tmp_path = os.path.join(self.out_dir, "_inprogress-" + name)
+                self.writer = pq.ParquetWriter(self.tmp_path, SCHEMA)
+                self.parts += 1
+            self.writer.write_table(table)
+        self.pending[roster_key] = fingerprint
+        if len(self.pending) >= ROSTERS_PER_PART:
+            self.commit()
+
+    def commit(self):
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.final_path)
+            self.writer = None
+        if self.pending:
+            self.state.update(self.pending)
+            save_state(self.out_dir, self.state)
+            self.pending = {}
+
+
+def build_training_data(
+    inputs=(),
+    archive=None,
+    out_dir="training/pairwise_weekly_compliance",
+    nurses_path=evaluateRoster.nurses_path,
+    rules_path=evaluateRoster.rules_path,
+    demand_path=evaluateRoster.demand_path,
+    shift_path=evaluateRoster.shift_path,
+    workers=None,
+):
+    """Append pairwise rows for every roster not yet in `out_dir` and return a summary dict.
+
+    `inputs` are roster directories/globs (roster_history/, scenario batches,
+    rl_episode_rosters/); `archive` is a rostergenerator Parquet archive root.
+    A roster is new if its key is missing from the processed-state file or
+    its file changed since it was processed.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state = load_state(out_dir)
+    found = {"found": 0, "new": 0}
+
+    # Rosters are discovered lazily, so only the submitted window is ever in memory
+    sources = [json_roster_jobs(inputs) if inputs else (), archive_roster_jobs(archive) if archive else ()]
+
+    def new_jobs():
+        for jobs in sources:
+            for job in jobs:
+                found["found"] += 1
+                if state.get(job[0]) != job[1]:
+                    found["new"] += 1
+                    yield job
+
+    # Validate the inputs and build/refresh the nurse feature store once here;
+    # the workers only load the cached tables and map the store
+    inputs = load_inputs(nurses_path, rules_path, demand_path, shift_path)
+    open_store(inputs.raw[0], FEATURE_STORE_DIR)
+
+    workers = workers or os.cpu_count() or 1
+    start = time.time()
+    counts = {"rosters": 0, "skipped": 0, "rows": 0}
+
+    writer = _PartWriter(out_dir, state)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(nurses_path, rules_path, demand_path, shift_path),
+        ) as pool:
+            jobs = new_jobs()
+            in_flight = {}
+            while True:
+                for job in jobs:
+                    in_flight[pool.submit(_roster_rows, job)] = job
+                    if len(in_flight) >= workers * JOBS_PER_WORKER:
+                        break
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    roster_key, table = future.result()
+                    if table is None:
+                        counts["skipped"] += 1
+                    else:
+                        counts["rosters"] += 1
+                        counts["rows"] += table.num_rows
+                    writer.write(roster_key, job[1], table)
+    finally:
+        writer.commit()
+
+    elapsed = time.time() - start
+    print(f"🧾 {found['found']} rosters found, {found['new']} new since the last run")
+    print(
+        f"✅ Appended {counts['rows']} rows from {counts['rosters']} rosters in {elapsed:.1f}s "
+        f"({counts['skipped']} skipped) -> {out_dir}"
+    )
+    return {**found, "elapsed_seconds": elapsed, **counts}
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Append pairwise compliance training rows for new rosters"
+    )
+    parser.add_argument("inputs", nargs="*", help="roster directories or glob patterns")
+    parser.add_argument("--archive", default=None, help="rostergenerator Parquet archive root")
+    parser.add_argument("--out-dir", default="training/pairwise_weekly_compliance")
+    parser.add_argument("--nurses", default=evaluateRoster.nurses_path)
+    parser.add_argument("--rules", default=evaluateRoster.rules_path)
+    parser.add_argument("--demand", default=evaluateRoster.demand_path)
+    parser.add_argument("--shift", default=evaluateRoster.shift_path)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    build_training_data(
+        args.inputs,
+        archive=args.archive,
+        out_dir=args.out_dir,
+        nurses_path=args.nurses,
+        rules_path=args.rules,
+        demand_path=args.demand,
+        shift_path=args.shift,
+        workers=args.workers,
+    )
@@ -0,0 +1,85 @@
+# candidatePruning.py — Ranker-driven top-k candidate masks for the CP model
+import numpy as np
+
+# The CP model has one BoolVar per (nurse, dept, day, slot), but a department
+# shift only ever staffs a few nurses. candidate_mask() picks the cells worth
+# keeping and rosterRules.assignment_vars() replaces every other cell with
+# the fixed-0 constant, so the restricted model has a fraction of the
+# variables.
+#
+# Plain per-shift top-k cannot be feasible here: the ranker scores a nurse,
+# not a slot, so it picks the same few nurses everywhere, while every nurse
+# with a contract has to work exactly their contracted hours (which, with
+# 8h/4h shifts, daily caps and rest rules, needs a full choice of days and
+# slots). So a mask is built from:
+#   - home departments: every nurse keeps every (day, slot) of `home_depts`
+#     departments, so the per-nurse rules stay satisfiable exactly as in the
+#     full model. Homes go to core-skill departments first and are balanced
+#     against each department's share of demand hours;
+#   - top-k: each (dept, day, slot) additionally keeps the k best-ranked
+#     nurses from other departments (ties to the nurse with fewer candidate
+#     cells so far), and at least its best core-skill nurse.
+# With one home department the model keeps roughly 1/E of the variables plus
+# k per shift. If the restricted model has no solution, k doubles and nurses
+# get one more home department, until nothing is pruned.
+
+# ---- Config ----
+WIDEN_FACTOR = 2
+
+
+def home_departments(ctx, nurse_scores, home_depts=1):
+    """(nurse, dept) mask of each nurse's `home_depts` home departments"""
+    N, E = ctx.shape[:2]
+    home = np.zeros((N, E), dtype=bool)
+    if home_depts >= E:
+        home[:] = True
+        return home
+    demand_hours = (ctx.demand_min * ctx.hours[None, None, :]).sum(axis=(1, 2)).astype(float)
+    share = demand_hours / max(demand_hours.sum(), 1.0)
+    for _ in range(home_depts):
+        quota = share * N - home.sum(axis=0)
+        for n in np.argsort(-nurse_scores, kind="stable"):
+            options = ~home[n] & ctx.core_mask[n]
+            if not options.any():
+                options = ~home[n]
+            e = int(np.argmax(np.where(options, quota, -np.inf)))
+            home[n, e] = True
+            quota[e] -= 1
+    return home
+
+
+def candidate_mask(ctx, scores, k, home_depts=1):
+    """Boolean (nurse, dept, day, slot) mask of the cells kept as CP variables"""
+    scores = np.asarray(scores, dtype=float)
+    N, E, D, S = ctx.shape
+    home = home_departments(ctx, scores.max(axis=(1, 2, 3)), home_depts)
+    mask = np.broadcast_to(home[:, :, None, None], ctx.shape).copy()
+    if home_depts >= E:
+        return mask
+
+    cells = mask.sum(axis=(1, 2, 3))
+    for e in range(E):
+        for d in range(D):
+            for s in range(S):
+                open_ = ~home[:, e] & ~ctx.unavailable[:, d, s]
+                # Best score first, then the nurse with fewest candidate cells
+                order = np.lexsort((cells, -scores[:, e, d, s]))
+                order = order[open_[order]]
+                picked = list(order[:k])
+                has_core = ctx.core_mask[home[:, e], e].any() or ctx.core_mask[picked, e].any()
+                core = order[ctx.core_mask[order, e]]
+                if not has_core and len(core):
+                    picked.append(core[0])
+                mask[picked, e, d, s] = True
+                cells[picked] += 1
+    return mask
+
+
+def widening_schedule(k, num_depts):
+    """(k, home_depts) pairs, widened each step, ending with None (= no pruning)"""
+    home_depts = 1
+    while home_depts < num_depts:
+        yield k, home_depts
+        k *= WIDEN_FACTOR
+        home_depts += 1
+    yield None
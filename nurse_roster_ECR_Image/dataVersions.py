@@ -0,0 +1,306 @@
+# dataVersions.py — Append-only change log with compacted snapshots for nurse and demand data
+import os
+import re
+import json
+import glob
+import argparse
+from datetime import datetime
+
+# Every lex-update edit used to copy the whole nurse.json / demand.json into
+# backups/ before overwriting it. Here each edit is stored as a patch of the
+# records it touched instead:
+#
+#   <root>/<kind>/patches/00000042.json   {"version", "ts", "source",
+#                                          "upsert": {key: record},
+#                                          "delete": [key], "order": [key]?}
+#   <root>/<kind>/snapshots/00000040.json {"version", "ts", "records": [[key, record], ...]}
+#   <root>/<kind>/index.jsonl              [version, ts] per patch, for point-in-time lookups
+#
+# A record is one nurse (key nurse_id) or one department-day of demand (key
+# "<dept>/<day>"). Patches are written to a temp file and published with an
+# exclusive hard link, so a crash never leaves a partial patch and a
+# concurrent writer of the same version fails instead of overwriting. The
+# index is only a cache of the patch timestamps: versions missing from it
+# (e.g. after a crash between the two writes) are read from their patches. Every SNAPSHOT_EVERY versions the full state is compacted into
+# a snapshot; reading any version is then the latest snapshot at or before it
+# plus at most SNAPSHOT_EVERY - 1 patches. The layout is flat files named by
+# version, so the same tree can live on S3 (one PUT per edit).
+
+# ---- Config ----
+KINDS = ("nurse", "demand")
+SNAPSHOT_EVERY = 20
+TS_FORMAT = "%Y-%m-%dT%H:%M:%S"
+BACKUP_NAME = re.compile(r"^(nurse|demand)_(\d{8}_\d{6})\.json$")
+INDEX_FILE = "index.jsonl"
+
+
+# ---- Records ----
+def to_records(kind, data):
+    """Ordered {key: record} view of a nurse list / demand dict"""
+    if kind == "nurse":
+        return {n["nurse_id"]: n for n in data}
+    return {f"{dept}/{day}": slots for dept, days in data.items() for day, slots in days.items()}
+
+
+def from_records(kind, records):
+    if kind == "nurse":
+        return list(records.values())
+    data = {}
+    for key, slots in records.items():
+        dept, day = key.split("/", 1)
+        data.setdefault(dept, {})[day] = slots
+    return data
+
+
+def diff_records(old, new):
+    """Patch body turning `old` into `new` (empty dict if they are equal)"""
+    patch = {}
+    upsert = {k: v for k, v in new.items() if old.get(k) != v}
+    delete = [k for k in old if k not in new]
+    if upsert:
+        patch["upsert"] = upsert
+    if delete:
+        patch["delete"] = delete
+    # New keys are appended by apply_patch; only store the order if that is not enough
+    expected = [k for k in old if k in new] + [k for k in new if k not in old]
+    if list(new) != expected:
+        patch["order"] = list(new)
+    return patch
+
+
+def apply_patch(records, patch):
+    records = dict(records)
+    for k in patch.get("delete", []):
+        records.pop(k, None)
+    records.update(patch.get("upsert", {}))
+    if "order" in patch:
+        records = {k: records[k] for k in patch["order"]}
+    return records
+
+
+def _timestamp(ts):
+    if ts is None:
+        return datetime.now().strftime(TS_FORMAT)
+    if isinstance(ts, datetime):
+        return ts.strftime(TS_FORMAT)
+    return ts
+
+
+# ---- Log ----
+class DataLog:
+    """Versioned history of one kind of data ("nurse" or "demand") under `root`"""
+
+    def __init__(self, root, kind):
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        self.kind = kind
+        self.patch_dir = os.path.join(root, kind, "patches")
+        self.snapshot_dir = os.path.join(root, kind, "snapshots")
+        self.index_path = os.path.join(root, kind, INDEX_FILE)
+        os.makedirs(self.patch_dir, exist_ok=True)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+
+    @staticmethod
+    def _versions(directory):
+        return sorted(int(os.path.basename(p)[:-5]) for p in glob.glob(os.path.join(directory, "*.json")))
+
+    @staticmethod
+    def _read(directory, version):
+        with open(os.path.join(directory, f"{version:08d}.json")) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_new(directory, version, payload):
+        # Written in full first, then linked into place: os.link fails
+        # (FileExistsError) if another writer already created this version
+        tmp_path = os.path.join(directory, f".{version:08d}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.link(tmp_path, os.path.join(directory, f"{version:08d}.json"))
+        finally:
+            os.unlink(tmp_path)
+
+    def _timestamps(self):
+        """[(version, ts)] of every patch, oldest first, from the index where it has them"""
+        indexed = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for line in f:
+                    try:
+                        version, ts = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    indexed[version] = ts
+        return [
+            (v, indexed[v] if v in indexed else self._read(self.patch_dir, v)["ts"])
+            for v in self._versions(self.patch_dir)
+        ]
+
+    @property
+    def head(self):
+        """Latest version (0 = empty log)"""
+        versions = self._versions(self.patch_dir)
+        return versions[-1] if versions else 0
+
+    def history(self):
+        """[{version, ts, source, changed}] of every patch, oldest first"""
+        out = []
+        for v in self._versions(self.patch_dir):
+            p = self._read(self.patch_dir, v)
+            changed = sorted(set(p.get("upsert", {})) | set(p.get("delete", [])))
+            out.append({"version": v, "ts": p["ts"], "source": p.get("source"), "changed": changed})
+        return out
+
+    def records(self, version=None):
+        """{key: record} state at `version` (default: latest)"""
+        head = self.head
+        version = head if version is None else version
+        if not 0 <= version <= head:
+            raise ValueError(f"version {version} not in 0..{head}")
+        base = [v for v in self._versions(self.snapshot_dir) if v <= version]
+        records, start = {}, 0
+        if base:
+            snapshot = self._read(self.snapshot_dir, base[-1])
+            records, start = dict(snapshot["records"]), base[-1]
+        for v in range(start + 1, version + 1):
+            records = apply_patch(records, self._read(self.patch_dir, v))
+        return records
+
+    def state(self, version=None):
+        """nurse.json / demand.json content at `version` (default: latest)"""
+        return from_records(self.kind, self.records(version))
+
+    def version_at(self, ts):
+        """Latest version committed at or before `ts` (datetime or TS_FORMAT string); 0 if none"""
+        ts = _timestamp(ts)
+        version = 0
+        for v, committed in self._timestamps():
+            if committed > ts:
+                break
+            version = v
+        return version
+
+    def state_at(self, ts):
+        """Point-in-time reconstruction"""
+        return self.state(self.version_at(ts))
+
+    def commit(self, data, source=None, ts=None):
+        """Append the changes from the latest version to `data`; returns the new version, None if unchanged"""
+        head = self.head
+        old = self.records(head)
+        new = to_records(self.kind, data)
+        patch = diff_records(old, new)
+        if not patch:
+            return None
+        version = head + 1
+        ts = _timestamp(ts)
+        self._write_new(self.patch_dir, version, {"version": version, "ts": ts, "source": source, **patch})
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps([version, ts]) + "\n")
+        if version % SNAPSHOT_EVERY == 0:
+            self.compact(version, new)
+        return version
+
+    def compact(self, version=None, records=None):
+        """Write a snapshot of `version` (default: latest)"""
+        version = self.head if version is None else version
+        records = self.records(version) if records is None else records
+        ts = self._read(self.patch_dir, version)["ts"] if version else _timestamp(None)
+        path = os.path.join(self.snapshot_dir, f"{version:08d}.json")
+        if not os.path.exists(path):
+            self._write_new(self.snapshot_dir, version, {"version": version, "ts": ts, "records": list(records.items())})
+
+    def changed(self, from_version, to_version=None):
+        """Keys (nurse ids / "<dept>/<day>") whose record differs between two versions"""
+        old = self.records(from_version)
+        new = self.records(to_version)
+        return sorted(k for k in set(old) | set(new) if old.get(k) != new.get(k))
+
+
+def changed_nurses(root, from_version, to_version=None):
+    """Nurse ids edited, added or removed between two versions of the nurse log"""
+    return DataLog(root, "nurse").changed(from_version, to_version)
+
+
+def import_backups(backup_dir, root, current=None):
+    """Replay a backups/ folder of full copies (plus the current files) into change logs.
+
+    `current` maps kind -> path of the live nurse.json / demand.json, committed last.
+    """
+    files = []
+    for name in os.listdir(backup_dir):
+        m = BACKUP_NAME.match(name)
+        if m:
+            ts = datetime.strptime(m.group(2), "%Y%m%d_%H%M%S")
+            files.append((m.group(1), ts, os.path.join(backup_dir, name)))
+    counts = {kind: 0 for kind in KINDS}
+    for kind, ts, path in sorted(files, key=lambda f: f[1]):
+        with open(path) as f:
+            if DataLog(root, kind).commit(json.load(f), source=os.path.basename(path), ts=ts):
+                counts[kind] += 1
+    for kind, path in (current or {}).items():
+        with open(path) as f:
+            if DataLog(root, kind).commit(json.load(f), source=os.path.basename(path)):
+                counts[kind] += 1
+    return counts
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Versioned nurse/demand data: commit, read and diff")
+    parser.add_argument("--root", default="data/versions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="replay a backups/ folder into the change logs")
+    p.add_argument("backup_dir")
+    p.add_argument("--nurses", default=None, help="current nurse.json, committed last")
+    p.add_argument("--demand", default=None, help="current demand.json, committed last")
+
+    p = sub.add_parser("commit", help="record a new nurse.json / demand.json")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("file")
+    p.add_argument("--source", default=None)
+
+    p = sub.add_parser("show", help="write the data at a version or point in time")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("--version", type=int, default=None)
+    p.add_argument("--at", default=None, help=f"timestamp ({TS_FORMAT})")
+    p.add_argument("-o", "--out", default=None)
+
+    p = sub.add_parser("diff", help="records changed between two versions")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("from_version", type=int)
+    p.add_argument("to_version", type=int, nargs="?", default=None)
+
+    p = sub.add_parser("log", help="list versions")
+    p.add_argument("kind", choices=KINDS)
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        current = {k: v for k, v in (("nurse", args.nurses), ("demand", args.demand)) if v}
+        counts = import_backups(args.backup_dir, args.root, current)
+        for kind in KINDS:
+            log = DataLog(args.root, kind)
+            print(f"✅ {kind}: {counts[kind]} versions imported (head {log.head})")
+    elif args.command == "commit":
+        with open(args.file) as f:
+            version = DataLog(args.root, args.kind).commit(json.load(f), source=args.source or args.file)
+        print(f"✅ {args.kind} version {version}" if version else "ℹ️ No changes, nothing committed")
+    elif args.command == "show":
+        log = DataLog(args.root, args.kind)
+        version = log.version_at(args.at) if args.at else args.version
+        text = json.dumps(log.state(version), indent=2)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(text)
+        else:
+            print(text)
+    elif args.command == "diff":
+        print("\n".join(DataLog(args.root, args.kind).changed(args.from_version, args.to_version)))
+    elif args.command == "log":
+        for entry in DataLog(args.root, args.kind).history():
+            print(f"{entry['version']:>5}  {entry['ts']}  {entry['source'] or '-'}  {', '.join(entry['changed'])}")
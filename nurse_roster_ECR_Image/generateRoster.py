@@ -1,567 +1,789 @@
-import json
-import pandas as pd
-import xgboost as xgb
-import tarfile
-import tempfile
-import numpy as np
-from collections import defaultdict
-from ortools.sat.python import cp_model
-from datetime import datetime
-import os
-import boto3
-
-s3 = boto3.client("s3")
-
-# ---------------- S3 CONFIG ----------------
-INPUT_BUCKET = os.environ.get("INPUT_S3_BUCKET", "hospital-roster-data")
-OUTPUT_BUCKET = os.environ.get("OUTPUT_S3_BUCKET", "hospital-roster-data")
-OUTPUT_PREFIX = os.environ.get("OUTPUT_PREFIX", "roster_history/")
-
-# Local paths inside container
-DATA_DIR = "data"
-
-# S3 paths for input files
-NURSES_KEY = os.environ.get("NURSE_PATH", "raw_data/nurse_data/nurse.json")
-RULES_KEY = os.environ.get("RULES_PATH", "raw_data/rules.json")
-DEMAND_KEY = os.environ.get("DEMAND_PATH", "raw_data/demand_data/demand.json")
-SHIFT_KEY = os.environ.get("SHIFT_PATH", "raw_data/shift.json")
-PAIRWISE_KEY = os.environ.get(
-    "PAIRWISE_PATH", "training/pairwise_weekly_compliance.parquet"
-)
-MODEL_KEY = os.environ.get(
-    "MODEL_PATH",
-    "training/xgboost/output/sagemaker-xgboost-2025-09-20-01-07-22-211/output/model.tar.gz",
-)
-
-
-# ---------------- HELPERS ----------------
-def download_from_s3(bucket, key, local_path):
-    os.makedirs(os.path.dirname(local_path), exist_ok=True)
-    print(f"⬇️ Downloading s3://{bucket}/{key} -> {local_path}")
-    s3.download_file(bucket, key, local_path)
-
-
-def upload_to_s3(local_path, bucket, key):
-    print(f"⬆️ Uploading {local_path} -> s3://{bucket}/{key}")
-    s3.upload_file(local_path, bucket, key)
-
-
-def load_data():
-    # Download all files from S3
-    nurses_path = os.path.join(DATA_DIR, "nurse.json")
-    rules_path = os.path.join(DATA_DIR, "rules.json")
-    demand_path = os.path.join(DATA_DIR, "demand.json")
-    shift_path = os.path.join(DATA_DIR, "shift.json")
-    train_path = os.path.join(DATA_DIR, "pairwise_weekly_compliance.parquet")
-    model_tar_path = os.path.join(DATA_DIR, "model.tar.gz")
-
-    download_from_s3(INPUT_BUCKET, NURSES_KEY, nurses_path)
-    download_from_s3(INPUT_BUCKET, RULES_KEY, rules_path)
-    download_from_s3(INPUT_BUCKET, DEMAND_KEY, demand_path)
-    download_from_s3(INPUT_BUCKET, SHIFT_KEY, shift_path)
-    download_from_s3(INPUT_BUCKET, PAIRWISE_KEY, train_path)
-    download_from_s3(INPUT_BUCKET, MODEL_KEY, model_tar_path)
-
-    # Load JSON files
-    with open(nurses_path) as f:
-        nurse_list = json.load(f)
-    with open(rules_path) as f:
-        rules = json.load(f)
-    with open(demand_path) as f:
-        demand = json.load(f)
-    with open(shift_path) as f:
-        shift_def = json.load(f)
-
-    # Extract XGBoost model
-    with tempfile.TemporaryDirectory() as tmpdir:
-        with tarfile.open(model_tar_path) as tar:
-            tar.extractall(path=tmpdir)
-        model_file = os.path.join(tmpdir, "xgboost-model")
-        model = xgb.Booster()
-        model.load_model(model_file)
-
-    df_train = pd.read_parquet(train_path)
-
-    print("✅ All data and models loaded successfully")
-    return nurse_list, rules, demand, shift_def, model, df_train
-
-
-# ---- Helper Functions ----
-def shift_hours(shift_name, shift_def):
-    return shift_def["SHIFT_HOURS"].get(shift_name, 8)
-
-
-def build_features(nurse, day, shift_type, dept, assigned_shifts, shift_def):
-    """Build features for XGBoost prediction"""
-    features = {}
-
-    # Nurse characteristics
-    features["cand_experience"] = nurse.get("experience_years", 0)
-    features["cand_hours_contract"] = nurse.get("contracted_hours", 40)
-    seniority_map = {"Junior": 0, "Mid": 1, "Senior": 2}
-    features["cand_seniority_num"] = seniority_map.get(nurse.get("seniority_level"), 0)
-
-    # Preferences
-    prefs = nurse.get("preferences", [])
-    features["pref_morning"] = int("Morning" in prefs)
-    features["pref_evening"] = int("Evening" in prefs)
-    features["pref_night"] = int("Night" in prefs)
-
-    # Skills
-    skills = nurse.get("skills", [])
-    for skill in ["ER", "General", "ICU", "OT", "Pediatrics"]:
-        features[f"skill_{skill}"] = int(skill in skills)
-
-    # Current workload analysis
-    sh_hours = shift_hours(shift_type, shift_def)
-    weekly_hours = sum(
-        shift_hours(s["shift"], shift_def)
-        for s in assigned_shifts.get(nurse["nurse_id"], [])
-    )
-    daily_hours = sum(
-        shift_hours(s["shift"], shift_def)
-        for s in assigned_shifts.get(nurse["nurse_id"], [])
-        if s["day"] == day
-    )
-    days_worked = {s["day"] for s in assigned_shifts.get(nurse["nurse_id"], [])}
-
-    features["hours_in_week"] = weekly_hours
-    features["would_violate_45"] = int(
-        weekly_hours + sh_hours > 45  # Hardcoded for now, should be from rules
-    )
-    features["would_violate_8_per_day"] = int(
-        daily_hours + sh_hours > 8  # Hardcoded for now, should be from rules
-    )
-    features["has_rest_day"] = int(len(days_worked) < 7)
-
-    return features
-
-
-def predict_assignment_quality(
-    nurse, day, shift_type, dept, assigned_shifts, xgb_model, shift_def
-):
-    """Use XGBoost to predict the quality/compliance score of an assignment"""
-    try:
-        features = build_features(
-            nurse, day, shift_type, dept, assigned_shifts, shift_def
-        )
-
-        # Convert to format expected by XGBoost
-        feature_array = np.array([list(features.values())]).astype(float)
-
-        # Get prediction (higher score = better assignment)
-        dmatrix = xgb.DMatrix(feature_array)
-        score = xgb_model.predict(dmatrix)[0]
-
-        return float(score)
-    except Exception as e:
-        print(f"Warning: XGBoost prediction failed for nurse {nurse['nurse_id']}: {e}")
-        return 0.5  # Default neutral score
-
-
-def build_and_solve_hybrid(nurses, shift, rules, demand, xgb_model):
-    """
-    Hybrid approach: CP-SAT for hard constraints + XGBoost for optimal assignments
-    """
-    model = cp_model.CpModel()
-
-    # Extract configuration
-    SHIFT_TIMES = shift["SHIFT_TIMES"]
-    SHIFT_HOURS = shift["SHIFT_HOURS"]
-    DAYS = rules["general"]["days"]
-    DEPARTMENTS = rules["general"]["departments"]
-    ALL_SKILLS = rules["general"]["skills"]
-    CORE_SKILL = rules["general"]["core_skill"]
-
-    # Constraint settings
-    DAILY_HOURS_CAP = rules["constraints"]["daily_hours_cap"]
-    WEEKLY_HOUR_CAP = rules["constraints"]["weekly_hours_cap"]
-    REST_TIME_HOURS = rules["constraints"]["rest_time_hours"]
-    WEEKLY_REST_DAYS = rules["constraints"]["weekly_rest_days"]
-    DEPARTMENT_BALANCE_RULE = rules["constraints"]["department_balance"]["enabled"]
-    CORE_SKILL_REQUIREMENT = rules["constraints"]["core_skill_requirement"]["enabled"]
-    SKILL_MIX_REQUIREMENT = rules["constraints"]["skill_mix_requirement"]["enabled"]
-
-    TIME_SLOTS = list(SHIFT_HOURS.keys())
-    day_index = {d: i for i, d in enumerate(DAYS)}
-
-    # Precompute shift timing offsets
-    def _to_min(t):
-        h, m = map(int, t.split(":"))
-        return h * 60 + m
-
-    slot_offsets = {}
-    for sname, (st, ed) in SHIFT_TIMES.items():
-        smin = _to_min(st)
-        emin = _to_min(ed)
-        if emin <= smin:
-            emin += 24 * 60
-        slot_offsets[sname] = (smin, emin)
-
-    # Create assignment variables
-    assignment = {}
-    for n in nurses:
-        nid = n["nurse_id"]
-        for dept in DEPARTMENTS:
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    assignment[(nid, dept, d, s)] = model.NewBoolVar(
-                        f"a_{nid}_{dept}_{d}_{s}"
-                    )
-
-    # ========== HARD CONSTRAINTS (Labor Laws & Regulations) ==========
-
-    # 1. Daily hours cap (Labor law)
-    for n in nurses:
-        nid = n["nurse_id"]
-        for d in DAYS:
-            model.Add(
-                sum(
-                    assignment[(nid, dept, d, s)] * SHIFT_HOURS[s]
-                    for dept in DEPARTMENTS
-                    for s in TIME_SLOTS
-                )
-                <= DAILY_HOURS_CAP
-            )
-
-    # 2. Weekly hours cap (Labor law)
-    for n in nurses:
-        nid = n["nurse_id"]
-        model.Add(
-            sum(
-                assignment[(nid, dept, d, s)] * SHIFT_HOURS[s]
-                for dept in DEPARTMENTS
-                for d in DAYS
-                for s in TIME_SLOTS
-            )
-            <= WEEKLY_HOUR_CAP
-        )
-
-    # 3. Contracted hours equality (Contract requirement)
-    for n in nurses:
-        nid = n["nurse_id"]
-        contracted = int(n.get("contracted_hours", 0))
-        if contracted > 0:
-            model.Add(
-                sum(
-                    assignment[(nid, dept, d, s)] * SHIFT_HOURS[s]
-                    for dept in DEPARTMENTS
-                    for d in DAYS
-                    for s in TIME_SLOTS
-                )
-                == contracted
-            )
-
-    # 4. One department per nurse per shift (Physical constraint)
-    for n in nurses:
-        nid = n["nurse_id"]
-        for d in DAYS:
-            for s in TIME_SLOTS:
-                model.Add(
-                    sum(assignment[(nid, dept, d, s)] for dept in DEPARTMENTS) <= 1
-                )
-
-    # 5. Minimum coverage requirements (Patient safety)
-    for dept in DEPARTMENTS:
-        for d in DAYS:
-            for s in TIME_SLOTS:
-                min_required = demand[dept][d][s]["min"]
-                max_required = demand[dept][d][s]["max"]
-                model.Add(
-                    sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses)
-                    >= min_required
-                )
-                model.Add(
-                    sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses)
-                    <= max_required
-                )
-
-    # 6. Respect unavailability (Legal/contractual)
-    for n in nurses:
-        nid = n["nurse_id"]
-        for ua in n.get("unavailability", []):
-            if "-" not in ua:
-                continue
-            day_str, slot = ua.split("-")
-            if day_str in DAYS and slot in TIME_SLOTS:
-                for dept in DEPARTMENTS:
-                    model.Add(assignment[(nid, dept, day_str, slot)] == 0)
-
-    # 7. Mandatory rest days (Labor law)
-    for n in nurses:
-        nid = n["nurse_id"]
-        rest_day_vars = []
-        for d in DAYS:
-            daily_vars = [
-                assignment[(nid, dept, d, s)]
-                for dept in DEPARTMENTS
-                for s in TIME_SLOTS
-            ]
-            rest = model.NewBoolVar(f"rest_{nid}_{d}")
-            model.Add(sum(daily_vars) == 0).OnlyEnforceIf(rest)
-            model.Add(sum(daily_vars) > 0).OnlyEnforceIf(rest.Not())
-            rest_day_vars.append(rest)
-        model.Add(sum(rest_day_vars) == WEEKLY_REST_DAYS)
-
-    # 8. Core skill requirements (Patient safety regulation)
-    if CORE_SKILL_REQUIREMENT or SKILL_MIX_REQUIREMENT:
-        for dept in DEPARTMENTS:
-            core_skill = CORE_SKILL[dept]
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    if demand[dept][d][s]["min"] <= 0:
-                        continue
-
-                    if CORE_SKILL_REQUIREMENT:
-                        model.Add(
-                            sum(
-                                assignment[(n["nurse_id"], dept, d, s)]
-                                for n in nurses
-                                if core_skill in n.get("skills", [])
-                            )
-                            >= 1
-                        )
-
-                    if SKILL_MIX_REQUIREMENT:
-                        skill_vars = {}
-                        for skill in ALL_SKILLS:
-                            v = model.NewBoolVar(
-                                f"skill_present_{dept}_{d}_{s}_{skill}"
-                            )
-                            skilled_nurses_vars = [
-                                assignment[(n["nurse_id"], dept, d, s)]
-                                for n in nurses
-                                if skill in n.get("skills", [])
-                            ]
-                            if skilled_nurses_vars:
-                                model.AddMaxEquality(v, skilled_nurses_vars)
-                            else:
-                                model.Add(v == 0)
-                            skill_vars[skill] = v
-                        model.Add(sum(skill_vars.values()) >= 3)
-
-    # 9. Minimum rest between shifts (Labor law)
-    for n in nurses:
-        nid = n["nurse_id"]
-        tasks = []
-        for d in DAYS:
-            d_idx = day_index[d]
-            for s in TIME_SLOTS:
-                start_min, end_min = slot_offsets[s]
-                start_abs = d_idx * 24 * 60 + start_min
-                end_abs = d_idx * 24 * 60 + end_min
-                tasks.append((d, s, start_abs, end_abs))
-
-        for i in range(len(tasks)):
-            d1, s1, start1, end1 = tasks[i]
-            vars1 = [assignment[(nid, dept, d1, s1)] for dept in DEPARTMENTS]
-
-            for j in range(len(tasks)):
-                if i == j:
-                    continue
-                d2, s2, start2, end2 = tasks[j]
-                if start2 < start1:
-                    continue
-
-                rest_minutes = start2 - end1
-                if rest_minutes < REST_TIME_HOURS * 60:
-                    vars2 = [assignment[(nid, dept, d2, s2)] for dept in DEPARTMENTS]
-                    model.Add(sum(vars1) + sum(vars2) <= 1)
-
-    # 10. Department balance (Operational regulation)
-    if DEPARTMENT_BALANCE_RULE:
-        for d in DAYS:
-            for s in TIME_SLOTS:
-                counts = [
-                    sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses)
-                    for dept in DEPARTMENTS
-                ]
-                for i in range(len(counts)):
-                    for j in range(i + 1, len(counts)):
-                        model.Add(counts[i] - counts[j] <= 1)
-                        model.Add(counts[j] - counts[i] <= 1)
-
-    # ========== OPTIMIZATION OBJECTIVE (XGBoost-driven) ==========
-
-    print("🧠 Computing XGBoost quality scores for all possible assignments...")
-
-    # Pre-compute XGBoost scores for all possible assignments
-    quality_scores = {}
-    assigned_shifts = defaultdict(list)  # Start with empty assignments
-
-    total_assignments = len(nurses) * len(DEPARTMENTS) * len(DAYS) * len(TIME_SLOTS)
-    computed = 0
-
-    for n in nurses:
-        nid = n["nurse_id"]
-        for dept in DEPARTMENTS:
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    # Get XGBoost quality score for this assignment
-                    score = predict_assignment_quality(
-                        n, d, s, dept, assigned_shifts, xgb_model, shift
-                    )
-
-                    # Scale score to integer for CP-SAT (multiply by 1000 for precision)
-                    quality_scores[(nid, dept, d, s)] = int(score * 1000)
-
-                    computed += 1
-                    if computed % 1000 == 0:
-                        print(
-                            f"  Computed {computed}/{total_assignments} quality scores..."
-                        )
-
-    print(f"✅ Computed all {total_assignments} quality scores")
-
-    # Create objective: maximize XGBoost-predicted quality + basic preferences
-    objective_terms = []
-
-    # XGBoost quality scores (primary objective)
-    for (nid, dept, d, s), var in assignment.items():
-        xgb_score = quality_scores.get((nid, dept, d, s), 500)  # Default neutral score
-        objective_terms.append(xgb_score * var)
-
-    # Basic preference bonus (secondary objective, smaller weight)
-    preference_bonus = []
-    for n in nurses:
-        nid = n["nurse_id"]
-        prefs = set(p for p in n.get("preferences", []))
-        for d in DAYS:
-            for s in TIME_SLOTS:
-                for p in prefs:
-                    if s.endswith(p):
-                        for dept in DEPARTMENTS:
-                            # Small bonus (100 points) for preference match
-                            preference_bonus.append(100 * assignment[(nid, dept, d, s)])
-
-    # Combine objectives (XGBoost scores are weighted much higher)
-    total_objective = objective_terms + preference_bonus
-
-    if total_objective:
-        model.Maximize(sum(total_objective))
-        print(
-            f"🎯 Objective includes {len(objective_terms)} XGBoost scores + {len(preference_bonus)} preference bonuses"
-        )
-
-    # ========== SOLVE THE MODEL ==========
-
-    print("🔍 Solving optimization model...")
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = 300  # 5 minutes for complex problems
-
-    status = solver.Solve(model)
-
-    # ========== RETURN RESULTS ==========
-
-    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-        status_msg = "OPTIMAL" if status == cp_model.OPTIMAL else "FEASIBLE"
-        print(f"✅ {status_msg} solution found!")
-
-        solution = {}
-        total_xgb_score = 0
-        assignment_count = 0
-
-        for (nid, dept, d, s), var in assignment.items():
-            if solver.Value(var) == 1:
-                if nid not in solution:
-                    solution[nid] = []
-                solution[nid].append(
-                    {
-                        "department": dept,
-                        "day": d,
-                        "shift": s,
-                        "hours": SHIFT_HOURS[s],
-                        "xgb_quality_score": quality_scores.get((nid, dept, d, s), 500)
-                        / 1000.0,
-                    }
-                )
-                total_xgb_score += quality_scores.get((nid, dept, d, s), 500)
-                assignment_count += 1
-
-        avg_quality = (
-            total_xgb_score / (assignment_count * 1000.0) if assignment_count > 0 else 0
-        )
-        print(
-            f"📊 Solution quality: {avg_quality:.3f} average XGBoost score ({assignment_count} assignments)"
-        )
-
-        return solution, status
-    else:
-        print("❌ No feasible solution found!")
-        return None, status
-
-
-def save_roster_to_s3(roster):
-    """Save roster to S3 with timestamped name"""
-    current_time = datetime.now().strftime("%d%m%Y")
-    roster_filename = f"roster_{current_time}.json"
-    local_path = os.path.join("/tmp", roster_filename)  # temp path inside container
-
-    with open(local_path, "w") as f:
-        json.dump(roster, f, indent=2)
-
-    s3_key = f"{OUTPUT_PREFIX}{roster_filename}"
-    upload_to_s3(local_path, OUTPUT_BUCKET, s3_key)
-    print(f"✅ Roster saved to s3://{OUTPUT_BUCKET}/{s3_key}")
-
-
-def generate_roster():
-    """Main Fargate-friendly roster generation function"""
-    print("🚀 Starting hybrid CP-SAT + XGBoost roster generation...")
-
-    nurse_list, rules, demand, shift_def, model, df_train = load_data()
-    solution, status = build_and_solve_hybrid(
-        nurse_list, shift_def, rules, demand, model
-    )
-
-    if solution:
-        # Format output
-        generated = {"departments": []}
-        dept_assignments = defaultdict(list)
-        for nurse_id, assignments in solution.items():
-            for a in assignments:
-                dept_assignments[a["department"]].append(
-                    {
-                        "id": nurse_id,
-                        "day": a["day"],
-                        "shift": a["shift"],
-                        "xgb_score": a["xgb_quality_score"],
-                    }
-                )
-
-        for dept_name, assigns in dept_assignments.items():
-            nurse_map = defaultdict(list)
-            for a in assigns:
-                nurse_map[a["id"]].append(
-                    {
-                        "day": a["day"],
-                        "shift": a["shift"],
-                        "quality_score": a["xgb_score"],
-                    }
-                )
-            nurses_out = []
-            for nid, shifts in nurse_map.items():
-                nurses_out.append(
-                    {
-                        "id": nid,
-                        "shifts": [
-                            {"day": s["day"], "shift": s["shift"]} for s in shifts
-                        ],
-                    }
-                )
-            generated["departments"].append({"name": dept_name, "nurses": nurses_out})
-
-        save_roster_to_s3(generated)
-        print("🎉 Nurse roster generation completed successfully!")
-        return True
-    else:
-        print("❌ Failed to generate roster")
-        return False
-
-
-def main():
-    generate_roster()
-
-
-if __name__ == "__main__":
-    main()
+import json
+import pandas as pd
+import numpy as np
+from collections import defaultdict
+from ortools.sat.python import cp_model
+from datetime import datetime
+import os
+import boto3
+
+from rosterDomain import load_inputs
+from rosterRules import RuleContext, add_hard_constraints, assignment_vars
+from treeEvaluator import TreeEnsemble, compile_model
+from scoreTable import load_or_build
+from candidatePruning import candidate_mask, widening_schedule
+from nurseFeatureStore import (
+    DAILY_VIOLATION_HOURS,
+    FEATURE_STORE_DIR,
+    STATIC_FEATURES,
+    WEEK_DAYS,
+    WEEKLY_VIOLATION_HOURS,
+    WORKLOAD_FEATURES,
+    open_store,
+    static_features,
+    workload_features,
+)
+from nurseRegistry import NurseRegistry
+from wardDecomposition import solve_by_ward
+from weeklyPatterns import solve_by_patterns
+
+s3 = boto3.client("s3")
+
+# ---------------- S3 CONFIG ----------------
+INPUT_BUCKET = os.environ.get("INPUT_S3_BUCKET", "hospital-roster-data")
+OUTPUT_BUCKET = os.environ.get("OUTPUT_S3_BUCKET", "hospital-roster-data")
+OUTPUT_PREFIX = os.environ.get("OUTPUT_PREFIX", "roster_history/")
+
+# Local paths inside container
+DATA_DIR = "data"
+
+# S3 paths for input files
+NURSES_KEY = os.environ.get("NURSE_PATH", "raw_data/nurse_data/nurse.json")
+RULES_KEY = os.environ.get("RULES_PATH", "raw_data/rules.json")
+DEMAND_KEY = os.environ.get("DEMAND_PATH", "raw_data/demand_data/demand.json")
+SHIFT_KEY = os.environ.get("SHIFT_PATH", "raw_data/shift.json")
+PAIRWISE_KEY = os.environ.get(
+    "PAIRWISE_PATH", "training/pairwise_weekly_compliance.parquet"
+)
+MODEL_KEY = os.environ.get(
+    "MODEL_PATH",
+    "training/xgboost/output/sagemaker-xgboost-2025-09-20-01-07-22-211/output/model.tar.gz",
+)
+# Optional treeEvaluator .npz of the same model; skips importing xgboost at start-up
+COMPILED_MODEL_KEY = os.environ.get("COMPILED_MODEL_PATH")
+
+# Ranker used to prune candidate nurses per department shift (0 = no pruning)
+RANKER_BUCKET = os.environ.get("RANKER_S3_BUCKET", "hospital-roster-models")
+RANKER_KEY = os.environ.get("RANKER_PATH", "xgboost/nurse_roster_ranker.json")
+RANKER_TOP_K = int(os.environ.get("RANKER_TOP_K", 0))
+SOLVER_TIME_LIMIT = 300  # 5 minutes for complex problems
+
+# Local nurseRegistry.py database; when set, nurse.json is exported from it instead of S3
+NURSE_REGISTRY_PATH = os.environ.get("NURSE_REGISTRY_PATH")
+
+# Precomputed candidate scores from batchInference.py (local dir or s3:// URI)
+PREDICTIONS_PATH = os.environ.get("PREDICTIONS_PATH")
+PLANNING_PERIOD = os.environ.get("PLANNING_PERIOD")  # default: current ISO week
+
+# How the XGBoost scores steer the CP-SAT search (see add_search_guidance)
+SEARCH_MODES = ("default", "strategy", "hints")
+SEARCH_MODE = os.environ.get("SEARCH_MODE", "default")
+
+# Workload-aware re-scoring (0 = score once against an empty roster)
+RESCORE_ITERATIONS = int(os.environ.get("RESCORE_ITERATIONS", 0))
+RESCORE_TIME_LIMIT = 60  # per re-solve; the first solve keeps SOLVER_TIME_LIMIT
+
+# Ward-by-ward solve with a shared float pool (0 = one model for all departments)
+FLOAT_POOL_ITERATIONS = int(os.environ.get("FLOAT_POOL_ITERATIONS", 0))
+
+# Weekly-pattern column generation (0 = one variable per nurse/dept/day/slot)
+PATTERN_SEARCH = int(os.environ.get("PATTERN_SEARCH", 0))
+
+
+# ---------------- HELPERS ----------------
+def download_from_s3(bucket, key, local_path):
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    print(f"⬇️ Downloading s3://{bucket}/{key} -> {local_path}")
+    s3.download_file(bucket, key, local_path)
+
+
+def upload_to_s3(local_path, bucket, key):
+    print(f"⬆️ Uploading {local_path} -> s3://{bucket}/{key}")
+    s3.upload_file(local_path, bucket, key)
+
+
+def load_data():
+    # Download all files from S3
+    nurses_path = os.path.join(DATA_DIR, "nurse.json")
+    rules_path = os.path.join(DATA_DIR, "rules.json")
+    demand_path = os.path.join(DATA_DIR, "demand.json")
+    shift_path = os.path.join(DATA_DIR, "shift.json")
+    train_path = os.path.join(DATA_DIR, "pairwise_weekly_compliance.parquet")
+    model_tar_path = os.path.join(DATA_DIR, "model.tar.gz")
+
+    if NURSE_REGISTRY_PATH:
+        with NurseRegistry(NURSE_REGISTRY_PATH) as registry:
+            registry.export(nurses_path)
+        print(f"✅ Exported nurses from registry {NURSE_REGISTRY_PATH}")
+    else:
+        download_from_s3(INPUT_BUCKET, NURSES_KEY, nurses_path)
+    download_from_s3(INPUT_BUCKET, RULES_KEY, rules_path)
+    download_from_s3(INPUT_BUCKET, DEMAND_KEY, demand_path)
+    download_from_s3(INPUT_BUCKET, SHIFT_KEY, shift_path)
+    download_from_s3(INPUT_BUCKET, PAIRWISE_KEY, train_path)
+    if COMPILED_MODEL_KEY:
+        compiled_path = os.path.join(DATA_DIR, "model_trees.npz")
+        download_from_s3(INPUT_BUCKET, COMPILED_MODEL_KEY, compiled_path)
+    else:
+        download_from_s3(INPUT_BUCKET, MODEL_KEY, model_tar_path)
+
+    # Load and validate JSON files (parsed tables cached, see rosterDomain.py)
+    inputs = load_inputs(nurses_path, rules_path, demand_path, shift_path)
+    nurse_list, shift_def, rules, demand = inputs.raw
+
+    # XGBoost model as flat NumPy trees (see treeEvaluator.py)
+    if COMPILED_MODEL_KEY:
+        model = TreeEnsemble.load(compiled_path)
+    else:
+        model = compile_model(model_tar_path)
+
+    df_train = pd.read_parquet(train_path)
+
+    print("✅ All data and models loaded successfully")
+    return nurse_list, rules, demand, shift_def, model, df_train
+
+
+def load_ranker():
+    """nurse_roster_ranker.json compiled to NumPy trees"""
+    ranker_path = os.path.join(DATA_DIR, "nurse_roster_ranker.json")
+    download_from_s3(RANKER_BUCKET, RANKER_KEY, ranker_path)
+    return compile_model(ranker_path)
+
+
+def load_predictions(nurses, shift, rules, demand, model):
+    """Precomputed scores from PREDICTIONS_PATH; None if unset or stale for this model/input"""
+    if not PREDICTIONS_PATH:
+        return None
+    from batchInference import read_predictions
+
+    ctx = RuleContext(nurses, shift, rules, demand)
+    score_grid = read_predictions(ctx, PREDICTIONS_PATH, model, shift, PLANNING_PERIOD)
+    if score_grid is None:
+        print(f"⚠️ No current predictions in {PREDICTIONS_PATH}, scoring at solve time")
+    return score_grid
+
+
+# ---- Helper Functions ----
+NUM_STATIC_FEATURES = len(STATIC_FEATURES)  # nurse characteristics, preferences and skills come first
+NUM_WORKLOAD_FEATURES = len(WORKLOAD_FEATURES)
+
+
+def build_features(nurse, day, shift_type, dept, assigned_shifts, shift_def):
+    """Build features for XGBoost prediction"""
+    # Nurse characteristics, preferences and skills (see nurseFeatureStore.py)
+    features = static_features(nurse)
+    features.update(workload_features(nurse["nurse_id"], day, shift_type, assigned_shifts, shift_def))
+    return features
+
+
+def nurse_feature_store(nurses):
+    return open_store(nurses, FEATURE_STORE_DIR)
+
+
+def predict_assignment_quality(
+    nurse, day, shift_type, dept, assigned_shifts, xgb_model, shift_def
+):
+    """Use XGBoost to predict the quality/compliance score of an assignment"""
+    try:
+        features = build_features(
+            nurse, day, shift_type, dept, assigned_shifts, shift_def
+        )
+
+        # Get prediction (higher score = better assignment)
+        feature_array = np.array([list(features.values())], dtype=np.float32)
+        score = xgb_model.predict(feature_array)[0]
+
+        return float(score)
+    except Exception as e:
+        print(f"Warning: XGBoost prediction failed for nurse {nurse['nurse_id']}: {e}")
+        return 0.5  # Default neutral score
+
+
+def assignment_feature_rows(nurses, shift, departments, days, time_slots, store=None):
+    """Keys and feature matrix of every possible (nurse, dept, day, slot) assignment, in that order"""
+    store = store or nurse_feature_store(nurses)
+    static = store.rows([n["nurse_id"] for n in nurses])
+    # Start with empty assignments: the workload columns only depend on the slot
+    workload = np.array(
+        [list(workload_features(None, days[0], s, {}, shift).values()) for s in time_slots],
+        dtype=np.float32,
+    )
+    N, E, D, S = len(nurses), len(departments), len(days), len(time_slots)
+    rows = np.empty((N, E, D, S, static.shape[1] + workload.shape[1]), dtype=np.float32)
+    rows[..., :NUM_STATIC_FEATURES] = static[:, None, None, None, :]
+    rows[..., NUM_STATIC_FEATURES:] = workload
+    keys = [
+        (n["nurse_id"], dept, d, s)
+        for n in nurses
+        for dept in departments
+        for d in days
+        for s in time_slots
+    ]
+    return keys, rows.reshape(-1, rows.shape[-1])
+
+
+def quality_grid(ctx, nurses, shift, xgb_model):
+    """XGBoost score of every assignment as a (nurse, dept, day, slot) array"""
+    # One feature row per possible assignment, scored in a single batch
+    _, rows = assignment_feature_rows(nurses, shift, ctx.depts, ctx.days, ctx.slots)
+
+    # Exhaustive lookup table of the model, cached per model hash (see scoreTable.py)
+    score_table = load_or_build(xgb_model, os.path.join(DATA_DIR, "score_table.npz"))
+    return score_table.lookup(rows).reshape(ctx.shape)
+
+
+def ranker_scores(ctx, nurses, shift, ranker):
+    """Ranker score of every assignment as a (nurse, dept, day, slot) array"""
+    _, X = assignment_feature_rows(nurses, shift, ctx.depts, ctx.days, ctx.slots)
+    table = load_or_build(ranker, os.path.join(DATA_DIR, "ranker_score_table.npz"))
+    return table.lookup(X).reshape(ctx.shape)
+
+
+def greedy_hint(ctx, score_grid, allowed):
+    """0/1 (nurse, dept, day, slot) roster staffing every shift's minimum with
+    its best-scored nurses, one shift per nurse per day, within contracted hours"""
+    hint = np.zeros(ctx.shape, dtype=bool)
+    hours_left = np.where(ctx.contracted > 0, ctx.contracted, ctx.weekly_cap).astype(int)
+    N, E, D, S = ctx.shape
+    for d in range(D):
+        busy = np.zeros(N, dtype=bool)
+        # Longest shifts first: they are the hardest to fit into contracts
+        for s in np.argsort(-ctx.hours, kind="stable"):
+            h = int(ctx.hours[s])
+            for e in range(E):
+                need = int(ctx.demand_min[e, d, s])
+                if need == 0:
+                    continue
+                free = allowed[:, e, d, s] & ~busy & ~ctx.unavailable[:, d, s] & (hours_left >= h)
+                order = np.argsort(-score_grid[:, e, d, s], kind="stable")
+                order = order[free[order]]
+                core = order[ctx.core_mask[order, e]]
+                picked = list(core[:1])
+                picked += [n for n in order if n not in picked][: max(0, need - len(picked))]
+                hint[picked, e, d, s] = True
+                busy[picked] = True
+                hours_left[picked] -= h
+    return hint
+
+
+def add_search_guidance(ctx, model, x, score_grid, mode, candidates=None):
+    """Turn the precomputed scores into a search strategy or a solution hint.
+
+    "strategy": branch on assignment variables in descending score order,
+    trying 1 first. "hints": hint greedy_hint()'s roster. "default": nothing.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+    if mode == "default":
+        return
+    allowed = candidates if candidates is not None else np.ones(ctx.shape, dtype=bool)
+    if mode == "strategy":
+        order = np.argsort(-score_grid, axis=None, kind="stable")
+        ranked = [x.flat[i] for i in order if allowed.flat[i]]
+        model.AddDecisionStrategy(ranked, cp_model.CHOOSE_FIRST, cp_model.SELECT_MAX_VALUE)
+        print(f"🧭 Decision strategy over {len(ranked)} assignment variables by score")
+    else:
+        hint = greedy_hint(ctx, score_grid, allowed)
+        for idx in zip(*np.nonzero(allowed)):
+            model.AddHint(x[idx], bool(hint[idx]))
+        print(f"🧭 Hinted a greedy roster of {int(hint.sum())} assignments")
+
+
+class WorkloadFeatures:
+    """Feature rows of every (nurse, day, slot) against a current roster, kept up to date per nurse
+
+    build_features scores each assignment as if the roster were empty, so the
+    four workload features are always 0/0/0/1. Here they are derived from a
+    solution instead: the static columns come from the nurse feature store, and
+    update() only recomputes (and re-scores) the rows of nurses whose
+    assignments changed. Scores do not depend on the department (build_features
+    ignores it), so the grid is (nurse, day, slot) and broadcast over depts.
+    """
+
+    def __init__(self, ctx, nurses, shift, score_table, store=None):
+        N, E, D, S = ctx.shape
+        store = store or nurse_feature_store(nurses)
+        static = store.rows(ctx.nurse_ids)
+        self.rows = np.zeros((N, D, S, NUM_STATIC_FEATURES + NUM_WORKLOAD_FEATURES), dtype=np.float32)
+        self.rows[..., :NUM_STATIC_FEATURES] = static[:, None, None, :]
+        self.hours = ctx.hours.astype(np.float32)
+        self.score_table = score_table
+        self.num_depts = E
+        self.X = np.zeros(ctx.shape, dtype=bool)
+        self.scores = np.empty((N, D, S), dtype=np.float32)
+        self._refresh(np.arange(N))
+
+    def _refresh(self, idx):
+        # Same semantics as build_features, for all of a nurse's cells at once
+        daily = (self.X[idx] * self.hours).sum(axis=(1, 3))  # (k, D)
+        weekly = daily.sum(axis=1)[:, None, None]
+        days_worked = (daily > 0).sum(axis=1)[:, None, None]
+        rows = self.rows[idx]
+        rows[..., NUM_STATIC_FEATURES] = weekly
+        rows[..., NUM_STATIC_FEATURES + 1] = weekly + self.hours > WEEKLY_VIOLATION_HOURS
+        rows[..., NUM_STATIC_FEATURES + 2] = daily[:, :, None] + self.hours > DAILY_VIOLATION_HOURS
+        rows[..., NUM_STATIC_FEATURES + 3] = days_worked < WEEK_DAYS
+        self.rows[idx] = rows
+        self.scores[idx] = self.score_table.lookup(rows.reshape(-1, rows.shape[-1])).reshape(
+            self.scores[idx].shape
+        )
+
+    def update(self, X):
+        """Take a new (nurse, dept, day, slot) solution; returns the indices of re-scored nurses"""
+        X = np.asarray(X, dtype=bool)
+        changed = np.flatnonzero((X != self.X).any(axis=(1, 2, 3)))
+        self.X = X.copy()
+        if len(changed):
+            self._refresh(changed)
+        return changed
+
+    def score_grid(self):
+        N, D, S = self.scores.shape
+        return np.broadcast_to(self.scores[:, None], (N, self.num_depts, D, S))
+
+
+def preference_terms(nurses, assignment, departments, days, time_slots):
+    """Basic preference bonus (secondary objective, smaller weight)"""
+    preference_bonus = []
+    for n in nurses:
+        nid = n["nurse_id"]
+        prefs = set(p for p in n.get("preferences", []))
+        for d in days:
+            for s in time_slots:
+                for p in prefs:
+                    if s.endswith(p):
+                        for dept in departments:
+                            # Small bonus (100 points) for preference match
+                            preference_bonus.append(100 * assignment[(nid, dept, d, s)])
+    return preference_bonus
+
+
+def preference_grid(ctx, nurses):
+    """preference_terms as a (nurse, slot) array of bonus points per assignment"""
+    grid = np.zeros((len(nurses), len(ctx.slots)), dtype=np.int64)
+    for n, nurse in enumerate(nurses):
+        for p in set(nurse.get("preferences", [])):
+            grid[n] += [100 * s.endswith(p) for s in ctx.slots]
+    return grid
+
+
+def set_objective(model, assignment, quality_scores, preference_bonus):
+    """(Re)set the objective: XGBoost quality scores plus the preference bonus"""
+    # XGBoost quality scores (primary objective)
+    objective_terms = []
+    for (nid, dept, d, s), var in assignment.items():
+        xgb_score = quality_scores.get((nid, dept, d, s), 500)  # Default neutral score
+        objective_terms.append(xgb_score * var)
+
+    # Combine objectives (XGBoost scores are weighted much higher)
+    total_objective = objective_terms + preference_bonus
+
+    if total_objective:
+        model.Maximize(sum(total_objective))
+        print(
+            f"🎯 Objective includes {len(objective_terms)} XGBoost scores + {len(preference_bonus)} preference bonuses"
+        )
+
+
+def extract_solution(solver, assignment, quality_scores, shift_hours_map):
+    """{nurse_id: [assignment dicts]} of a solved model"""
+    solution = {}
+    total_xgb_score = 0
+    assignment_count = 0
+
+    for (nid, dept, d, s), var in assignment.items():
+        if solver.Value(var) == 1:
+            if nid not in solution:
+                solution[nid] = []
+            solution[nid].append(
+                {
+                    "department": dept,
+                    "day": d,
+                    "shift": s,
+                    "hours": shift_hours_map[s],
+                    "xgb_quality_score": quality_scores.get((nid, dept, d, s), 500)
+                    / 1000.0,
+                }
+            )
+            total_xgb_score += quality_scores.get((nid, dept, d, s), 500)
+            assignment_count += 1
+
+    avg_quality = (
+        total_xgb_score / (assignment_count * 1000.0) if assignment_count > 0 else 0
+    )
+    print(
+        f"📊 Solution quality: {avg_quality:.3f} average XGBoost score ({assignment_count} assignments)"
+    )
+    return solution
+
+
+def solution_from_array(ctx, X, quality, shift_hours_map):
+    """extract_solution for a boolean (nurse, dept, day, slot) roster and its integer scores"""
+    solution = {}
+    for n, e, d, s in np.argwhere(X):
+        solution.setdefault(ctx.nurse_ids[n], []).append(
+            {
+                "department": ctx.depts[e],
+                "day": ctx.days[d],
+                "shift": ctx.slots[s],
+                "hours": shift_hours_map[ctx.slots[s]],
+                "xgb_quality_score": int(quality[n, e, d, s]) / 1000.0,
+            }
+        )
+    count = int(X.sum())
+    avg_quality = quality[X].sum() / (count * 1000.0) if count > 0 else 0
+    print(f"📊 Solution quality: {avg_quality:.3f} average XGBoost score ({count} assignments)")
+    return solution
+
+
+def build_and_solve_hybrid(
+    nurses,
+    shift,
+    rules,
+    demand,
+    xgb_model,
+    candidates=None,
+    time_limit=SOLVER_TIME_LIMIT,
+    search=None,
+    solution_callback=None,
+    score_grid=None,
+):
+    """
+    Hybrid approach: CP-SAT for hard constraints + XGBoost for optimal assignments
+
+    `candidates` optionally restricts the assignment variables to a
+    (nurse, dept, day, slot) mask, see candidatePruning.py. `search` is one of
+    SEARCH_MODES (default: SEARCH_MODE); `solution_callback` is passed on to
+    CpSolver.Solve. `score_grid` takes precomputed (nurse, dept, day, slot)
+    scores (see batchInference.py) instead of scoring at solve time.
+    """
+    model = cp_model.CpModel()
+
+    # Extract configuration
+    SHIFT_HOURS = shift["SHIFT_HOURS"]
+    DAYS = rules["general"]["days"]
+    DEPARTMENTS = rules["general"]["departments"]
+    TIME_SLOTS = list(SHIFT_HOURS.keys())
+
+    # Create assignment variables
+    ctx = RuleContext(nurses, shift, rules, demand)
+    x, assignment = assignment_vars(ctx, model, allowed=candidates)
+    if candidates is not None:
+        print(f"✂️ {int(candidates.sum())}/{candidates.size} assignment variables after pruning")
+
+    # ========== HARD CONSTRAINTS (Labor Laws & Regulations) ==========
+    # Declared once in rosterRules.py and shared with evaluateRoster
+    add_hard_constraints(ctx, model, x)
+
+    # ========== OPTIMIZATION OBJECTIVE (XGBoost-driven) ==========
+
+    print("🧠 Computing XGBoost quality scores for all possible assignments...")
+
+    # Pre-compute XGBoost scores for all possible assignments
+    quality_scores = {}
+
+    if score_grid is None:
+        score_grid = quality_grid(ctx, nurses, shift, xgb_model)
+    else:
+        print("📦 Using precomputed batch-inference scores")
+
+    # assignment is keyed in the same (nurse, dept, day, slot) order as the grid
+    keys = list(assignment.keys())
+    total_assignments = len(keys)
+    for key, score in zip(keys, score_grid.ravel()):
+        # Scale score to integer for CP-SAT (multiply by 1000 for precision)
+        quality_scores[key] = int(float(score) * 1000)
+
+    print(f"✅ Computed all {total_assignments} quality scores")
+
+    # Create objective: maximize XGBoost-predicted quality + basic preferences
+    preference_bonus = preference_terms(nurses, assignment, DEPARTMENTS, DAYS, TIME_SLOTS)
+    set_objective(model, assignment, quality_scores, preference_bonus)
+
+    # ========== SEARCH GUIDANCE (XGBoost-driven) ==========
+    add_search_guidance(ctx, model, x, score_grid, search or SEARCH_MODE, candidates)
+
+    # ========== SOLVE THE MODEL ==========
+
+    print("🔍 Solving optimization model...")
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+
+    status = solver.Solve(model, solution_callback)
+
+    # ========== RETURN RESULTS ==========
+
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        status_msg = "OPTIMAL" if status == cp_model.OPTIMAL else "FEASIBLE"
+        print(f"✅ {status_msg} solution found!")
+
+        solution = extract_solution(solver, assignment, quality_scores, SHIFT_HOURS)
+        return solution, status
+    else:
+        print("❌ No feasible solution found!")
+        return None, status
+
+
+def solve_iterative(
+    nurses,
+    shift,
+    rules,
+    demand,
+    xgb_model,
+    iterations=RESCORE_ITERATIONS,
+    time_limit=SOLVER_TIME_LIMIT,
+    rescore_time_limit=RESCORE_TIME_LIMIT,
+    candidates=None,
+    search=None,
+    score_grid=None,
+):
+    """
+    Solve, re-score every assignment against the roster just found, re-solve
+
+    The CP model and its hard constraints are built once; each round only
+    swaps the objective for the re-scored one and hints the previous
+    solution. Stops when no score changes, the solution repeats, or after
+    `iterations` re-solves. Returns the last feasible (solution, status).
+    `candidates`, `search` and `score_grid` are as in build_and_solve_hybrid;
+    `score_grid` (e.g. batch-inference scores) seeds the first round and
+    the search guidance.
+    """
+    model = cp_model.CpModel()
+    SHIFT_HOURS = shift["SHIFT_HOURS"]
+    DAYS = rules["general"]["days"]
+    DEPARTMENTS = rules["general"]["departments"]
+    TIME_SLOTS = list(SHIFT_HOURS.keys())
+
+    ctx = RuleContext(nurses, shift, rules, demand)
+    x, assignment = assignment_vars(ctx, model, allowed=candidates)
+    if candidates is not None:
+        print(f"✂️ {int(candidates.sum())}/{candidates.size} assignment variables after pruning")
+    add_hard_constraints(ctx, model, x)
+    preference_bonus = preference_terms(nurses, assignment, DEPARTMENTS, DAYS, TIME_SLOTS)
+
+    score_table = load_or_build(xgb_model, os.path.join(DATA_DIR, "score_table.npz"))
+    workload = WorkloadFeatures(ctx, nurses, shift, score_table)
+    if score_grid is None:
+        score_grid = workload.score_grid()
+    else:
+        print("📦 Using precomputed batch-inference scores for the first solve")
+    add_search_guidance(ctx, model, x, score_grid, search or SEARCH_MODE, candidates)
+    # assignment is keyed in the same (nurse, dept, day, slot) order as x
+    keys = list(assignment.keys())
+    variables = list(x.ravel())
+    allowed = candidates.ravel() if candidates is not None else np.ones(len(variables), dtype=bool)
+
+    best = (None, cp_model.UNKNOWN)
+    grid = None
+    for round_ in range(iterations + 1):
+        scores = score_grid if round_ == 0 else workload.score_grid()
+        new_grid = (scores * 1000).astype(int).ravel()
+        if grid is not None and np.array_equal(new_grid, grid):
+            print(f"✅ Scores stable after {round_} solves")
+            break
+        grid = new_grid
+        quality_scores = dict(zip(keys, grid.tolist()))
+        set_objective(model, assignment, quality_scores, preference_bonus)
+
+        if best[0] is not None:
+            # Replaces any search-guidance hint with the previous solution
+            model.ClearHints()
+            for var, value, free in zip(variables, workload.X.ravel().tolist(), allowed):
+                if free:
+                    model.AddHint(var, value)
+
+        print(f"🔍 Solving round {round_} ...")
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = time_limit if round_ == 0 else rescore_time_limit
+        status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            print("❌ No feasible solution found!")
+            break
+        best = (extract_solution(solver, assignment, quality_scores, SHIFT_HOURS), status)
+
+        X = np.array([solver.Value(v) for v in variables], dtype=bool).reshape(ctx.shape)
+        changed = workload.update(X)
+        print(f"♻️ Re-scored {len(changed)} nurses with changed assignments")
+        if not len(changed):
+            print(f"✅ Solution stable after {round_ + 1} solves")
+            break
+    return best
+
+
+def solve_by_ward_hybrid(
+    nurses, shift, rules, demand, xgb_model, iterations=FLOAT_POOL_ITERATIONS, score_grid=None
+):
+    """
+    One CP-SAT model per ward plus a float-pool master (see wardDecomposition.py)
+
+    Same objective as build_and_solve_hybrid. Falls back to the single model
+    if the wards are still uncovered after `iterations` rounds.
+    """
+    ctx = RuleContext(nurses, shift, rules, demand)
+    if score_grid is None:
+        score_grid = quality_grid(ctx, nurses, shift, xgb_model)
+    quality = (score_grid * 1000).astype(int)
+    objective = quality + preference_grid(ctx, nurses)[:, None, None, :]
+
+    X = solve_by_ward(ctx, objective, iterations)
+    if X is None:
+        print("↔️ Falling back to one model for all departments")
+        return build_and_solve_hybrid(nurses, shift, rules, demand, xgb_model, score_grid=score_grid)
+    return solution_from_array(ctx, X, quality, shift["SHIFT_HOURS"]), cp_model.FEASIBLE
+
+
+def solve_by_patterns_hybrid(
+    nurses, shift, rules, demand, xgb_model, score_grid=None, time_limit=SOLVER_TIME_LIMIT
+):
+    """
+    Choose one priced-out weekly pattern per nurse (see weeklyPatterns.py)
+
+    Same objective as build_and_solve_hybrid; the pattern solve as a whole
+    gets `time_limit`. Falls back to the full model if the generated
+    patterns admit no roster in time.
+    """
+    ctx = RuleContext(nurses, shift, rules, demand)
+    if score_grid is None:
+        score_grid = quality_grid(ctx, nurses, shift, xgb_model)
+    quality = (score_grid * 1000).astype(int)
+    objective = quality + preference_grid(ctx, nurses)[:, None, None, :]
+
+    X = solve_by_patterns(ctx, objective, time_limit)
+    if X is None:
+        print("↔️ Falling back to the full assignment model")
+        return build_and_solve_hybrid(nurses, shift, rules, demand, xgb_model, score_grid=score_grid)
+    return solution_from_array(ctx, X, quality, shift["SHIFT_HOURS"]), cp_model.FEASIBLE
+
+
+def solve_with_candidate_pruning(
+    nurses, shift, rules, demand, xgb_model, ranker, top_k, score_grid=None, solve=None
+):
+    """build_and_solve_hybrid (or `solve`, e.g. solve_iterative) over the ranker's
+    top-k nurses per department shift, widening k whenever the restricted model
+    yields no solution"""
+    solve = solve or build_and_solve_hybrid
+    ctx = RuleContext(nurses, shift, rules, demand)
+    scores = ranker_scores(ctx, nurses, shift, ranker)
+    for step in widening_schedule(top_k, len(ctx.depts)):
+        if step is None:
+            print("🎯 Candidate pruning: all nurses")
+            candidates = None
+        else:
+            k, home_depts = step
+            print(f"🎯 Candidate pruning: {home_depts} home department(s) + top-{k} nurses per shift")
+            candidates = candidate_mask(ctx, scores, k, home_depts)
+        solution, status = solve(
+            nurses, shift, rules, demand, xgb_model, candidates=candidates, score_grid=score_grid
+        )
+        if solution:
+            return solution, status
+        print("↔️ No solution on the restricted model, widening candidates")
+    return solution, status
+
+
+def save_roster_to_s3(roster):
+    """Save roster to S3 with timestamped name"""
+    current_time = datetime.now().strftime("%d%m%Y")
+    roster_filename = f"roster_{current_time}.json"
+    local_path = os.path.join("/tmp", roster_filename)  # temp path inside container
+
+    with open(local_path, "w") as f:
+        json.dump(roster, f, indent=2)
+
+    s3_key = f"{OUTPUT_PREFIX}{roster_filename}"
+    upload_to_s3(local_path, OUTPUT_BUCKET, s3_key)
+    print(f"✅ Roster saved to s3://{OUTPUT_BUCKET}/{s3_key}")
+
+
+def check_solver_modes():
+    """Raise if the environment selects more than one solver.
+
+    RANKER_TOP_K combines with RESCORE_ITERATIONS (re-scoring on the pruned
+    model); PATTERN_SEARCH and FLOAT_POOL_ITERATIONS replace the assignment
+    model and combine with nothing.
+    """
+    selected = [
+        name
+        for name, value in (
+            ("RANKER_TOP_K", RANKER_TOP_K),
+            ("PATTERN_SEARCH", PATTERN_SEARCH),
+            ("FLOAT_POOL_ITERATIONS", FLOAT_POOL_ITERATIONS),
+            ("RESCORE_ITERATIONS", RESCORE_ITERATIONS),
+        )
+        if value > 0
+    ]
+    if len(selected) > 1 and set(selected) != {"RANKER_TOP_K", "RESCORE_ITERATIONS"}:
+        raise ValueError(f"{', '.join(selected)} select different solvers; set only one of them")
+
+
+def generate_roster():
+    """Main Fargate-friendly roster generation function"""
+    print("🚀 Starting hybrid CP-SAT + XGBoost roster generation...")
+    check_solver_modes()
+
+    nurse_list, rules, demand, shift_def, model, df_train = load_data()
+    score_grid = load_predictions(nurse_list, shift_def, rules, demand, model)
+    if RANKER_TOP_K > 0:
+        solution, status = solve_with_candidate_pruning(
+            nurse_list, shift_def, rules, demand, model, load_ranker(), RANKER_TOP_K,
+            score_grid=score_grid,
+            solve=solve_iterative if RESCORE_ITERATIONS > 0 else None,
+        )
+    elif PATTERN_SEARCH > 0:
+        solution, status = solve_by_patterns_hybrid(
+            nurse_list, shift_def, rules, demand, model, score_grid=score_grid
+        )
+    elif FLOAT_POOL_ITERATIONS > 0:
+        solution, status = solve_by_ward_hybrid(
+            nurse_list, shift_def, rules, demand, model, score_grid=score_grid
+        )
+    elif RESCORE_ITERATIONS > 0:
+        solution, status = solve_iterative(
+            nurse_list, shift_def, rules, demand, model, score_grid=score_grid
+        )
+    else:
+        solution, status = build_and_solve_hybrid(
+            nurse_list, shift_def, rules, demand, model, score_grid=score_grid
+        )
+
+    if solution:
+        # Format output
+        generated = {"departments": []}
+        dept_assignments = defaultdict(list)
+        for nurse_id, assignments in solution.items():
+            for a in assignments:
+                dept_assignments[a["department"]].append(
+                    {
+                        "id": nurse_id,
+                        "day": a["day"],
+                        "shift": a["shift"],
+                        "xgb_score": a["xgb_quality_score"],
+                    }
+                )
+
+        for dept_name, assigns in dept_assignments.items():
+            nurse_map = defaultdict(list)
+            for a in assigns:
+                nurse_map[a["id"]].append(
+                    {
+                        "day": a["day"],
+                        "shift": a["shift"],
+                        "quality_score": a["xgb_score"],
+                    }
+                )
+            nurses_out = []
+            for nid, shifts in nurse_map.items():
+                nurses_out.append(
+                    {
+                        "id": nid,
+                        "shifts": [
+                            {"day": s["day"], "shift": s["shift"]} for s in shifts
+                        ],
+                    }
+                )
+            generated["departments"].append({"name": dept_name, "nurses": nurses_out})
+
+        save_roster_to_s3(generated)
+        print("🎉 Nurse roster generation completed successfully!")
+        return True
+    else:
+        print("❌ Failed to generate roster")
+        return False
+
+
+def main():
+    generate_roster()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# incrementalEvaluator.py — Delta scoring of single-assignment roster moves
+import numpy as np
+
+from evaluateRoster import reward_from_counts
+from rosterRules import RuleContext, active_rules, roster_state
+
+# A move is a (removed, added) pair of assignment keys, each either None or a
+# (nurse_id, dept, day, shift) tuple — the same keys the generators use:
+#   add:    (None, ("N001", "ICU", "Mon", "Full-Morning"))
+#   remove: (("N001", "ICU", "Mon", "Full-Morning"), None)
+#   move:   (("N001", "ICU", "Mon", "Full-Morning"), ("N002", "ICU", "Mon", "Full-Morning"))
+
+
+class IncrementalEvaluator:
+    """Holds the roster aggregates behind evaluate_roster so a move can be scored
+    in O(affected cells) instead of re-evaluating the whole roster.
+
+    Each rule from rosterRules is re-checked only on the slice the move touches
+    (its local_index), so reward() and breakdown() match evaluate_roster on
+    to_roster() up to float rounding of the fairness variance.
+    """
+
+    def __init__(self, roster, nurses, rules, demand, shift_def, ctx=None):
+        self.ctx = ctx or RuleContext(nurses, shift_def, rules, demand)
+        self.rules = active_rules(self.ctx)
+        self.state, unknown = roster_state(self.ctx, roster)
+        if unknown:
+            raise KeyError(f"Roster references unknown assignments: {unknown[:5]}")
+        self.rule_violations = {
+            rule.name: int(rule.violations(self.ctx, self.state).sum())
+            for rule in self.rules
+        }
+
+        # Running moments of weekly hours over nurses with shifts, for the variance
+        weekly = self.state.weekly_hours()
+        self.hours_sum = int(weekly.sum())
+        self.hours_sq_sum = int((weekly * weekly).sum())
+        self.active_nurses = int((weekly > 0).sum())
+
+    # ---- Core update: sign=+1 adds an assignment, sign=-1 removes it ----
+    def _update(self, key, sign):
+        n, e, d, s = self.ctx.index_of(key)
+        if sign < 0 and self.state.X[n, e, d, s] <= 0:
+            raise KeyError(f"Assignment not in roster: {key}")
+
+        local = [(rule, rule.local_index(self.ctx, n, e, d, s)) for rule in self.rules]
+        before = [int(np.sum(rule.violations(self.ctx, self.state, idx))) for rule, idx in local]
+        week_before = int(self.state.daily_hours[n].sum())
+        self.state.update(self.ctx, n, e, d, s, sign)
+        week_after = int(self.state.daily_hours[n].sum())
+
+        self.hours_sum += week_after - week_before
+        self.hours_sq_sum += week_after * week_after - week_before * week_before
+        self.active_nurses += (week_after > 0) - (week_before > 0)
+        for (rule, idx), b in zip(local, before):
+            after = int(np.sum(rule.violations(self.ctx, self.state, idx)))
+            self.rule_violations[rule.name] += after - b
+
+    # ---- Public API ----
+    def apply(self, move):
+        """Apply a (removed, added) move to the held roster"""
+        removed, added = move
+        if removed is not None:
+            self._update(tuple(removed), -1)
+        if added is not None:
+            try:
+                self._update(tuple(added), 1)
+            except KeyError:
+                if removed is not None:
+                    self._update(tuple(removed), 1)
+                raise
+
+    def delta(self, move):
+        """Reward change the move would cause, leaving the held roster untouched"""
+        before = self.reward()
+        self.apply(move)
+        after = self.reward()
+        removed, added = move
+        self.apply((added, removed))
+        return after - before
+
+    def compliance_violations(self):
+        return sum(self.rule_violations.values())
+
+    def fairness_penalty(self):
+        n = self.active_nurses
+        if not n:
+            return 0.0
+        return (n * self.hours_sq_sum - self.hours_sum * self.hours_sum) / (n * n)
+
+    def result(self):
+        reward, breakdown = reward_from_counts(
+            self.rule_violations["demand"],
+            self.compliance_violations(),
+            self.fairness_penalty(),
+            self.ctx.demand_min.size,
+        )
+        return {"reward": reward, "breakdown": breakdown}
+
+    def breakdown(self):
+        return self.result()["breakdown"]
+
+    def reward(self):
+        return self.result()["reward"]
+
+    def to_roster(self):
+        """Current assignments in the generators' roster JSON layout"""
+        ctx = self.ctx
+        departments = []
+        for e, dept in enumerate(ctx.depts):
+            nurses_out = []
+            for n, nid in enumerate(ctx.nurse_ids):
+                shifts = [
+                    {"day": ctx.days[d], "shift": ctx.slots[s]}
+                    for d, s in np.argwhere(self.state.X[n, e] > 0)
+                    for _ in range(self.state.X[n, e, d, s])
+                ]
+                if shifts:
+                    nurses_out.append({"id": nid, "shifts": shifts})
+            departments.append({"name": dept, "nurses": nurses_out})
+        return {"departments": departments}
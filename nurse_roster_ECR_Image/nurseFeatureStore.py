@@ -0,0 +1,231 @@
+# nurseFeatureStore.py — Static per-nurse feature rows, memory-mapped and keyed by the nurse.json hash
+import os
+import json
+import glob
+import hashlib
+import argparse
+
+import numpy as np
+
+# The first 11 model features only depend on the nurse record, not on the
+# assignment or the roster, yet build_features used to rebuild them from the
+# nurse.json dicts for every candidate cell. The store keeps them as one
+# float32 row per nurse in <dir>/features-<hash>.npy, next to a
+# features-<hash>.json index (nurse id order, per-record hashes, column
+# names). <hash> is the content hash of the nurse list, so a store is reused
+# as-is (memory-mapped, nothing recomputed) while nurse.json is unchanged.
+# When it changes (e.g. a Lex update edits one nurse), the new store copies
+# every row whose record hash is unchanged from the most recent store and
+# only recomputes the edited or new nurses.
+
+# ---- Config ----
+FEATURE_STORE_DIR = os.environ.get("FEATURE_STORE_DIR", os.path.join("data", "nurse_features"))
+STATIC_FEATURES = [
+    "cand_experience",
+    "cand_hours_contract",
+    "cand_seniority_num",
+    "pref_morning",
+    "pref_evening",
+    "pref_night",
+    "skill_ER",
+    "skill_General",
+    "skill_ICU",
+    "skill_OT",
+    "skill_Pediatrics",
+]
+SENIORITY_MAP = {"Junior": 0, "Mid": 1, "Senior": 2}
+SKILLS = ["ER", "General", "ICU", "OT", "Pediatrics"]
+KEEP_STORES = 3  # older stores in the directory are deleted
+
+# The other model features depend on the roster around the candidate cell.
+# They live here rather than in generateRoster so that the training tools can
+# build feature rows without importing the solver (and its S3 client).
+WORKLOAD_FEATURES = ["hours_in_week", "would_violate_45", "would_violate_8_per_day", "has_rest_day"]
+# Workload thresholds (hardcoded for now, should be from rules)
+WEEKLY_VIOLATION_HOURS = 45
+DAILY_VIOLATION_HOURS = 8
+WEEK_DAYS = 7
+
+
+def static_features(nurse):
+    """Nurse characteristics, preferences and skills (the roster-independent features)"""
+    features = {}
+
+    # Nurse characteristics
+    features["cand_experience"] = nurse.get("experience_years", 0)
+    features["cand_hours_contract"] = nurse.get("contracted_hours", 40)
+    features["cand_seniority_num"] = SENIORITY_MAP.get(nurse.get("seniority_level"), 0)
+
+    # Preferences
+    prefs = nurse.get("preferences", [])
+    features["pref_morning"] = int("Morning" in prefs)
+    features["pref_evening"] = int("Evening" in prefs)
+    features["pref_night"] = int("Night" in prefs)
+
+    # Skills
+    skills = nurse.get("skills", [])
+    for skill in SKILLS:
+        features[f"skill_{skill}"] = int(skill in skills)
+    return features
+
+
+def shift_hours(shift_name, shift_def):
+    return shift_def["SHIFT_HOURS"].get(shift_name, 8)
+
+
+def workload_features(nurse_id, day, shift_type, assigned_shifts, shift_def):
+    """Current workload analysis of one candidate assignment"""
+    features = {}
+    sh_hours = shift_hours(shift_type, shift_def)
+    weekly_hours = sum(
+        shift_hours(s["shift"], shift_def)
+        for s in assigned_shifts.get(nurse_id, [])
+    )
+    daily_hours = sum(
+        shift_hours(s["shift"], shift_def)
+        for s in assigned_shifts.get(nurse_id, [])
+        if s["day"] == day
+    )
+    days_worked = {s["day"] for s in assigned_shifts.get(nurse_id, [])}
+
+    features["hours_in_week"] = weekly_hours
+    features["would_violate_45"] = int(weekly_hours + sh_hours > WEEKLY_VIOLATION_HOURS)
+    features["would_violate_8_per_day"] = int(daily_hours + sh_hours > DAILY_VIOLATION_HOURS)
+    features["has_rest_day"] = int(len(days_worked) < WEEK_DAYS)
+
+    return features
+
+
+def record_hash(nurse):
+    return hashlib.sha1(json.dumps(nurse, sort_keys=True).encode()).hexdigest()
+
+
+def nurses_hash(record_hashes):
+    """Content hash of a nurse list (order matters: it is the row order)"""
+    return hashlib.sha1("\n".join(record_hashes).encode()).hexdigest()
+
+
+class NurseFeatureStore:
+    """(nurses, STATIC_FEATURES) matrix with a nurse id index"""
+
+    def __init__(self, matrix, nurse_ids, record_hashes, content_hash):
+        self.matrix = matrix
+        self.nurse_ids = list(nurse_ids)
+        self.position = {nid: i for i, nid in enumerate(self.nurse_ids)}
+        self.record_hashes = list(record_hashes)
+        self.content_hash = content_hash
+        self.recomputed = []  # nurse ids computed (not reused) when the store was opened
+
+    def row(self, nurse_id):
+        return self.matrix[self.position[nurse_id]]
+
+    def rows(self, nurse_ids=None):
+        """Feature rows in the order of `nurse_ids` (default: store order) as an in-memory array"""
+        if nurse_ids is None:
+            return np.array(self.matrix)
+        return self.matrix[[self.position[nid] for nid in nurse_ids]]
+
+    def features(self, nurse_id):
+        """One nurse's row as a static_features-style dict"""
+        return {c: self.row(nurse_id)[j].item() for j, c in enumerate(STATIC_FEATURES)}
+
+    # ---- Persistence ----
+    @staticmethod
+    def _paths(store_dir, content_hash):
+        base = os.path.join(store_dir, f"features-{content_hash[:16]}")
+        return base + ".npy", base + ".json"
+
+    def save(self, store_dir):
+        npy_path, index_path = self._paths(store_dir, self.content_hash)
+        os.makedirs(store_dir, exist_ok=True)
+        # Write-then-rename, so a concurrent reader never maps a half-written file
+        tmp = f".{os.getpid()}.tmp"
+        np.save(npy_path + tmp + ".npy", np.asarray(self.matrix, dtype=np.float32))
+        os.replace(npy_path + tmp + ".npy", npy_path)
+        index = {
+            "content_hash": self.content_hash,
+            "columns": STATIC_FEATURES,
+            "nurse_ids": self.nurse_ids,
+            "record_hashes": self.record_hashes,
+        }
+        with open(index_path + tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(index_path + tmp, index_path)
+
+    @classmethod
+    def load(cls, store_dir, content_hash):
+        """Memory-mapped store for `content_hash`; None if missing or built with other columns"""
+        npy_path, index_path = cls._paths(store_dir, content_hash)
+        if not (os.path.exists(npy_path) and os.path.exists(index_path)):
+            return None
+        with open(index_path) as f:
+            index = json.load(f)
+        if index.get("content_hash") != content_hash or index.get("columns") != STATIC_FEATURES:
+            return None
+        matrix = np.load(npy_path, mmap_mode="r")
+        return cls(matrix, index["nurse_ids"], index["record_hashes"], content_hash)
+
+
+def _latest_store(store_dir):
+    indexes = sorted(glob.glob(os.path.join(store_dir, "features-*.json")), key=os.path.getmtime)
+    for index_path in reversed(indexes):
+        with open(index_path) as f:
+            content_hash = json.load(f).get("content_hash", "")
+        store = NurseFeatureStore.load(store_dir, content_hash)
+        if store is not None:
+            return store
+    return None
+
+
+def _prune(store_dir):
+    indexes = sorted(glob.glob(os.path.join(store_dir, "features-*.json")), key=os.path.getmtime)
+    for index_path in indexes[:-KEEP_STORES]:
+        for path in (index_path, index_path[: -len(".json")] + ".npy"):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def open_store(nurses, store_dir):
+    """Feature store of `nurses`; reused from disk, or rebuilt recomputing only changed nurses"""
+    hashes = [record_hash(n) for n in nurses]
+    content_hash = nurses_hash(hashes)
+    store = NurseFeatureStore.load(store_dir, content_hash)
+    if store is not None:
+        return store
+
+    previous = _latest_store(store_dir)
+    reuse = {}
+    if previous is not None:
+        reuse = {h: previous.matrix[i] for i, h in enumerate(previous.record_hashes)}
+
+    matrix = np.empty((len(nurses), len(STATIC_FEATURES)), dtype=np.float32)
+    recomputed = []
+    for i, (n, h) in enumerate(zip(nurses, hashes)):
+        if h in reuse:
+            matrix[i] = reuse[h]
+        else:
+            matrix[i] = list(static_features(n).values())
+            recomputed.append(n["nurse_id"])
+
+    store = NurseFeatureStore(matrix, [n["nurse_id"] for n in nurses], hashes, content_hash)
+    store.save(store_dir)
+    _prune(store_dir)
+    store = NurseFeatureStore.load(store_dir, content_hash)
+    store.recomputed = recomputed
+    print(f"🗂️ Nurse feature store {content_hash[:12]}: recomputed {len(recomputed)}/{len(nurses)} nurses")
+    return store
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build (or refresh) the static nurse feature store for a nurse.json"
+    )
+    parser.add_argument("nurses", nargs="?", default="data/nurse.json")
+    parser.add_argument("-o", "--out", default=FEATURE_STORE_DIR)
+    args = parser.parse_args()
+
+    with open(args.nurses) as f:
+        nurse_list = json.load(f)
+    store = open_store(nurse_list, args.out)
+    print(f"✅ {len(store.nurse_ids)} nurses x {len(STATIC_FEATURES)} features -> {args.out}")
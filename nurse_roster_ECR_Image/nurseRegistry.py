@@ -0,0 +1,344 @@
+# nurseRegistry.py — Persistent SQLite nurse registry indexed by skill, department, seniority and availability
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+from rosterDomain import LEAVE_TYPES, SENIORITY_LEVELS, parse_unavailability
+from nurseFeatureStore import record_hash
+
+# One database file holds the nurse records (as JSON, in nurse.json order)
+# plus index tables that answer the lookups tools otherwise do with linear
+# scans over the nurse list:
+#   nurse_skills  (skill, nurse_id)      nurses with a skill
+#   nurse_depts   (dept, nurse_id)       nurses with the department's core skill
+#   nurses        (seniority_num, ...)   nurses by seniority
+#   blocked       (day, slot, nurse_id)  unavailability and leave, with the reason
+# All index tables are WITHOUT ROWID with the lookup key first, so a query is
+# a primary-key range scan. Upserts skip records whose hash is unchanged and
+# rewrite only the index rows of the changed nurses.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nurses (
+    nurse_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    record_hash TEXT NOT NULL,
+    seniority_num INTEGER NOT NULL,
+    experience_years INTEGER NOT NULL,
+    contracted_hours INTEGER NOT NULL,
+    source TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nurses_seniority ON nurses (seniority_num, nurse_id);
+CREATE INDEX IF NOT EXISTS nurses_position ON nurses (position);
+CREATE TABLE IF NOT EXISTS nurse_skills (
+    skill TEXT NOT NULL,
+    nurse_id TEXT NOT NULL,
+    PRIMARY KEY (skill, nurse_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS nurse_depts (
+    dept TEXT NOT NULL,
+    nurse_id TEXT NOT NULL,
+    PRIMARY KEY (dept, nurse_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blocked (
+    day TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    nurse_id TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    PRIMARY KEY (day, slot, nurse_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS blocked_nurse ON blocked (nurse_id);
+"""
+
+INDEX_TABLES = ("nurse_skills", "nurse_depts", "blocked")
+
+
+class NurseRegistry:
+    """Nurse records plus skill/department/seniority/availability indexes in one SQLite file"""
+
+    def __init__(self, path, rules=None, shift_def=None, timeout=30.0):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+        if rules is not None and shift_def is not None:
+            self.configure(rules, shift_def)
+        self._load_config()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _write(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return _Transaction(self.conn)
+
+    # ---- Configuration ----
+    def configure(self, rules, shift_def):
+        """Store the days/slots/core skills the indexes are built against; re-indexes if they changed"""
+        config = {
+            "days": list(rules["general"]["days"]),
+            "slots": list(shift_def["SHIFT_HOURS"].keys()),
+            "core_skill": dict(rules["general"].get("core_skill", {})),
+        }
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        if row and json.loads(row[0]) == config:
+            return
+        with self._write():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('config', ?)", (json.dumps(config),)
+            )
+            self.config = config
+            # Index rows depend on the config: rebuild them for every stored record
+            for table in INDEX_TABLES:
+                self.conn.execute(f"DELETE FROM {table}")
+            records = [json.loads(r) for (r,) in self.conn.execute("SELECT record FROM nurses")]
+            for nurse in records:
+                self._insert_index_rows(nurse)
+
+    def _load_config(self):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'config'").fetchone()
+        self.config = json.loads(row[0]) if row else None
+
+    def _require_config(self):
+        if self.config is None:
+            raise ValueError("registry has no days/slots yet; pass rules and shift_def once")
+
+    # ---- Writes ----
+    def _insert_index_rows(self, nurse):
+        nid = nurse["nurse_id"]
+        skills = set(nurse.get("skills", []))
+        self.conn.executemany(
+            "INSERT INTO nurse_skills (skill, nurse_id) VALUES (?, ?)", [(k, nid) for k in skills]
+        )
+        self.conn.executemany(
+            "INSERT INTO nurse_depts (dept, nurse_id) VALUES (?, ?)",
+            [(dept, nid) for dept, core in self.config["core_skill"].items() if core in skills],
+        )
+        days, slots = self.config["days"], self.config["slots"]
+        blocked = {}
+        # Leave first, so a cell that is also in unavailability reports "unavailability"
+        for kind in LEAVE_TYPES:
+            for entry in (nurse.get("leave") or {}).get(kind, []):
+                for cell in parse_unavailability(entry, days, slots):
+                    blocked[cell] = f"{kind} leave"
+        for entry in nurse.get("unavailability", []):
+            for cell in parse_unavailability(entry, days, slots):
+                blocked[cell] = "unavailability"
+        self.conn.executemany(
+            "INSERT INTO blocked (day, slot, nurse_id, reason) VALUES (?, ?, ?, ?)",
+            [(d, s, nid, reason) for (d, s), reason in blocked.items()],
+        )
+
+    def _delete(self, nurse_ids):
+        rows = [(nid,) for nid in nurse_ids]
+        for table in INDEX_TABLES + ("nurses",):
+            self.conn.executemany(f"DELETE FROM {table} WHERE nurse_id = ?", rows)
+
+    def upsert(self, nurses, source=None):
+        """Insert or update nurse records (e.g. a Lex update); returns the ids actually changed"""
+        self._require_config()
+        with self._write():
+            return self._upsert(nurses, source)
+
+    def _upsert(self, nurses, source):
+        # Runs inside a write transaction, so the stored hashes and positions
+        # cannot change under a concurrent writer
+        stored = dict(self.conn.execute("SELECT nurse_id, record_hash FROM nurses"))
+        next_position = self.conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM nurses").fetchone()[0]
+        changed = []
+        now = time.time()
+        for nurse in nurses:
+            nid = nurse["nurse_id"]
+            h = record_hash(nurse)
+            if stored.get(nid) == h:
+                continue
+            if nid in stored:
+                position = self.conn.execute(
+                    "SELECT position FROM nurses WHERE nurse_id = ?", (nid,)
+                ).fetchone()[0]
+                self._delete([nid])
+            else:
+                position, next_position = next_position, next_position + 1
+            self.conn.execute(
+                "INSERT INTO nurses (nurse_id, position, record, record_hash, seniority_num, "
+                "experience_years, contracted_hours, source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    nid,
+                    position,
+                    json.dumps(nurse),
+                    h,
+                    SENIORITY_LEVELS.get(nurse.get("seniority_level"), 0),
+                    int(nurse.get("experience_years", 0)),
+                    int(nurse.get("contracted_hours", 0)),
+                    source,
+                    now,
+                ),
+            )
+            self._insert_index_rows(nurse)
+            stored[nid] = h
+            changed.append(nid)
+        return changed
+
+    def sync(self, nurses, source=None):
+        """Make the registry equal to a full nurse.json; returns {"changed": [...], "removed": [...]}"""
+        self._require_config()
+        with self._write():
+            return self._sync(nurses, source)
+
+    def _sync(self, nurses, source):
+        changed = self._upsert(nurses, source)
+        keep = {n["nurse_id"] for n in nurses}
+        removed = [nid for (nid,) in self.conn.execute("SELECT nurse_id FROM nurses") if nid not in keep]
+        self._delete(removed)
+        # nurse.json order is the row order every tool indexes by
+        self.conn.executemany(
+            "UPDATE nurses SET position = ? WHERE nurse_id = ?",
+            [(i, n["nurse_id"]) for i, n in enumerate(nurses)],
+        )
+        return {"changed": changed, "removed": removed}
+
+    def apply_log(self, log):
+        """Bring the registry up to the head of a dataVersions nurse log, upserting only changed nurses"""
+        self._require_config()
+        with self._write():
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'log_version'").fetchone()
+            applied = int(row[0]) if row else 0
+            head = log.head
+            if head == applied:
+                return {"changed": [], "removed": []}
+            records = log.records(head)
+            if applied:
+                keys = log.changed(applied, head)
+                changed = [records[k] for k in keys if k in records]
+                removed = [k for k in keys if k not in records]
+                result = {"changed": self._upsert(changed, source=f"log:{head}"), "removed": removed}
+                self._delete(removed)
+            else:
+                result = self._sync(list(records.values()), source=f"log:{head}")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('log_version', ?)", (str(head),)
+            )
+        return result
+
+    # ---- Reads ----
+    def get(self, nurse_id):
+        row = self.conn.execute("SELECT record FROM nurses WHERE nurse_id = ?", (nurse_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def nurse_list(self):
+        """All records in nurse.json order"""
+        return [json.loads(r) for (r,) in self.conn.execute("SELECT record FROM nurses ORDER BY position")]
+
+    def export(self, path):
+        """Write the registry as a nurse.json file"""
+        with open(path, "w") as f:
+            json.dump(self.nurse_list(), f, indent=2)
+
+    def find(self, skill=None, dept=None, seniority=None, day=None, slot=None, available=True):
+        """Ids of nurses matching every given filter, in nurse.json order.
+
+        `dept` keeps nurses with the department's core skill; `seniority` is a
+        level name or a list of them; `day` and `slot` (both given) keep
+        nurses free on that cell, or blocked on it if available=False.
+        """
+        sql, args = self._filter_sql("n.nurse_id", skill, dept, seniority, day, slot, available)
+        return [nid for (nid,) in self.conn.execute(sql + " ORDER BY n.position", args)]
+
+    def count(self, skill=None, dept=None, seniority=None, day=None, slot=None, available=True):
+        sql, args = self._filter_sql("COUNT(*)", skill, dept, seniority, day, slot, available)
+        return self.conn.execute(sql, args).fetchone()[0]
+
+    def _filter_sql(self, select, skill, dept, seniority, day, slot, available):
+        sql = [f"SELECT {select} FROM nurses n"]
+        where, args = [], []
+        if skill is not None:
+            sql.append("JOIN nurse_skills k ON k.nurse_id = n.nurse_id AND k.skill = ?")
+            args.append(skill)
+        if dept is not None:
+            sql.append("JOIN nurse_depts e ON e.nurse_id = n.nurse_id AND e.dept = ?")
+            args.append(dept)
+        if seniority is not None:
+            levels = [seniority] if isinstance(seniority, str) else list(seniority)
+            where.append(f"n.seniority_num IN ({', '.join('?' * len(levels))})")
+            args.extend(SENIORITY_LEVELS.get(s, 0) for s in levels)
+        if day is not None and slot is not None:
+            exists = "EXISTS (SELECT 1 FROM blocked b WHERE b.day = ? AND b.slot = ? AND b.nurse_id = n.nurse_id)"
+            where.append(exists if not available else f"NOT {exists}")
+            args.extend([day, slot])
+        if where:
+            sql.append("WHERE " + " AND ".join(where))
+        return " ".join(sql), args
+
+    def blocked_reason(self, nurse_id, day, slot):
+        row = self.conn.execute(
+            "SELECT reason FROM blocked WHERE day = ? AND slot = ? AND nurse_id = ?", (day, slot, nurse_id)
+        ).fetchone()
+        return row[0] if row else None
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nurse registry: sync from nurse.json / change log, query")
+    parser.add_argument("--db", default="data/nurse_registry.sqlite")
+    parser.add_argument("--rules", default="data/rules.json")
+    parser.add_argument("--shift", default="data/shift.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("sync", help="make the registry equal to a nurse.json")
+    p.add_argument("nurses", nargs="?", default="data/nurse.json")
+
+    p = sub.add_parser("apply-log", help="apply new versions of a dataVersions nurse log")
+    p.add_argument("--root", default="data/versions")
+
+    p = sub.add_parser("find", help="nurse ids matching the filters")
+    p.add_argument("--skill")
+    p.add_argument("--dept")
+    p.add_argument("--seniority", nargs="+")
+    p.add_argument("--day")
+    p.add_argument("--slot")
+
+    args = parser.parse_args()
+    with open(args.rules) as f:
+        rules = json.load(f)
+    with open(args.shift) as f:
+        shift_def = json.load(f)
+
+    with NurseRegistry(args.db, rules, shift_def) as registry:
+        if args.command == "sync":
+            with open(args.nurses) as f:
+                result = registry.sync(json.load(f), source=os.path.basename(args.nurses))
+            print(f"✅ {len(result['changed'])} nurses updated, {len(result['removed'])} removed -> {args.db}")
+        elif args.command == "apply-log":
+            from dataVersions import DataLog
+
+            result = registry.apply_log(DataLog(args.root, "nurse"))
+            print(f"✅ {len(result['changed'])} nurses updated, {len(result['removed'])} removed -> {args.db}")
+        elif args.command == "find":
+            ids = registry.find(args.skill, args.dept, args.seniority, args.day, args.slot)
+            print(f"{len(ids)} nurses: {', '.join(ids)}")
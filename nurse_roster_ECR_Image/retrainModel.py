@@ -0,0 +1,305 @@
+# retrainModel.py — Local incremental retraining of the roster XGBoost model
+import os
+import json
+import time
+import zlib
+import shutil
+import tarfile
+import argparse
+import tempfile
+
+import numpy as np
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import xgboost as xgb
+
+from buildTrainingData import FEATURE_COLUMNS
+
+# Continues boosting the model in model.tar.gz on training rows appended by
+# buildTrainingData.py since the last published retrain. Rows are streamed
+# into an external-memory DMatrix one Parquet batch at a time, so the
+# dataset never has to fit in memory. Rosters are split into train/holdout
+# by a hash of roster_key, so the holdout is stable across runs; the new
+# model is published only if its holdout NDCG beats the current model's.
+
+# ---- Config ----
+MODEL_MEMBER = "xgboost-model"  # tar layout expected by generateRoster.load_data
+TRAINED_STATE = "_trained.json"
+GROUP_COLUMNS = ["roster_key", "dept", "day", "shift_type", "target_nurse"]
+HOLDOUT_PERCENT = 10
+BATCH_ROWS = 200000
+EVAL_METRIC = "ndcg"
+
+TRAIN_PARAMS = {"eta": 0.1, "max_depth": 6}  # as in the SageMaker training job
+
+
+# ---- Model artifact ----
+def load_model_tar(tar_path):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        with tarfile.open(tar_path) as tar:
+            tar.extractall(path=tmpdir)
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(tmpdir, MODEL_MEMBER))
+    return booster
+
+
+def save_model_tar(booster, tar_path):
+    """Write `booster` as <tar_path> with the single MODEL_MEMBER entry, atomically"""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        model_file = os.path.join(tmpdir, MODEL_MEMBER + ".ubj")
+        booster.save_model(model_file)
+        tmp_tar = tar_path + ".tmp"
+        with tarfile.open(tmp_tar, "w:gz") as tar:
+            tar.add(model_file, arcname=MODEL_MEMBER)
+    os.replace(tmp_tar, tar_path)
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return format(zlib.crc32(f.read()), "08x")
+
+
+# ---- Streaming input ----
+def is_holdout(roster_key):
+    return zlib.crc32(roster_key.encode()) % 100 < HOLDOUT_PERCENT
+
+
+def roster_keys(files):
+    """Distinct roster_key values in the Parquet `files`"""
+    keys = set()
+    if not files:
+        return keys
+    dataset = ds.dataset(files, format="parquet")
+    for batch in dataset.to_batches(columns=["roster_key"], batch_size=BATCH_ROWS):
+        keys.update(pc.unique(batch.column("roster_key")).to_pylist())
+    return keys
+
+
+class _RankingBatches(xgb.DataIter):
+    """Feeds (features, label, qid) batches of complete query groups to XGBoost.
+
+    A query group is one roster assignment and all of its candidate nurses;
+    rows of a group are contiguous in the parts written by buildTrainingData,
+    so a group cut by a Parquet batch boundary is carried into the next batch.
+    """
+
+    def __init__(self, files, holdout, cache_prefix):
+        self.files = files
+        self.holdout = holdout
+        self.columns = GROUP_COLUMNS + FEATURE_COLUMNS + ["label"]
+        self.rows = 0
+        self.groups = 0
+        self._batches = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        self._batches = None
+
+    def _stream(self):
+        dataset = ds.dataset(self.files, format="parquet")
+        holdout_cache = {}
+        carry = None
+        qid = 0
+        self.rows = 0
+        self.groups = 0
+        for batch in dataset.to_batches(columns=self.columns, batch_size=BATCH_ROWS):
+            keys = batch.column("roster_key").to_pylist()
+            for key in set(keys):
+                if key not in holdout_cache:
+                    holdout_cache[key] = is_holdout(key)
+            keep = np.array([holdout_cache[k] == self.holdout for k in keys], dtype=bool)
+            if not keep.any():
+                continue
+            group = np.column_stack(
+                [np.asarray(batch.column(c).to_pylist(), dtype=object)[keep] for c in GROUP_COLUMNS]
+            )
+            X = np.column_stack(
+                [batch.column(c).to_numpy()[keep] for c in FEATURE_COLUMNS]
+            ).astype(np.float32)
+            y = batch.column("label").to_numpy()[keep].astype(np.float32)
+            if carry is not None:
+                group = np.vstack([carry[0], group])
+                X = np.vstack([carry[1], X])
+                y = np.concatenate([carry[2], y])
+            starts = np.flatnonzero(np.r_[True, (group[1:] != group[:-1]).any(axis=1)])
+            # The last group may continue in the next batch
+            cut = starts[-1]
+            carry = (group[cut:], X[cut:], y[cut:])
+            if cut == 0:
+                continue
+            ids = np.zeros(cut, dtype=np.int64)
+            ids[starts[1:][starts[1:] < cut]] = 1
+            yield X[:cut], y[:cut], qid + np.cumsum(ids)
+            qid += len(starts) - 1
+        if carry is not None and len(carry[2]):
+            yield carry[1], carry[2], np.full(len(carry[2]), qid, dtype=np.int64)
+
+    def next(self, input_data):
+        if self._batches is None:
+            self._batches = self._stream()
+        batch = next(self._batches, None)
+        if batch is None:
+            return False
+        X, y, qid = batch
+        self.rows += len(y)
+        self.groups = int(qid[-1]) + 1
+        input_data(data=X, label=y, qid=qid)
+        return True
+
+
+def _dmatrix(files, holdout, cache_dir):
+    it = _RankingBatches(files, holdout, os.path.join(cache_dir, "holdout" if holdout else "train"))
+    dmatrix = xgb.DMatrix(it)
+    return dmatrix, it
+
+
+def evaluate(booster, dmatrix):
+    """Holdout EVAL_METRIC of `booster` on `dmatrix`"""
+    result = booster.eval(dmatrix, "holdout")  # "[0]\tholdout-ndcg:0.93"
+    return float(result.rsplit(":", 1)[1])
+
+
+# ---- Training state ----
+def load_trained(data_dir):
+    path = os.path.join(data_dir, TRAINED_STATE)
+    if not os.path.exists(path):
+        return {"parts": [], "history": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_trained(data_dir, state):
+    tmp_path = os.path.join(data_dir, TRAINED_STATE + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, os.path.join(data_dir, TRAINED_STATE))
+
+
+def dataset_parts(data_dir):
+    return sorted(
+        os.path.join(data_dir, f)
+        for f in os.listdir(data_dir)
+        if f.endswith(".parquet") and not f.startswith(("_", "."))
+    )
+
+
+def retrain(
+    model_path="data/model.tar.gz",
+    data_dir="training/pairwise_weekly_compliance",
+    out_path=None,
+    rounds=20,
+    min_improvement=0.0,
+    params=None,
+):
+    """Continue boosting the model at `model_path` on rows not yet trained on.
+
+    The candidate is written to `out_path` (default: over `model_path`, with the
+    previous tarball kept as <model_path>.prev) only if its holdout NDCG improves
+    on the current model by more than `min_improvement`. Returns a report dict.
+    """
+    state = load_trained(data_dir)
+    parts = dataset_parts(data_dir)
+    new_parts = [p for p in parts if os.path.basename(p) not in state["parts"]]
+    print(f"🧾 {len(parts)} training parts, {len(new_parts)} not yet trained on")
+    if not new_parts:
+        print("✅ Model is up to date")
+        return {"published": False, "reason": "no new training rows"}
+
+    booster = load_model_tar(model_path)
+    config = json.loads(booster.save_config())
+    train_params = {
+        "objective": config["learner"]["learner_train_param"]["objective"],
+        "eval_metric": EVAL_METRIC,
+        "tree_method": "hist",
+        **TRAIN_PARAMS,
+        **(params or {}),
+    }
+
+    # An empty split would fail inside xgb.DMatrix, so check it on the keys first
+    new_keys = roster_keys(new_parts)
+    all_keys = new_keys | roster_keys([p for p in parts if p not in new_parts])
+    train_rosters = sum(not is_holdout(k) for k in new_keys)
+    holdout_rosters = sum(is_holdout(k) for k in all_keys)
+    print(f"🗂️ {train_rosters} train rosters, {holdout_rosters} holdout rosters")
+    if train_rosters == 0 or holdout_rosters == 0:
+        print("⚠️ Not enough rosters for both a training and a holdout split")
+        report = {
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "base_model": file_digest(model_path),
+            "parts": [os.path.basename(p) for p in new_parts],
+            "train_rosters": train_rosters,
+            "holdout_rosters": holdout_rosters,
+            "published": False,
+            "reason": "empty train or holdout split",
+        }
+        state["history"].append(report)
+        save_trained(data_dir, state)
+        return report
+
+    start = time.time()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        dtrain, train_it = _dmatrix(new_parts, False, cache_dir)
+        dholdout, holdout_it = _dmatrix(parts, True, cache_dir)
+        print(
+            f"📦 {train_it.rows} train rows ({train_it.groups} groups), "
+            f"{holdout_it.rows} holdout rows ({holdout_it.groups} groups)"
+        )
+        baseline = evaluate(booster, dholdout)
+        candidate = xgb.train(train_params, dtrain, num_boost_round=rounds, xgb_model=booster.copy())
+        score = evaluate(candidate, dholdout)
+        # Release the external-memory pages before their cache dir is removed
+        del dtrain, dholdout
+
+    report = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "base_model": file_digest(model_path),
+        "parts": [os.path.basename(p) for p in new_parts],
+        "train_rows": train_it.rows,
+        "holdout_rows": holdout_it.rows,
+        "rounds": rounds,
+        "total_rounds": candidate.num_boosted_rounds(),
+        "params": train_params,
+        f"baseline_{EVAL_METRIC}": baseline,
+        f"candidate_{EVAL_METRIC}": score,
+        "train_seconds": time.time() - start,
+    }
+    report["published"] = score > baseline + min_improvement
+    print(f"📊 Holdout {EVAL_METRIC}: current {baseline:.5f} -> candidate {score:.5f}")
+
+    if report["published"]:
+        out_path = out_path or model_path
+        if out_path == model_path:
+            shutil.copyfile(model_path, model_path + ".prev")
+        save_model_tar(candidate, out_path)
+        report["model"] = file_digest(out_path)
+        state["parts"].extend(report["parts"])
+        print(f"✅ Published {out_path} ({report['total_rounds']} rounds)")
+    else:
+        print("❌ Candidate does not improve the holdout metric; keeping the current model")
+    state["history"].append(report)
+    save_trained(data_dir, state)
+    return report
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Continue training model.tar.gz on newly built compliance rows"
+    )
+    parser.add_argument("--model", default="data/model.tar.gz")
+    parser.add_argument("--data-dir", default="training/pairwise_weekly_compliance")
+    parser.add_argument("--out", default=None, help="publish path (default: replace --model)")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-improvement", type=float, default=0.0)
+    parser.add_argument("--eta", type=float, default=TRAIN_PARAMS["eta"])
+    parser.add_argument("--max-depth", type=int, default=TRAIN_PARAMS["max_depth"])
+    args = parser.parse_args()
+
+    retrain(
+        model_path=args.model,
+        data_dir=args.data_dir,
+        out_path=args.out,
+        rounds=args.rounds,
+        min_improvement=args.min_improvement,
+        params={"eta": args.eta, "max_depth": args.max_depth},
+    )
@@ -0,0 +1,530 @@
+# rosterDomain.py — Typed, array-backed nurse/shift/demand inputs, parsed and validated once
+import os
+import json
+import hashlib
+import zipfile
+
+import numpy as np
+
+# The JSON inputs are parsed here once into tables: one NumPy array per
+# nurse attribute, skills and preferences as bitmasks (bit k = k-th entry of
+# the table's vocabulary), unavailability as a packed nurse x (day, slot)
+# bitmap (one more per leave type), shift hours/times as arrays and demand as
+# dense (dept, day, slot) min/max arrays. RuleContext, the generators and the evaluator index these
+# instead of running .get("skills", []) / list scans / string splits in their
+# loops. load_inputs() validates the files and caches the parsed tables as a
+# .npz keyed by the content hash of the inputs. A cache hit only reads arrays;
+# the raw JSON dicts are parsed from the already-read file bytes the first
+# time a caller asks for them (RosterInputs.raw).
+
+# ---- Config ----
+PREFERENCES = ["Morning", "Evening", "Night"]
+SENIORITY_LEVELS = {"Junior": 0, "Mid": 1, "Senior": 2}
+LEAVE_TYPES = ["annual", "sick", "maternity"]  # nurse["leave"] lists, same format as unavailability
+CACHE_VERSION = 3  # bump when the cached arrays change meaning
+CACHE_DIR = os.environ.get("ROSTER_CACHE_DIR", os.path.join("data", "cache"))
+
+
+# ---- Parsing helpers ----
+def to_min(t):
+    h, m = map(int, t.split(":"))
+    return h * 60 + m
+
+
+def parse_unavailability(entry, days, slots):
+    """Expand one unavailability string into (day, slot) pairs.
+
+    Accepts exact slots ("Mon-Full-Night"), slot suffixes ("Mon-Night" covers
+    Full-Night and Half-Night), whole days ("Wed-AllDay"), long day names
+    ("Friday-Night") and a trailing ":<date range>" note, which is ignored.
+    Anything unparseable yields no pairs.
+    """
+    if not isinstance(entry, str) or "-" not in entry:
+        return []
+    entry = entry.split(":", 1)[0].strip()
+    day_str, _, slot_str = entry.partition("-")
+    day = next((d for d in days if day_str.lower().startswith(d.lower())), None)
+    if day is None or not slot_str:
+        return []
+    if slot_str in slots:
+        return [(day, slot_str)]
+    if slot_str.lower() == "allday":
+        return [(day, s) for s in slots]
+    return [(day, s) for s in slots if s.lower().endswith(slot_str.lower())]
+
+
+def _cell_bitmap(entries, days, slots):
+    """Bool (day * num_slots + slot) vector of the cells covered by unavailability-style entries"""
+    cells = np.zeros(len(days) * len(slots), dtype=bool)
+    day_pos = {d: i for i, d in enumerate(days)}
+    slot_pos = {s: i for i, s in enumerate(slots)}
+    for entry in entries:
+        for d, s in parse_unavailability(entry, days, slots):
+            cells[day_pos[d] * len(slots) + slot_pos[s]] = True
+    return cells
+
+
+def bits_of(names, vocab):
+    """Bitmask of `names` over `vocab` (unknown names are ignored)"""
+    mask = 0
+    for name in names:
+        if name in vocab:
+            mask |= 1 << vocab.index(name)
+    return mask
+
+
+# ---- Tables ----
+class Nurse:
+    """Row view of one nurse in a NurseTable"""
+
+    __slots__ = (
+        "index", "nurse_id", "name", "experience_years", "contracted_hours",
+        "seniority", "skills", "preferences", "unavailable", "on_leave",
+    )
+
+    def __init__(self, table, i):
+        self.index = i
+        self.nurse_id = table.ids[i]
+        self.name = table.names[i]
+        self.experience_years = int(table.experience[i])
+        self.contracted_hours = int(table.contracted[i])
+        self.seniority = int(table.seniority[i])
+        self.skills = int(table.skill_bits[i])
+        self.preferences = int(table.pref_bits[i])
+        # Python int bitmap, bit (day * num_slots + slot)
+        self.unavailable = int.from_bytes(table.unavailable_bits[i].tobytes(), "little")
+        self.on_leave = 0
+        for bits in table.leave_bits[:, i]:
+            self.on_leave |= int.from_bytes(bits.tobytes(), "little")
+
+    def has_skill(self, mask):
+        return bool(self.skills & mask)
+
+    def __repr__(self):
+        return f"Nurse({self.nurse_id!r})"
+
+
+class NurseTable:
+    """Column arrays of the nurse list, row i = nurses[i]"""
+
+    __slots__ = (
+        "ids", "names", "position", "skill_vocab", "skill_bits", "pref_bits",
+        "experience", "contracted", "seniority", "num_cells", "unavailable_bits", "leave_bits",
+    )
+
+    def __init__(self, ids, names, skill_vocab, skill_bits, pref_bits, experience, contracted,
+                 seniority, num_cells, unavailable_bits, leave_bits):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.position = {nid: i for i, nid in enumerate(self.ids)}
+        self.skill_vocab = list(skill_vocab)
+        self.skill_bits = np.asarray(skill_bits, dtype=np.uint32)
+        self.pref_bits = np.asarray(pref_bits, dtype=np.uint8)
+        self.experience = np.asarray(experience, dtype=np.int64)
+        self.contracted = np.asarray(contracted, dtype=np.int64)
+        self.seniority = np.asarray(seniority, dtype=np.int64)
+        self.num_cells = int(num_cells)
+        self.unavailable_bits = np.asarray(unavailable_bits, dtype=np.uint8).reshape(len(self.ids), -1)
+        # (leave type, nurse, packed cells), LEAVE_TYPES order
+        self.leave_bits = np.asarray(leave_bits, dtype=np.uint8).reshape(
+            len(LEAVE_TYPES), len(self.ids), self.unavailable_bits.shape[1]
+        )
+
+    @classmethod
+    def from_records(cls, nurses, skill_vocab, days, slots):
+        skill_vocab = list(skill_vocab) + sorted(
+            {k for n in nurses for k in n.get("skills", [])} - set(skill_vocab)
+        )
+        if len(skill_vocab) > 32:
+            raise ValueError(f"{len(skill_vocab)} distinct skills do not fit a 32-bit skill mask")
+        D, S = len(days), len(slots)
+        unavailable = np.array(
+            [_cell_bitmap(n.get("unavailability", []), days, slots) for n in nurses], dtype=bool
+        ).reshape(len(nurses), D * S)
+        leave = np.array(
+            [
+                [_cell_bitmap((n.get("leave") or {}).get(kind, []), days, slots) for n in nurses]
+                for kind in LEAVE_TYPES
+            ],
+            dtype=bool,
+        ).reshape(len(LEAVE_TYPES), len(nurses), D * S)
+        return cls(
+            [n["nurse_id"] for n in nurses],
+            [n.get("name", "") for n in nurses],
+            skill_vocab,
+            [bits_of(n.get("skills", []), skill_vocab) for n in nurses],
+            [bits_of(n.get("preferences", []), PREFERENCES) for n in nurses],
+            [n.get("experience_years", 0) for n in nurses],
+            [int(n.get("contracted_hours", 0)) for n in nurses],
+            [SENIORITY_LEVELS.get(n.get("seniority_level"), 0) for n in nurses],
+            D * S,
+            np.packbits(unavailable, axis=1, bitorder="little"),
+            np.packbits(leave, axis=2, bitorder="little"),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        return Nurse(self, i)
+
+    def __iter__(self):
+        return (Nurse(self, i) for i in range(len(self.ids)))
+
+    def skill_mask(self, *skills):
+        return bits_of(skills, self.skill_vocab)
+
+    def with_skill(self, *skills):
+        """Bool per nurse: has any of `skills`"""
+        return (self.skill_bits & np.uint32(self.skill_mask(*skills))) != 0
+
+    def skill_matrix(self, skills):
+        """(nurse, skill) bool matrix for the given skill names"""
+        return np.stack([self.with_skill(k) for k in skills], axis=1).reshape(len(self), len(skills))
+
+    def unavailable_grid(self, num_days):
+        """(nurse, day, slot) bool array of the unavailability bitmap"""
+        cells = np.unpackbits(self.unavailable_bits, axis=1, count=self.num_cells, bitorder="little")
+        return cells.astype(bool).reshape(len(self), num_days, -1)
+
+    def leave_grid(self, num_days):
+        """(leave type, nurse, day, slot) bool array of the leave bitmaps"""
+        cells = np.unpackbits(self.leave_bits, axis=2, count=self.num_cells, bitorder="little")
+        return cells.astype(bool).reshape(len(LEAVE_TYPES), len(self), num_days, -1)
+
+
+class ShiftTable:
+    """Slots with their hours and start/end minutes (end > start, +24h past midnight)"""
+
+    __slots__ = ("slots", "position", "hours", "start", "end")
+
+    def __init__(self, slots, hours, start, end):
+        self.slots = list(slots)
+        self.position = {s: i for i, s in enumerate(self.slots)}
+        self.hours = np.asarray(hours, dtype=np.int64)
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+
+    @classmethod
+    def from_def(cls, shift_def):
+        slots = list(shift_def["SHIFT_HOURS"].keys())
+        start, end = [], []
+        for s in slots:
+            start_s, end_s = shift_def["SHIFT_TIMES"][s]
+            a, b = to_min(start_s), to_min(end_s)
+            if b <= a:  # crosses midnight
+                b += 24 * 60
+            start.append(a)
+            end.append(b)
+        return cls(slots, [shift_def["SHIFT_HOURS"][s] for s in slots], start, end)
+
+
+class DemandTable:
+    """Dense (dept, day, slot) min/max staffing arrays"""
+
+    __slots__ = ("depts", "days", "slots", "min", "max")
+
+    def __init__(self, depts, days, slots, min_, max_):
+        self.depts = list(depts)
+        self.days = list(days)
+        self.slots = list(slots)
+        shape = (len(self.depts), len(self.days), len(self.slots))
+        self.min = np.asarray(min_, dtype=np.int64).reshape(shape)
+        self.max = np.asarray(max_, dtype=np.int64).reshape(shape)
+
+    @classmethod
+    def from_dict(cls, demand, depts, days, slots):
+        bounds = [[[demand[e][d][s] for s in slots] for d in days] for e in depts]
+        min_ = [[[b["min"] for b in row] for row in dept] for dept in bounds]
+        max_ = [[[b["max"] for b in row] for row in dept] for dept in bounds]
+        return cls(depts, days, slots, min_, max_)
+
+
+class RosterInputs:
+    """Parsed nurse/shift/rules/demand inputs plus the raw JSON they came from"""
+
+    __slots__ = ("nurses", "shifts", "demand", "rules", "digest", "_raw", "_availability")
+
+    def __init__(self, nurses, shifts, demand, rules, raw, digest=None):
+        self.nurses = nurses
+        self.shifts = shifts
+        self.demand = demand
+        self.rules = rules
+        self._raw = raw  # the tuple below, or a callable returning it
+        self.digest = digest
+        self._availability = None
+
+    @property
+    def raw(self):
+        """(nurse_list, shift_def, rules, demand) as loaded, parsed on first use after a cache hit"""
+        if callable(self._raw):
+            self._raw = self._raw()
+        return self._raw
+
+    @classmethod
+    def from_dicts(cls, nurse_list, shift_def, rules, demand, digest=None):
+        general = rules["general"]
+        days, depts = list(general["days"]), list(general["departments"])
+        shifts = ShiftTable.from_def(shift_def)
+        return cls(
+            NurseTable.from_records(nurse_list, general["skills"], days, shifts.slots),
+            shifts,
+            DemandTable.from_dict(demand, depts, days, shifts.slots),
+            rules,
+            (nurse_list, shift_def, rules, demand),
+            digest,
+        )
+
+    @property
+    def days(self):
+        return self.demand.days
+
+    @property
+    def depts(self):
+        return self.demand.depts
+
+    @property
+    def availability(self):
+        """AvailabilityIndex of these inputs, compiled on first use"""
+        if self._availability is None:
+            self._availability = AvailabilityIndex(self)
+        return self._availability
+
+    # ---- Binary cache ----
+    def save(self, path):
+        """Write the tables as <path>, atomically (a concurrent reader sees the old file or the new one)"""
+        meta = {
+            "version": CACHE_VERSION,
+            "digest": self.digest,
+            "nurse_ids": self.nurses.ids,
+            "nurse_names": self.nurses.names,
+            "skill_vocab": self.nurses.skill_vocab,
+            "slots": self.shifts.slots,
+            "days": self.demand.days,
+            "depts": self.demand.depts,
+            "rules": self.rules,
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                skill_bits=self.nurses.skill_bits,
+                pref_bits=self.nurses.pref_bits,
+                experience=self.nurses.experience,
+                contracted=self.nurses.contracted,
+                seniority=self.nurses.seniority,
+                unavailable_bits=self.nurses.unavailable_bits,
+                leave_bits=self.nurses.leave_bits,
+                hours=self.shifts.hours,
+                start=self.shifts.start,
+                end=self.shifts.end,
+                demand_min=self.demand.min,
+                demand_max=self.demand.max,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, raw):
+        """Tables cached at <path>, or None for another CACHE_VERSION; `raw` as in __init__"""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("version") != CACHE_VERSION:
+                return None
+            slots, days = meta["slots"], meta["days"]
+            nurses = NurseTable(
+                meta["nurse_ids"], meta["nurse_names"], meta["skill_vocab"], data["skill_bits"],
+                data["pref_bits"], data["experience"], data["contracted"], data["seniority"],
+                len(days) * len(slots), data["unavailable_bits"], data["leave_bits"],
+            )
+            shifts = ShiftTable(slots, data["hours"], data["start"], data["end"])
+            demand = DemandTable(meta["depts"], days, slots, data["demand_min"], data["demand_max"])
+        return cls(nurses, shifts, demand, meta["rules"], raw, meta["digest"])
+
+
+# ---- Availability ----
+class AvailabilityIndex:
+    """Who can work which (day, slot): unavailability and every leave type, compiled once per input version.
+
+    blocked is the (nurse, day, slot) bool array the rules and generators
+    read. Queries go through per-cell and per-skill nurse bitsets: "nurses
+    free on Mon Full-Night with ICU" is one AND of two packed rows.
+    """
+
+    def __init__(self, inputs):
+        table = inputs.nurses
+        D, S = len(inputs.days), len(inputs.shifts.slots)
+        self.nurse_ids = table.ids
+        self.nurse_pos = table.position
+        self.day_pos = {d: i for i, d in enumerate(inputs.days)}
+        self.slot_pos = inputs.shifts.position
+        self.unavailable = table.unavailable_grid(D)
+        self.leave = table.leave_grid(D)
+        self.blocked = self.unavailable | self.leave.any(axis=0)
+
+        # Packed nurse bitsets: free_bits[d, s] and skill_bits[skill]
+        self.free_bits = np.packbits(~self.blocked.transpose(1, 2, 0), axis=-1, bitorder="little")
+        self.skill_bits = {
+            k: np.packbits(table.with_skill(k), bitorder="little") for k in table.skill_vocab
+        }
+        self.num_nurses = len(table)
+
+    def _cell(self, day, slot):
+        return self.day_pos[day], self.slot_pos[slot]
+
+    def mask(self, day, slot, skill=None):
+        """Bool per nurse: free on (day, slot) and, if given, has `skill`"""
+        bits = self.free_bits[self._cell(day, slot)]
+        if skill is not None:
+            bits = bits & self.skill_bits.get(skill, np.zeros_like(bits))
+        return np.unpackbits(bits, count=self.num_nurses, bitorder="little").astype(bool)
+
+    def nurses(self, day, slot, skill=None):
+        """Ids of the nurses free on (day, slot), optionally only those with `skill`"""
+        return [self.nurse_ids[n] for n in np.flatnonzero(self.mask(day, slot, skill))]
+
+    def count(self, day, slot, skill=None):
+        return int(self.mask(day, slot, skill).sum())
+
+    def is_available(self, nurse_id, day, slot):
+        d, s = self._cell(day, slot)
+        return not self.blocked[self.nurse_pos[nurse_id], d, s]
+
+    def reason(self, n, d, s):
+        """Why nurse index n is blocked on cell (d, s): "unavailability", "<type> leave" or None"""
+        if self.unavailable[n, d, s]:
+            return "unavailability"
+        for kind, grid in zip(LEAVE_TYPES, self.leave):
+            if grid[n, d, s]:
+                return f"{kind} leave"
+        return None
+
+
+# ---- Validation ----
+def validate_inputs(nurse_list, shift_def, rules, demand):
+    """(problems, warnings): the inputs are usable if there are no problems.
+
+    Unparseable unavailability entries are only warnings: they have always
+    been skipped (see parse_unavailability).
+    """
+    problems, warnings = [], []
+    general = rules.get("general", {})
+    for key in ("days", "departments", "skills"):
+        if not general.get(key):
+            problems.append(f"rules.general.{key} is missing or empty")
+    if "constraints" not in rules:
+        problems.append("rules.constraints is missing")
+    days, depts = general.get("days", []), general.get("departments", [])
+    for dept in general.get("core_skill", {}):
+        if dept not in depts:
+            problems.append(f"core_skill for unknown department {dept}")
+
+    hours = shift_def.get("SHIFT_HOURS", {})
+    times = shift_def.get("SHIFT_TIMES", {})
+    if not hours:
+        problems.append("shift.SHIFT_HOURS is missing or empty")
+    for s, h in hours.items():
+        if not isinstance(h, (int, float)) or h <= 0:
+            problems.append(f"shift {s}: hours must be positive, got {h!r}")
+        try:
+            start, end = times[s]
+            to_min(start), to_min(end)
+        except (KeyError, ValueError, TypeError):
+            problems.append(f"shift {s}: SHIFT_TIMES needs a [\"HH:MM\", \"HH:MM\"] pair")
+
+    seen = set()
+    for i, n in enumerate(nurse_list):
+        nid = n.get("nurse_id")
+        if not nid:
+            problems.append(f"nurse #{i} has no nurse_id")
+            continue
+        if nid in seen:
+            problems.append(f"duplicate nurse_id {nid}")
+        seen.add(nid)
+        contracted = n.get("contracted_hours", 0)
+        if not isinstance(contracted, int) or contracted < 0:
+            problems.append(f"nurse {nid}: contracted_hours must be a non-negative integer")
+        for key in ("skills", "preferences", "unavailability"):
+            if not isinstance(n.get(key, []), list):
+                problems.append(f"nurse {nid}: {key} must be a list")
+        for ua in n.get("unavailability", []) if isinstance(n.get("unavailability", []), list) else []:
+            if not parse_unavailability(ua, days, list(hours)):
+                warnings.append(f"nurse {nid}: unparseable unavailability {ua!r} ignored")
+        leave = n.get("leave") or {}
+        if not isinstance(leave, dict) or not all(isinstance(v, list) for v in leave.values()):
+            problems.append(f"nurse {nid}: leave must map leave types to lists")
+            continue
+        for kind, entries in leave.items():
+            if kind not in LEAVE_TYPES:
+                warnings.append(f"nurse {nid}: unknown leave type {kind!r} ignored")
+                continue
+            for entry in entries:
+                if not parse_unavailability(entry, days, list(hours)):
+                    warnings.append(f"nurse {nid}: unparseable {kind} leave {entry!r} ignored")
+
+    for dept in depts:
+        for day in days:
+            for s in hours:
+                b = demand.get(dept, {}).get(day, {}).get(s)
+                if not isinstance(b, dict) or "min" not in b or "max" not in b:
+                    problems.append(f"demand {dept}/{day}/{s} is missing min/max")
+                elif not 0 <= b["min"] <= b["max"]:
+                    problems.append(f"demand {dept}/{day}/{s}: need 0 <= min <= max, got {b}")
+    return problems, warnings
+
+
+# ---- Loader ----
+def inputs_digest(paths):
+    return _digest(_read_all(paths))
+
+
+def _read_all(paths):
+    contents = []
+    for path in paths:
+        with open(path, "rb") as f:
+            contents.append(f.read())
+    return contents
+
+
+def _digest(contents):
+    h = hashlib.sha1()
+    for data in contents:
+        h.update(hashlib.sha1(data).digest())
+    return h.hexdigest()
+
+
+def load_inputs(nurses_path, rules_path, demand_path, shift_path, cache_dir=CACHE_DIR):
+    """Validated RosterInputs of the four JSON files, from the binary cache when unchanged.
+
+    Raises ValueError listing every problem if the inputs are invalid.
+    """
+    contents = _read_all([nurses_path, rules_path, demand_path, shift_path])
+    digest = _digest(contents)
+    nurses_json, rules_json, demand_json, shift_json = contents
+    cache_path = os.path.join(cache_dir, f"inputs-{digest[:16]}.npz") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        def raw():
+            return json.loads(nurses_json), json.loads(shift_json), inputs.rules, json.loads(demand_json)
+
+        try:
+            inputs = RosterInputs.load(cache_path, raw)
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            print(f"⚠️ Unreadable input cache {cache_path} ({e}), rebuilding")
+            inputs = None
+        if inputs is not None and inputs.digest == digest:
+            return inputs
+
+    nurse_list, shift_def, rules, demand = (
+        json.loads(data) for data in (nurses_json, shift_json, rules_json, demand_json)
+    )
+    problems, warnings = validate_inputs(nurse_list, shift_def, rules, demand)
+    for warning in warnings:
+        print(f"⚠️ {warning}")
+    if problems:
+        raise ValueError("invalid roster inputs:\n  " + "\n  ".join(problems))
+
+    inputs = RosterInputs.from_dicts(nurse_list, shift_def, rules, demand, digest)
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        inputs.save(cache_path)
+    return inputs
@@ -0,0 +1,769 @@
+# rosterRules.py — Hard rules from rules.json, compiled to CP-SAT constraints and NumPy checks
+#
+# Every hard rule is declared once here. Each rule can
+#   * emit its CP-SAT constraints over the dense assignment array x[nurse, dept, day, slot]
+#     (used by generateRoster.build_and_solve_hybrid and rostergenerator.build_and_solve),
+#   * count its violations over a RosterState, either for the whole roster or for the
+#     small slice a single assignment touches (used by evaluateRoster and incrementalEvaluator).
+from abc import ABC, abstractmethod
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from rosterDomain import RosterInputs
+
+
+# ---- Helpers ----
+def _sel(arr, idx):
+    return arr if idx is None else arr[idx]
+
+
+# ---- Shared context ----
+class RuleContext:
+    """Index maps and dense arrays built once from nurse/shift/rules/demand inputs"""
+
+    def __init__(self, nurses, shift_def, rules, demand, inputs=None):
+        self.rules = rules
+        # Parsed tables (see rosterDomain.py); pass `inputs` to reuse an already parsed set
+        self.inputs = inputs or RosterInputs.from_dicts(nurses, shift_def, rules, demand)
+        table, shifts = self.inputs.nurses, self.inputs.shifts
+
+        general = rules["general"]
+        constraints = rules["constraints"]
+        self.nurse_ids = list(table.ids)
+        self.depts = list(general["departments"])
+        self.days = list(general["days"])
+        self.slots = list(shifts.slots)
+        self.skills = list(general["skills"])
+        self.nurse_pos = dict(table.position)
+        self.dept_pos = {d: i for i, d in enumerate(self.depts)}
+        self.day_pos = {d: i for i, d in enumerate(self.days)}
+        self.slot_pos = dict(shifts.position)
+        N, E, D, S = len(table), len(self.depts), len(self.days), len(self.slots)
+        self.shape = (N, E, D, S)
+
+        self.hours = shifts.hours.copy()
+        self.demand_min = self.inputs.demand.min.copy()
+        self.demand_max = self.inputs.demand.max.copy()
+
+        self.skill_matrix = table.skill_matrix(self.skills)
+        self.core_mask = np.stack(
+            [table.with_skill(general["core_skill"].get(e)) for e in self.depts], axis=1
+        ).reshape(N, E)
+        self.contracted = table.contracted.copy()
+        # Unavailability strings and leave calendars, one (nurse, day, slot) bitmap
+        self.availability = self.inputs.availability
+        self.unavailable = self.availability.blocked
+
+        self.daily_cap = constraints["daily_hours_cap"]
+        self.weekly_cap = constraints["weekly_hours_cap"]
+        self.weekly_rest_days = constraints["weekly_rest_days"]
+        self.min_distinct_skills = constraints.get("skill_mix_requirement", {}).get(
+            "min_distinct_skills", 3
+        )
+
+        # Absolute start/end minutes of every (day, slot) task within the week
+        day_base = np.arange(D, dtype=np.int64)[:, None] * 24 * 60
+        self.task_start = (day_base + shifts.start).ravel()
+        self.task_end = (day_base + shifts.end).ravel()
+        self.set_rest_time(constraints["rest_time_hours"])
+
+        self.dept_pairs = np.array(
+            [(i, j) for i in range(E) for j in range(i + 1, E)], dtype=np.int64
+        ).reshape(-1, 2)
+
+    @classmethod
+    def from_inputs(cls, inputs):
+        """Context over a RosterInputs (e.g. from rosterDomain.load_inputs) without re-parsing"""
+        return cls(None, None, inputs.rules, None, inputs=inputs)
+
+    # The JSON dicts, only parsed if a caller needs them (see RosterInputs.raw)
+    @property
+    def nurses(self):
+        return self.inputs.raw[0]
+
+    @property
+    def shift_def(self):
+        return self.inputs.raw[1]
+
+    @property
+    def demand(self):
+        return self.inputs.raw[3]
+
+    def set_rest_time(self, rest_hours):
+        """(Re)compute the task pairs that are too close together for `rest_hours`"""
+        self.rest_minutes = rest_hours * 60
+        order = np.lexsort((self.task_end, self.task_start))
+        pairs = []
+        for a in range(len(order)):
+            i = order[a]
+            for b in range(a + 1, len(order)):
+                j = order[b]
+                gap = self.task_start[j] - self.task_end[i]
+                if gap < self.rest_minutes:
+                    pairs.append((i, j, gap))
+        self.pair_i = np.array([p[0] for p in pairs], dtype=np.int64)
+        self.pair_j = np.array([p[1] for p in pairs], dtype=np.int64)
+        self.pair_gap = np.array([p[2] for p in pairs], dtype=np.int64)
+        T = len(self.task_start)
+        self.pairs_of_task = [
+            np.flatnonzero((self.pair_i == t) | (self.pair_j == t)) for t in range(T)
+        ]
+
+    def task_name(self, t):
+        d, s = divmod(int(t), len(self.slots))
+        return self.days[d], self.slots[s]
+
+    def index_of(self, key):
+        """(nurse_id, dept, day, slot) -> array index; KeyError if any part is unknown"""
+        nid, dept, day, slot = key
+        return (
+            self.nurse_pos[nid],
+            self.dept_pos[dept],
+            self.day_pos[day],
+            self.slot_pos[slot],
+        )
+
+
+# ---- Roster aggregates ----
+class RosterState:
+    """Assignment counts plus the aggregates every rule checks against"""
+
+    def __init__(self, ctx, X):
+        self.X = X
+        self.counts = X.sum(axis=0)  # (dept, day, slot)
+        self.core_counts = np.einsum("neds,ne->eds", X, ctx.core_mask.astype(np.int64))
+        self.skill_counts = np.einsum(
+            "neds,nk->edsk", X, ctx.skill_matrix.astype(np.int64)
+        )
+        self.daily_hours = np.einsum("neds,s->nd", X, ctx.hours)  # (nurse, day)
+        self.occupancy = X.sum(axis=1)  # (nurse, day, slot)
+
+    def weekly_hours(self):
+        return self.daily_hours.sum(axis=1)
+
+    def update(self, ctx, n, e, d, s, sign):
+        self.X[n, e, d, s] += sign
+        self.counts[e, d, s] += sign
+        self.core_counts[e, d, s] += sign * int(ctx.core_mask[n, e])
+        self.skill_counts[e, d, s] += sign * ctx.skill_matrix[n].astype(np.int64)
+        self.daily_hours[n, d] += sign * int(ctx.hours[s])
+        self.occupancy[n, d, s] += sign
+
+
+def roster_state(ctx, roster):
+    """Roster JSON -> (RosterState, unknown assignment keys that could not be indexed)"""
+    X = np.zeros(ctx.shape, dtype=np.int64)
+    unknown = []
+    for dept in roster["departments"]:
+        for n in dept["nurses"]:
+            for s in n["shifts"]:
+                key = (n["id"], dept["name"], s["day"], s["shift"])
+                try:
+                    X[ctx.index_of(key)] += 1
+                except KeyError:
+                    unknown.append(key)
+    return RosterState(ctx, X), unknown
+
+
+def assignment_vars(ctx, model, allowed=None):
+    """New BoolVar per (nurse, dept, day, slot) as an object array, plus the keyed dict view.
+
+    `allowed` is an optional boolean mask of ctx.shape; cells outside it get the
+    model's shared fixed-0 constant instead of a variable.
+    """
+    x = np.empty(ctx.shape, dtype=object)
+    assignment = {}
+    zero = model.NewConstant(0) if allowed is not None else None
+    for n, nid in enumerate(ctx.nurse_ids):
+        for e, dept in enumerate(ctx.depts):
+            for d, day in enumerate(ctx.days):
+                for s, slot in enumerate(ctx.slots):
+                    if allowed is not None and not allowed[n, e, d, s]:
+                        v = zero
+                    else:
+                        v = model.NewBoolVar(f"a_{nid}_{dept}_{day}_{slot}")
+                    x[n, e, d, s] = v
+                    assignment[(nid, dept, day, slot)] = v
+    return x, assignment
+
+
+def _sum(vars_):
+    return cp_model.LinearExpr.Sum(list(np.ravel(vars_)))
+
+
+def _hours_sum(ctx, vars_):
+    """Weighted sum of an (..., slot) shaped var array by shift hours"""
+    coeffs = np.broadcast_to(ctx.hours, np.shape(vars_))
+    return cp_model.LinearExpr.WeightedSum(
+        list(np.ravel(vars_)), [int(c) for c in np.ravel(coeffs)]
+    )
+
+
+# ---- Rules ----
+# Each rule: violations(ctx, state, idx=None) returns a boolean array over the rule's
+# index space (idx selects a slice of it); local_index() names the slice one
+# assignment (n, e, d, s) can affect; add_constraints() returns {key: constraint}.
+class Rule(ABC):
+    name = ""
+    per_nurse = False  # constrains one nurse's own week only (no other nurse involved)
+
+    def enabled(self, ctx):
+        return True
+
+    @abstractmethod
+    def add_constraints(self, ctx, model, x):
+        pass
+
+    @abstractmethod
+    def violations(self, ctx, state, idx=None):
+        pass
+
+    @abstractmethod
+    def local_index(self, ctx, n, e, d, s):
+        pass
+
+    @abstractmethod
+    def describe(self, ctx, state, index):
+        pass
+
+    def messages(self, ctx, state):
+        return [
+            self.describe(ctx, state, tuple(int(i) for i in index))
+            for index in np.argwhere(self.violations(ctx, state))
+        ]
+
+
+class DemandRule(Rule):
+    """Assigned nurses per department shift within demand min/max"""
+
+    name = "demand"
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for e, dept in enumerate(ctx.depts):
+            for d, day in enumerate(ctx.days):
+                for s, slot in enumerate(ctx.slots):
+                    handles[(dept, day, slot)] = model.AddLinearConstraint(
+                        _sum(x[:, e, d, s]),
+                        int(ctx.demand_min[e, d, s]),
+                        int(ctx.demand_max[e, d, s]),
+                    )
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        c = _sel(state.counts, idx)
+        return (c < _sel(ctx.demand_min, idx)) | (c > _sel(ctx.demand_max, idx))
+
+    def local_index(self, ctx, n, e, d, s):
+        return (e, d, s)
+
+    def describe(self, ctx, state, index):
+        e, d, s = index
+        dept, day, slot = ctx.depts[e], ctx.days[d], ctx.slots[s]
+        bounds = ctx.demand[dept][day][slot]
+        return (
+            f"❌ Demand violated in {dept} {day} {slot} "
+            f"(assigned={state.counts[index]}, allowed={bounds})"
+        )
+
+
+class DailyHoursRule(Rule):
+    """Hours per nurse per day at most daily_hours_cap"""
+
+    name = "daily_hours_cap"
+    per_nurse = True
+
+    def add_constraints(self, ctx, model, x):
+        return {
+            (nid, day): model.Add(_hours_sum(ctx, x[n, :, d, :]) <= ctx.daily_cap)
+            for n, nid in enumerate(ctx.nurse_ids)
+            for d, day in enumerate(ctx.days)
+        }
+
+    def violations(self, ctx, state, idx=None):
+        return _sel(state.daily_hours, idx) > ctx.daily_cap
+
+    def local_index(self, ctx, n, e, d, s):
+        return (n, d)
+
+    def describe(self, ctx, state, index):
+        n, d = index
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} exceeds daily cap on {ctx.days[d]}: "
+            f"{state.daily_hours[n, d]}h > {ctx.daily_cap}h"
+        )
+
+
+class WeeklyHoursRule(Rule):
+    """Hours per nurse per week at most weekly_hours_cap"""
+
+    name = "weekly_hours_cap"
+    per_nurse = True
+
+    def add_constraints(self, ctx, model, x):
+        return {
+            nid: model.Add(_hours_sum(ctx, x[n]) <= ctx.weekly_cap)
+            for n, nid in enumerate(ctx.nurse_ids)
+        }
+
+    def violations(self, ctx, state, idx=None):
+        return _sel(state.daily_hours, idx).sum(axis=-1) > ctx.weekly_cap
+
+    def local_index(self, ctx, n, e, d, s):
+        return n
+
+    def describe(self, ctx, state, index):
+        (n,) = index
+        total = state.daily_hours[n].sum()
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} exceeds weekly cap: "
+            f"{total}h > {ctx.weekly_cap}h"
+        )
+
+
+class ContractedHoursRule(Rule):
+    """Weekly hours equal contracted_hours for nurses with a contract (> 0)"""
+
+    name = "contracted_hours"
+    per_nurse = True
+
+    def enabled(self, ctx):
+        return ctx.rules["constraints"].get("contracted_hours", {}).get("enabled", True)
+
+    def add_constraints(self, ctx, model, x):
+        return {
+            nid: model.Add(_hours_sum(ctx, x[n]) == int(ctx.contracted[n]))
+            for n, nid in enumerate(ctx.nurse_ids)
+            if ctx.contracted[n] > 0
+        }
+
+    def violations(self, ctx, state, idx=None):
+        weekly = _sel(state.daily_hours, idx).sum(axis=-1)
+        contracted = _sel(ctx.contracted, idx)
+        return (contracted > 0) & (weekly != contracted)
+
+    def local_index(self, ctx, n, e, d, s):
+        return n
+
+    def describe(self, ctx, state, index):
+        (n,) = index
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} works {state.daily_hours[n].sum()}h "
+            f"but is contracted for {ctx.contracted[n]}h"
+        )
+
+
+class SingleAssignmentRule(Rule):
+    """At most one department per nurse per day-slot"""
+
+    name = "max_assignments_per_slot"
+    per_nurse = True
+
+    def enabled(self, ctx):
+        return (
+            ctx.rules["constraints"]
+            .get("max_assignments_per_slot", {})
+            .get("enabled", True)
+        )
+
+    def add_constraints(self, ctx, model, x):
+        return {
+            (nid, day, slot): model.Add(_sum(x[n, :, d, s]) <= 1)
+            for n, nid in enumerate(ctx.nurse_ids)
+            for d, day in enumerate(ctx.days)
+            for s, slot in enumerate(ctx.slots)
+        }
+
+    def violations(self, ctx, state, idx=None):
+        return _sel(state.occupancy, idx) > 1
+
+    def local_index(self, ctx, n, e, d, s):
+        return (n, d, s)
+
+    def describe(self, ctx, state, index):
+        n, d, s = index
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} assigned to {state.occupancy[index]} "
+            f"departments on {ctx.days[d]} {ctx.slots[s]}"
+        )
+
+
+class UnavailabilityRule(Rule):
+    """No assignments in a nurse's unavailable slots (unavailability entries and leave)"""
+
+    name = "unavailability"
+    per_nurse = True
+
+    def enabled(self, ctx):
+        return ctx.rules.get("unavailability", {}).get("type", "hard") == "hard"
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for n, d, s in np.argwhere(ctx.unavailable):
+            key = (ctx.nurse_ids[n], ctx.days[d], ctx.slots[s])
+            handles[key] = [model.Add(v == 0) for v in x[n, :, d, s]]
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        return (_sel(state.occupancy, idx) > 0) & _sel(ctx.unavailable, idx)
+
+    def local_index(self, ctx, n, e, d, s):
+        return (n, d, s)
+
+    def describe(self, ctx, state, index):
+        n, d, s = index
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} assigned while unavailable ({ctx.availability.reason(n, d, s)}) on "
+            f"{ctx.days[d]} {ctx.slots[s]}"
+        )
+
+
+class RestDaysRule(Rule):
+    """At least weekly_rest_days days without any shift"""
+
+    name = "weekly_rest_days"
+    per_nurse = True
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for n, nid in enumerate(ctx.nurse_ids):
+            rest_vars = []
+            for d, day in enumerate(ctx.days):
+                rest = model.NewBoolVar(f"rest_{nid}_{day}")
+                model.Add(_sum(x[n, :, d, :]) == 0).OnlyEnforceIf(rest)
+                rest_vars.append(rest)
+            handles[nid] = model.Add(
+                cp_model.LinearExpr.Sum(rest_vars) >= ctx.weekly_rest_days
+            )
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        worked = (_sel(state.daily_hours, idx) > 0).sum(axis=-1)
+        return len(ctx.days) - worked < ctx.weekly_rest_days
+
+    def local_index(self, ctx, n, e, d, s):
+        return n
+
+    def describe(self, ctx, state, index):
+        (n,) = index
+        rest_days = len(ctx.days) - int((state.daily_hours[n] > 0).sum())
+        if rest_days == 0:
+            return f"❌ Nurse {ctx.nurse_ids[n]} has no rest day (worked all days)"
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} has {rest_days} rest days, "
+            f"requires {ctx.weekly_rest_days}"
+        )
+
+
+class CoreSkillRule(Rule):
+    """Each staffed department shift includes a nurse with the department's core skill"""
+
+    name = "core_skill_requirement"
+
+    def enabled(self, ctx):
+        return ctx.rules["constraints"].get("core_skill_requirement", {}).get("enabled", False)
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for e, dept in enumerate(ctx.depts):
+            core = ctx.core_mask[:, e]
+            for d, day in enumerate(ctx.days):
+                for s, slot in enumerate(ctx.slots):
+                    if ctx.demand_min[e, d, s] <= 0:
+                        continue
+                    handles[(dept, day, slot)] = model.Add(_sum(x[core, e, d, s]) >= 1)
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        return (
+            (_sel(ctx.demand_min, idx) > 0)
+            & (_sel(state.counts, idx) > 0)
+            & (_sel(state.core_counts, idx) == 0)
+        )
+
+    def local_index(self, ctx, n, e, d, s):
+        return (e, d, s)
+
+    def describe(self, ctx, state, index):
+        e, d, s = index
+        assigned = [ctx.nurse_ids[n] for n in np.flatnonzero(state.X[:, e, d, s])]
+        return (
+            f"❌ {ctx.depts[e]} {ctx.days[d]} {ctx.slots[s]} missing core skill nurse "
+            f"(assigned={assigned})"
+        )
+
+
+class SkillMixRule(Rule):
+    """Each staffed department shift covers at least min_distinct_skills skills"""
+
+    name = "skill_mix_requirement"
+
+    def enabled(self, ctx):
+        return ctx.rules["constraints"].get("skill_mix_requirement", {}).get("enabled", False)
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for e, dept in enumerate(ctx.depts):
+            for d, day in enumerate(ctx.days):
+                for s, slot in enumerate(ctx.slots):
+                    if ctx.demand_min[e, d, s] <= 0:
+                        continue
+                    present = []
+                    for k, skill in enumerate(ctx.skills):
+                        skilled = x[ctx.skill_matrix[:, k], e, d, s]
+                        if len(skilled) == 0:
+                            continue
+                        v = model.NewBoolVar(f"skill_present_{dept}_{day}_{slot}_{skill}")
+                        model.AddMaxEquality(v, list(skilled))
+                        present.append(v)
+                    handles[(dept, day, slot)] = model.Add(
+                        cp_model.LinearExpr.Sum(present) >= ctx.min_distinct_skills
+                    )
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        distinct = (_sel(state.skill_counts, idx) > 0).sum(axis=-1)
+        return (
+            (_sel(ctx.demand_min, idx) > 0)
+            & (_sel(state.counts, idx) > 0)
+            & (distinct < ctx.min_distinct_skills)
+        )
+
+    def local_index(self, ctx, n, e, d, s):
+        return (e, d, s)
+
+    def describe(self, ctx, state, index):
+        e, d, s = index
+        distinct = int((state.skill_counts[index] > 0).sum())
+        return (
+            f"❌ {ctx.depts[e]} {ctx.days[d]} {ctx.slots[s]} covers only {distinct} "
+            f"skills, requires {ctx.min_distinct_skills}"
+        )
+
+
+class RestTimeRule(Rule):
+    """At least rest_time_hours between the end of one shift and the start of the next"""
+
+    name = "rest_time_hours"
+    per_nurse = True
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        N, E, D, S = ctx.shape
+        tasks = x.transpose(0, 2, 3, 1).reshape(N, D * S, E)
+        for n, nid in enumerate(ctx.nurse_ids):
+            for p, (i, j) in enumerate(zip(ctx.pair_i, ctx.pair_j)):
+                handles[(nid, p)] = model.Add(_sum([tasks[n, i], tasks[n, j]]) <= 1)
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        n_sel, p_sel = (slice(None), slice(None)) if idx is None else idx
+        occ = state.occupancy.reshape(state.occupancy.shape[0], -1)[n_sel] > 0
+        return occ[..., ctx.pair_i[p_sel]] & occ[..., ctx.pair_j[p_sel]]
+
+    def local_index(self, ctx, n, e, d, s):
+        return (n, ctx.pairs_of_task[d * len(ctx.slots) + s])
+
+    def describe(self, ctx, state, index):
+        n, p = index
+        day1, slot1 = ctx.task_name(ctx.pair_i[p])
+        day2, slot2 = ctx.task_name(ctx.pair_j[p])
+        gap = int(ctx.pair_gap[p])
+        if gap < 0:
+            return (
+                f"❌ Nurse {ctx.nurse_ids[n]} has overlapping shifts: "
+                f"{day1} {slot1} and {day2} {slot2}"
+            )
+        return (
+            f"❌ Nurse {ctx.nurse_ids[n]} rest violation: only {gap} min between "
+            f"{day1} {slot1} → {day2} {slot2}; requires {ctx.rest_minutes} min"
+        )
+
+
+class DepartmentBalanceRule(Rule):
+    """Nurse counts of any two departments in the same day-slot differ by at most 1"""
+
+    name = "department_balance"
+
+    def enabled(self, ctx):
+        return ctx.rules["constraints"].get("department_balance", {}).get("enabled", False)
+
+    def add_constraints(self, ctx, model, x):
+        handles = {}
+        for d, day in enumerate(ctx.days):
+            for s, slot in enumerate(ctx.slots):
+                for i, j in ctx.dept_pairs:
+                    expr = _sum(x[:, i, d, s]) - _sum(x[:, j, d, s])
+                    key = (ctx.depts[i], ctx.depts[j], day, slot)
+                    handles[key] = model.AddLinearConstraint(expr, -1, 1)
+        return handles
+
+    def violations(self, ctx, state, idx=None):
+        # index space: (dept pair, day, slot)
+        counts = state.counts[ctx.dept_pairs[:, 0]] - state.counts[ctx.dept_pairs[:, 1]]
+        return np.abs(_sel(counts, idx)) > 1
+
+    def local_index(self, ctx, n, e, d, s):
+        return (slice(None), d, s)
+
+    def describe(self, ctx, state, index):
+        q, d, s = index
+        i, j = ctx.dept_pairs[q]
+        return (
+            f"❌ Department balance violated on {ctx.days[d]} {ctx.slots[s]}: "
+            f"{ctx.depts[i]}={state.counts[i, d, s]}, {ctx.depts[j]}={state.counts[j, d, s]}"
+        )
+
+
+RULES = [
+    DemandRule(),
+    DailyHoursRule(),
+    WeeklyHoursRule(),
+    ContractedHoursRule(),
+    SingleAssignmentRule(),
+    UnavailabilityRule(),
+    RestDaysRule(),
+    CoreSkillRule(),
+    SkillMixRule(),
+    RestTimeRule(),
+    DepartmentBalanceRule(),
+]
+
+
+def active_rules(ctx):
+    return [rule for rule in RULES if rule.enabled(ctx)]
+
+
+def nurse_rules(ctx):
+    """Active rules that only look at one nurse's own week"""
+    return [rule for rule in active_rules(ctx) if rule.per_nurse]
+
+
+def shift_rules(ctx):
+    """Active rules over department shifts (staffing, skills, balance)"""
+    return [rule for rule in active_rules(ctx) if not rule.per_nurse]
+
+
+def add_hard_constraints(ctx, model, x):
+    """Emit every enabled rule into the model; returns {rule name: {key: constraint}}"""
+    return {rule.name: rule.add_constraints(ctx, model, x) for rule in active_rules(ctx)}
+
+
+# ---- Model template ----
+def _set_bounds(ct_proto, lo, hi):
+    ct_proto.linear.domain.clear()
+    ct_proto.linear.domain.extend([int(lo), int(hi)])
+
+
+class ModelTemplate:
+    """Hard-rule CP model built once for a base context and re-used for variants.
+
+    instantiate(variant_ctx) clones the model and patches only what a variant
+    may change without new variables or constraints: demand bounds, hour caps,
+    contracted hours, rest-day and skill-mix thresholds, unavailability
+    (newly unavailable slots are fixed to 0) and rest pairs that a shorter
+    rest time no longer forbids. Anything else is a structural change and
+    instantiate() returns None so the caller builds that variant from scratch.
+    """
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.model = cp_model.CpModel()
+        self.x, self.assignment = assignment_vars(ctx, self.model)
+        self.handles = add_hard_constraints(ctx, self.model, self.x)
+        self.rule_names = [rule.name for rule in active_rules(ctx)]
+        self.rest_pairs = {
+            (int(i), int(j)): p for p, (i, j) in enumerate(zip(ctx.pair_i, ctx.pair_j))
+        }
+
+    def structural_change(self, variant):
+        """Why `variant` cannot be patched from this template, or None if it can"""
+        base = self.ctx
+        if (base.nurse_ids, base.depts, base.days, base.slots, base.skills) != (
+            variant.nurse_ids, variant.depts, variant.days, variant.slots, variant.skills
+        ):
+            return "nurses, departments, days, slots or skills differ"
+        if not (
+            np.array_equal(base.hours, variant.hours)
+            and np.array_equal(base.task_start, variant.task_start)
+            and np.array_equal(base.task_end, variant.task_end)
+        ):
+            return "shift definitions differ"
+        if [rule.name for rule in active_rules(variant)] != self.rule_names:
+            return "enabled rules differ"
+        if not (
+            np.array_equal(base.skill_matrix, variant.skill_matrix)
+            and np.array_equal(base.core_mask, variant.core_mask)
+        ):
+            return "nurse skills differ"
+        if np.any((variant.demand_min > 0) & (base.demand_min <= 0)):
+            return "demand staffs a shift the template leaves empty"
+        if np.any((variant.contracted > 0) & (base.contracted <= 0)):
+            return "new contracted-hours constraint"
+        if any(
+            (int(i), int(j)) not in self.rest_pairs
+            for i, j in zip(variant.pair_i, variant.pair_j)
+        ):
+            return "rest time longer than the template's"
+        return None
+
+    def instantiate(self, variant):
+        """Patched clone of the template model for `variant`, or None on a structural change"""
+        if self.structural_change(variant) is not None:
+            return None
+        base, handles = self.ctx, self.handles
+        model = self.model.Clone()
+        proto = model.Proto()
+
+        def patch(rule_name, key, lo, hi):
+            if rule_name in handles and key in handles[rule_name]:
+                _set_bounds(proto.constraints[handles[rule_name][key].Index()], lo, hi)
+
+        for e, d, s in np.argwhere(
+            (variant.demand_min != base.demand_min) | (variant.demand_max != base.demand_max)
+        ):
+            key = (base.depts[e], base.days[d], base.slots[s])
+            patch("demand", key, variant.demand_min[e, d, s], variant.demand_max[e, d, s])
+            if variant.demand_min[e, d, s] <= 0:  # shift may now stay empty
+                patch("core_skill_requirement", key, 0, cp_model.INT_MAX)
+                patch("skill_mix_requirement", key, 0, cp_model.INT_MAX)
+
+        if variant.daily_cap != base.daily_cap:
+            for key in handles.get("daily_hours_cap", {}):
+                patch("daily_hours_cap", key, cp_model.INT_MIN, variant.daily_cap)
+        if variant.weekly_cap != base.weekly_cap:
+            for key in handles.get("weekly_hours_cap", {}):
+                patch("weekly_hours_cap", key, cp_model.INT_MIN, variant.weekly_cap)
+        if variant.weekly_rest_days != base.weekly_rest_days:
+            for key in handles.get("weekly_rest_days", {}):
+                patch("weekly_rest_days", key, variant.weekly_rest_days, cp_model.INT_MAX)
+        if variant.min_distinct_skills != base.min_distinct_skills:
+            for e, d, s in np.argwhere(variant.demand_min > 0):
+                key = (base.depts[e], base.days[d], base.slots[s])
+                patch("skill_mix_requirement", key, variant.min_distinct_skills, cp_model.INT_MAX)
+        for n in np.flatnonzero(variant.contracted != base.contracted):
+            if variant.contracted[n] > 0:
+                hours = int(variant.contracted[n])
+                patch("contracted_hours", base.nurse_ids[n], hours, hours)
+            else:
+                patch("contracted_hours", base.nurse_ids[n], cp_model.INT_MIN, cp_model.INT_MAX)
+
+        if "unavailability" in handles:
+            for n, d, s in np.argwhere(variant.unavailable & ~base.unavailable):
+                for v in self.x[n, :, d, s]:
+                    domain = proto.variables[v.Index()].domain
+                    domain.clear()
+                    domain.extend([0, 0])
+            for n, d, s in np.argwhere(base.unavailable & ~variant.unavailable):
+                key = (base.nurse_ids[n], base.days[d], base.slots[s])
+                for ct in handles["unavailability"][key]:
+                    _set_bounds(proto.constraints[ct.Index()], 0, 1)
+
+        if "rest_time_hours" in handles:
+            kept = set(zip(variant.pair_i.tolist(), variant.pair_j.tolist()))
+            relaxed = [p for pair, p in self.rest_pairs.items() if pair not in kept]
+            for nid in base.nurse_ids:
+                for p in relaxed:
+                    patch("rest_time_hours", (nid, p), cp_model.INT_MIN, 2)
+        return model
@@ -0,0 +1,80 @@
+# scenarioOverlays.py — Scenario overlays: small deltas over the shared base data
+
+# An overlay holds only what a scenario changes:
+#   "demand_ops":           list of demand edits, applied in order
+#       {"op": "scale", "factor": f, "days": [...] | None, "slots": [...] | None, "min_only": bool}
+#       {"op": "cell_factors", "factors": {"dept|day|slot": f}}
+#       {"op": "max_to_min"}
+#   "extra_unavailability": {nurse_id: [unavailability strings to append]}
+#   "rule_overrides":       {constraint name: value} merged into rules["constraints"]
+# The base data is never mutated; materialize_scenario copies only what an overlay touches.
+# rostergenerator.py builds its scenarios with these, and buildTrainingData.py
+# rebuilds an archived scenario's inputs from the overlay stored with it.
+
+
+def _scaled_cell(cell, factor, min_only):
+    new_min = max(1, int(cell["min"] * factor))
+    if min_only:
+        return {**cell, "min": new_min}
+    return {**cell, "min": new_min, "max": max(new_min, int(cell["max"] * factor))}
+
+
+def apply_demand_ops(base_demand, demand_ops, days, time_slots):
+    """New demand dict with demand_ops applied; untouched departments/days are shared with the base"""
+    demand = dict(base_demand)
+    copied_depts, copied_days = set(), set()
+
+    def cell_for_write(dept, day):
+        if dept not in copied_depts:
+            demand[dept] = dict(demand[dept])
+            copied_depts.add(dept)
+        if (dept, day) not in copied_days:
+            demand[dept][day] = dict(demand[dept][day])
+            copied_days.add((dept, day))
+        return demand[dept][day]
+
+    for op in demand_ops:
+        for dept in base_demand:
+            for day in days:
+                if day not in base_demand[dept]:
+                    continue
+                for slot in time_slots:
+                    if op["op"] == "scale":
+                        if (op.get("days") and day not in op["days"]) or (op.get("slots") and slot not in op["slots"]):
+                            continue
+                        cells = cell_for_write(dept, day)
+                        cells[slot] = _scaled_cell(cells[slot], op["factor"], op.get("min_only", False))
+                    elif op["op"] == "cell_factors":
+                        factor = op["factors"].get(f"{dept}|{day}|{slot}")
+                        if factor is not None:
+                            cells = cell_for_write(dept, day)
+                            cells[slot] = _scaled_cell(cells[slot], factor, False)
+                    elif op["op"] == "max_to_min":
+                        cells = cell_for_write(dept, day)
+                        cells[slot] = {**cells[slot], "max": cells[slot]["min"]}
+    return demand
+
+
+def materialize_scenario(base, overlay):
+    """(nurses, shift, rules, demand) for an overlay, sharing every untouched object with `base`"""
+    days = base["rules"]["general"]["days"]
+    time_slots = list(base["shift"]["SHIFT_HOURS"].keys())
+
+    nurses = base["nurses"]
+    extra = overlay.get("extra_unavailability") or {}
+    if extra:
+        nurses = [
+            {**n, "unavailability": list(n["unavailability"]) + extra[n["nurse_id"]]}
+            if n["nurse_id"] in extra else n
+            for n in nurses
+        ]
+
+    rules = base["rules"]
+    if overlay.get("rule_overrides"):
+        rules = {**rules, "constraints": {**rules["constraints"], **overlay["rule_overrides"]}}
+
+    demand = base["demand"]
+    if overlay.get("demand_ops"):
+        demand = apply_demand_ops(demand, overlay["demand_ops"], days, time_slots)
+
+    return nurses, base["shift"], rules, demand
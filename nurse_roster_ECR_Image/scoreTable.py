@@ -0,0 +1,114 @@
+# scoreTable.py — Precomputed lookup table of model scores over the whole feature space
+import os
+import argparse
+import itertools
+
+import numpy as np
+
+from treeEvaluator import compile_model
+
+# A tree ensemble only ever compares feature j against its own split
+# thresholds t_1 < ... < t_k, so every value of feature j falls into one of
+# k + 1 buckets and all values in a bucket score the same. The features in
+# build_features are small integers/flags the models split on a handful of
+# times, so the product of bucket counts is small (55k cells for the
+# SageMaker model, 295k for nurse_roster_ranker) and the whole space can be
+# scored once. A lookup is then one searchsorted per feature and an index
+# into a flat float32 table, exact for any input (not just the current
+# nurses). Tables are cached on disk keyed by TreeEnsemble.digest().
+
+# ---- Config ----
+MAX_TABLE_CELLS = 4_000_000
+
+
+class ScoreTable:
+    """Dense score table indexed by per-feature threshold buckets"""
+
+    def __init__(self, edges, table, model_digest):
+        self.edges = [np.asarray(e, dtype=np.float32) for e in edges]
+        self.shape = tuple(len(e) + 1 for e in self.edges)
+        self.table = np.asarray(table, dtype=np.float32).reshape(self.shape)
+        self.flat = self.table.ravel()
+        self.strides = np.array(
+            [int(np.prod(self.shape[j + 1:])) for j in range(len(self.shape))], dtype=np.int64
+        )
+        self.model_digest = model_digest
+
+    @classmethod
+    def build(cls, ensemble, num_features=None):
+        """Score every bucket combination of `ensemble` once"""
+        num_features = num_features or int(ensemble.feature.max()) + 1
+        if ensemble.feature_names:
+            num_features = max(num_features, len(ensemble.feature_names))
+        edges = [ensemble.split_thresholds(j) for j in range(num_features)]
+        cells = int(np.prod([len(e) + 1 for e in edges]))
+        if cells > MAX_TABLE_CELLS:
+            raise ValueError(f"score table would need {cells} cells (limit {MAX_TABLE_CELLS})")
+
+        # One representative value per bucket: below the first threshold, then each threshold
+        values = [np.concatenate([[e[0] - 1] if len(e) else [0.0], e]) for e in edges]
+        grid = np.array(list(itertools.product(*values)), dtype=np.float32)
+        return cls(edges, ensemble.predict(grid), ensemble.digest())
+
+    def index(self, X):
+        """Flat table index of each row of a (rows, features) matrix"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        idx = np.zeros(len(X), dtype=np.int64)
+        for j, e in enumerate(self.edges):
+            if len(e):
+                idx += np.searchsorted(e, X[:, j], side="right") * self.strides[j]
+        return idx
+
+    def lookup(self, X):
+        """Scores of a (rows, features) matrix, equal to ensemble.predict(X)"""
+        return self.flat[self.index(X)]
+
+    def score(self, features):
+        """Score of one build_features dict (feature order as built)"""
+        return float(self.lookup(np.fromiter(features.values(), dtype=np.float32))[0])
+
+    def save(self, path):
+        np.savez(
+            path,
+            table=self.table,
+            model_digest=np.array(self.model_digest),
+            **{f"edges_{j}": e for j, e in enumerate(self.edges)},
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            edges = [data[f"edges_{j}"] for j in range(data["table"].ndim)]
+            return cls(edges, data["table"], str(data["model_digest"]))
+
+
+def load_or_build(ensemble, path=None):
+    """Cached table for `ensemble`; rebuilt (and re-cached) when the model hash differs"""
+    digest = ensemble.digest()
+    if path and os.path.exists(path):
+        table = ScoreTable.load(path)
+        if table.model_digest == digest:
+            return table
+    table = ScoreTable.build(ensemble)
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        table.save(path)
+    return table
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Precompute the score lookup table of a roster model"
+    )
+    parser.add_argument("model", help="model.tar.gz, model JSON or compiled .npz")
+    parser.add_argument("-o", "--out", default="data/score_table.npz")
+    args = parser.parse_args()
+
+    table = load_or_build(compile_model(args.model), args.out)
+    print(
+        f"✅ Score table {'x'.join(str(n) for n in table.shape)} "
+        f"({table.flat.size} cells, model {table.model_digest[:12]}) -> {args.out}"
+    )
@@ -0,0 +1,219 @@
+# treeEvaluator.py — XGBoost tree ensembles compiled to flat NumPy arrays
+import os
+import json
+import hashlib
+import tarfile
+import argparse
+import tempfile
+
+import numpy as np
+
+# The roster models are small gbtree ensembles over 15 dense integer
+# features, so scoring does not need xgboost: compile_model() flattens every
+# tree into shared node arrays, and TreeEnsemble.predict() walks all rows
+# through all trees at once with NumPy indexing. Feature rows repeat a lot,
+# so a batch is first reduced to its distinct rows and each one is scored
+# once. A compiled ensemble is saved as .npz and loads without
+# importing xgboost at all.
+#
+# Predictions equal Booster.predict(): the ranking objectives and
+# reg:squarederror use the identity link, so the margin is the prediction.
+
+# ---- Config ----
+MODEL_MEMBER = "xgboost-model"
+IDENTITY_OBJECTIVES = {"rank:pairwise", "rank:ndcg", "rank:map", "reg:squarederror"}
+PREDICT_CHUNK_ROWS = 65536
+DEDUP_MIN_ROWS = 256
+
+
+class TreeEnsemble:
+    """Flat node arrays of a gbtree model; child indices are global, leaves point at themselves"""
+
+    def __init__(self, left, right, feature, threshold, default_left, value, roots, base_score,
+                 feature_names=None):
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.base_score = float(base_score)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.max_depth = self._depth()
+        # children[2 * node] = left, children[2 * node + 1] = right
+        self.children = np.stack([self.left, self.right], axis=1).ravel()
+
+    def _depth(self):
+        """Longest root-to-leaf path, i.e. how many steps predict() has to take"""
+        depth = np.zeros(len(self.left), dtype=np.int32)
+        # Children always come after their parent inside a tree
+        for node in range(len(self.left)):
+            if self.left[node] != node:
+                depth[self.left[node]] = depth[node] + 1
+                depth[self.right[node]] = depth[node] + 1
+        return int(depth.max()) if len(depth) else 0
+
+    @property
+    def num_trees(self):
+        return len(self.roots)
+
+    def digest(self):
+        """Content hash of the compiled trees; identical models hash alike whatever file they came from"""
+        h = hashlib.sha1()
+        for arr in (self.left, self.right, self.feature, self.threshold, self.default_left, self.value, self.roots):
+            h.update(np.ascontiguousarray(arr).tobytes())
+        h.update(repr(self.base_score).encode())
+        return h.hexdigest()
+
+    def split_thresholds(self, feature):
+        """Sorted distinct thresholds the trees split `feature` on"""
+        internal = self.left != np.arange(len(self.left))
+        return np.unique(self.threshold[internal & (self.feature == feature)])
+
+    def predict(self, X):
+        """Scores for a (rows, features) matrix; NaN takes each split's default branch"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if len(X) <= DEDUP_MIN_ROWS:
+            return self._walk(X)
+        rows = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+        return self._walk(X[first])[inverse.ravel()]
+
+    def _walk(self, X):
+        out = np.empty(len(X), dtype=np.float32)
+        has_nan = bool(np.isnan(X).any())
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            chunk = X[start:start + PREDICT_CHUNK_ROWS]
+            flat = chunk.ravel()
+            row_offset = (np.arange(len(chunk), dtype=np.int64) * chunk.shape[1])[:, None]
+            node = np.broadcast_to(self.roots, (len(chunk), self.num_trees)).copy()
+            for _ in range(self.max_depth):
+                x = flat[row_offset + self.feature[node]]
+                go_right = x >= self.threshold[node]
+                if has_nan:
+                    missing = np.isnan(x)
+                    go_right[missing] = ~self.default_left[node][missing]
+                node = self.children[2 * node + go_right]
+            out[start:start + len(chunk)] = self.value[node].sum(axis=1, dtype=np.float32)
+        return out + np.float32(self.base_score)
+
+    def save(self, path):
+        np.savez(
+            path,
+            left=self.left,
+            right=self.right,
+            feature=self.feature,
+            threshold=self.threshold,
+            default_left=self.default_left,
+            value=self.value,
+            roots=self.roots,
+            base_score=np.float64(self.base_score),
+            feature_names=np.array(self.feature_names or [], dtype=str),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            names = [str(n) for n in data["feature_names"]]
+            return cls(
+                data["left"],
+                data["right"],
+                data["feature"],
+                data["threshold"],
+                data["default_left"],
+                data["value"],
+                data["roots"],
+                float(data["base_score"]),
+                feature_names=names or None,
+            )
+
+
+# ---- Export ----
+def _parse_base_score(raw):
+    # "5E-1" in older models, "[5E-1]" (vector intercept) in newer ones
+    return float(str(raw).strip("[]").split(",")[0])
+
+
+def from_model_json(model):
+    """Compile the parsed JSON of a saved XGBoost model (Booster.save_raw("json"))"""
+    learner = model["learner"]
+    objective = learner["objective"]["name"]
+    if objective not in IDENTITY_OBJECTIVES:
+        raise ValueError(f"objective {objective} has a non-identity link; not supported")
+    booster = learner["gradient_booster"]
+    if booster["name"] != "gbtree":
+        raise ValueError(f"booster {booster['name']} not supported")
+
+    left, right, feature, threshold, default_left, value, roots = [], [], [], [], [], [], []
+    for tree in booster["model"]["trees"]:
+        if any(tree.get("split_type", [])):
+            raise ValueError("categorical splits are not supported")
+        offset = len(left)
+        roots.append(offset)
+        for i, (lc, rc) in enumerate(zip(tree["left_children"], tree["right_children"])):
+            is_leaf = lc == -1
+            left.append(offset + i if is_leaf else offset + lc)
+            right.append(offset + i if is_leaf else offset + rc)
+            feature.append(0 if is_leaf else tree["split_indices"][i])
+            # split_conditions holds the leaf value on leaf nodes
+            threshold.append(np.inf if is_leaf else tree["split_conditions"][i])
+            value.append(tree["split_conditions"][i] if is_leaf else 0.0)
+            default_left.append(bool(tree["default_left"][i]))
+    return TreeEnsemble(
+        left, right, feature, threshold, default_left, value, roots,
+        _parse_base_score(learner["learner_model_param"]["base_score"]),
+        feature_names=learner.get("feature_names") or None,
+    )
+
+
+def from_booster(booster):
+    return from_model_json(json.loads(booster.save_raw("json")))
+
+
+def _load_with_xgboost(model_file):
+    # Binary/UBJSON artifacts (the SageMaker tarball) need xgboost to decode
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(model_file)
+    return from_booster(booster)
+
+
+def compile_model(source):
+    """TreeEnsemble from a Booster, a JSON model file, a model.tar.gz or a compiled .npz"""
+    if not isinstance(source, (str, os.PathLike)):
+        return from_booster(source)
+    path = os.fspath(source)
+    if path.endswith(".npz"):
+        return TreeEnsemble.load(path)
+    if path.endswith((".tar.gz", ".tgz")):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with tarfile.open(path) as tar:
+                tar.extractall(path=tmpdir)
+            members = os.listdir(tmpdir)
+            name = MODEL_MEMBER if MODEL_MEMBER in members else members[0]
+            return compile_model(os.path.join(tmpdir, name))
+    if path.endswith(".json"):
+        with open(path) as f:
+            return from_model_json(json.load(f))
+    return _load_with_xgboost(path)
+
+
+# ---- CLI Entrypoint ----
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile an XGBoost model (tar.gz / json / binary) into a NumPy .npz ensemble"
+    )
+    parser.add_argument("model", help="model.tar.gz, model JSON or xgboost binary model")
+    parser.add_argument("-o", "--out", default="data/model_trees.npz")
+    args = parser.parse_args()
+
+    ensemble = compile_model(args.model)
+    ensemble.save(args.out)
+    print(
+        f"✅ Compiled {ensemble.num_trees} trees ({len(ensemble.left)} nodes, depth {ensemble.max_depth}) "
+        f"-> {args.out}"
+    )
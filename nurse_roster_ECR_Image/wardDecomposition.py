@@ -0,0 +1,287 @@
+# wardDecomposition.py — Per-ward CP-SAT models coordinated by a float-pool master problem
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from ortools.sat.python import cp_model
+
+from rosterRules import RosterState, RuleContext, active_rules, add_hard_constraints, assignment_vars
+from candidatePruning import home_departments
+
+# One CP model over every (nurse, dept, day, slot) grows with the whole
+# hospital. Here each nurse belongs to one ward (department) for the week:
+#   - home nurses: the record's "home_department", else the balanced
+#     core-skill homes of candidatePruning.home_departments;
+#   - float pool: nurses flagged "float_pool", else the FLOAT_POOL_SHARE most
+#     versatile nurses (core skill of the most wards). A small master CP model
+#     places each of them in exactly one ward.
+# With every nurse in one ward, all per-nurse rules (hours, contract, rest,
+# unavailability) are local to a ward, so each ward is solved as its own
+# model over its own nurses, in parallel. The only cross-ward rule,
+# department_balance, is met by fixing each day-slot to a band {m, m+1} that
+# every ward's demand allows (the lowest one with room for the contracted
+# hours) and tightening the ward demand to it.
+#
+# Ward models keep coverage elastic: demand minimum, core skill and skill mix
+# get slack variables penalised per uncovered shift hour, so a short ward
+# reports how short it is instead of just "infeasible". Each round the
+# shortfall raises the ward's price (a subgradient step on the coverage
+# multiplier) and its estimated need in the master to more than the capacity
+# it just failed with (a cut), so the master moves float nurses towards the
+# priced wards. Only wards whose nurse set changed are
+# re-solved. Stops when every ward is covered, or when the master keeps the
+# same placement (or runs out of rounds) with wards still short; then None
+# is returned so the caller can fall back to one model.
+
+# ---- Config ----
+FLOAT_POOL_SHARE = 0.2
+WARD_TIME_LIMIT = 60
+SHORTFALL_PENALTY = 100000  # per uncovered shift hour; above any assignment score
+MASTER_TIME_LIMIT = 10
+PRICE_SCALE = 10  # master: uncovered hours * price outweigh skill fit / stay bonuses
+
+
+# ---- Partition ----
+def float_pool(ctx, share=FLOAT_POOL_SHARE):
+    """Boolean (nurse,) mask of the float pool"""
+    flagged = np.array([bool(n.get("float_pool")) for n in ctx.nurses], dtype=bool)
+    if flagged.any():
+        return flagged
+    pool = np.zeros(len(ctx.nurse_ids), dtype=bool)
+    versatile = np.argsort(-ctx.core_mask.sum(axis=1), kind="stable")
+    pool[versatile[: int(round(share * len(pool)))]] = True
+    return pool
+
+
+def home_wards(ctx, pool, nurse_scores):
+    """Ward index of every nurse (-1 for the float pool)"""
+    homes = home_departments(ctx, nurse_scores).argmax(axis=1)
+    for n, nurse in enumerate(ctx.nurses):
+        dept = nurse.get("home_department")
+        if dept in ctx.dept_pos:
+            homes[n] = ctx.dept_pos[dept]
+    return np.where(pool, -1, homes)
+
+
+def balance_band(ctx, committed=0):
+    """(lo, hi) ward demand bounds, tightened so department_balance holds across wards.
+
+    Each day-slot gets the band {m, m+1}; m starts at the lowest level every
+    ward's demand allows and is raised one step at a time until the wards'
+    maximum hours fit the `committed` contracted hours.
+    """
+    lo, hi = ctx.demand_min.copy(), ctx.demand_max.copy()
+    if not any(rule.name == "department_balance" for rule in active_rules(ctx)) or len(ctx.depts) < 2:
+        return lo, hi
+    base = np.maximum(ctx.demand_min.max(axis=0) - 1, 0)  # (day, slot)
+    for step in range(int(ctx.demand_max.max()) + 1):
+        m = base + step
+        band_lo, band_hi = np.maximum(lo, m), np.minimum(hi, m + 1)
+        ok = (band_lo <= band_hi).all(axis=0)
+        band_lo, band_hi = np.where(ok, band_lo, lo), np.where(ok, band_hi, hi)
+        if (band_hi * ctx.hours).sum() >= committed:
+            if not ok.all():
+                print(f"⚠️ No balanced staffing level fits every ward on {int((~ok).sum())} day-slots")
+            return band_lo, band_hi
+    print("⚠️ No balanced staffing level fits the contracted hours, keeping ward demand as is")
+    return lo, hi
+
+
+# ---- Master problem ----
+def nurse_capacity(ctx):
+    """Hours each nurse can work in a week: the contract if any, else the weekly cap"""
+    return np.where(ctx.contracted > 0, ctx.contracted, ctx.weekly_cap).astype(int)
+
+
+def allocate_pool(ctx, pool_idx, homes, need, room, prices, previous=None):
+    """Ward of every float-pool nurse, or None if no placement fits the contracts.
+
+    Minimises priced uncovered hours (need minus nurse capacity) per ward, with
+    each ward's contracted hours within its demand maximum; ties go to core-skill
+    wards and to the previous placement.
+    """
+    E = len(ctx.depts)
+    capacity = nurse_capacity(ctx)
+    committed = np.maximum(ctx.contracted, 0).astype(int)
+    model = cp_model.CpModel()
+    y = np.array(
+        [[model.NewBoolVar(f"float_{ctx.nurse_ids[n]}_{dept}") for dept in ctx.depts] for n in pool_idx],
+        dtype=object,
+    ).reshape(len(pool_idx), E)
+    for row in y:
+        model.AddExactlyOne(list(row))
+
+    cost = []
+    for e, dept in enumerate(ctx.depts):
+        home = homes == e
+        model.Add(
+            int(committed[home].sum()) + cp_model.LinearExpr.WeightedSum(list(y[:, e]), committed[pool_idx].tolist())
+            <= int(room[e])
+        )
+        uncovered = model.NewIntVar(0, max(int(need[e]), 0), f"uncovered_{dept}")
+        model.Add(
+            uncovered
+            + int(capacity[home].sum())
+            + cp_model.LinearExpr.WeightedSum(list(y[:, e]), capacity[pool_idx].tolist())
+            >= int(need[e])
+        )
+        cost.append(PRICE_SCALE * int(prices[e]) * uncovered)
+    for f, n in enumerate(pool_idx):
+        for e in range(E):
+            bonus = int(ctx.core_mask[n, e]) + int(previous is not None and previous[f] == e)
+            if bonus:
+                cost.append(-bonus * y[f, e])
+    model.Minimize(cp_model.LinearExpr.Sum(cost))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = MASTER_TIME_LIMIT
+    status = solver.Solve(model)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None
+    return np.array([[solver.Value(v) for v in row] for row in y], dtype=int).reshape(-1, E).argmax(axis=1)
+
+
+# ---- Ward subproblems ----
+def elastic_coverage(ctx, model, handles):
+    """Add slack to the demand-minimum, core-skill and skill-mix constraints.
+
+    Returns [(slack var, hours)] so the caller can price the uncovered hours.
+    """
+    slacks = []
+    for rule_name, size in (
+        ("demand", None),
+        ("core_skill_requirement", 1),
+        ("skill_mix_requirement", ctx.min_distinct_skills),
+    ):
+        for (dept, day, slot), ct in handles.get(rule_name, {}).items():
+            e, d, s = ctx.dept_pos[dept], ctx.day_pos[day], ctx.slot_pos[slot]
+            ub = int(ctx.demand_min[e, d, s]) if size is None else size
+            if ub <= 0:
+                continue
+            slack = model.NewIntVar(0, ub, f"short_{rule_name}_{dept}_{day}_{slot}")
+            linear = model.Proto().constraints[ct.Index()].linear
+            linear.vars.append(slack.Index())
+            linear.coeffs.append(1)
+            slacks.append((slack, int(ctx.hours[s])))
+    return slacks
+
+
+def _solve_ward(job):
+    """Solve one ward; returns {"ward", "status", "X" (member, day, slot), "shortfall" hours}"""
+    nurses, shift_def, rules, demand = job["inputs"]
+    ctx = RuleContext(nurses, shift_def, rules, demand)
+    ctx.demand_min[:] = job["lo"]
+    ctx.demand_max[:] = job["hi"]
+
+    model = cp_model.CpModel()
+    x, _ = assignment_vars(ctx, model)
+    handles = add_hard_constraints(ctx, model, x)
+    slacks = elastic_coverage(ctx, model, handles)
+    objective = job["objective"]
+    model.Maximize(
+        cp_model.LinearExpr.WeightedSum(list(x.ravel()), [int(c) for c in objective.ravel()])
+        - cp_model.LinearExpr.WeightedSum([v for v, _ in slacks], [SHORTFALL_PENALTY * h for _, h in slacks])
+    )
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = job["time_limit"]
+    solver.parameters.num_workers = job["num_workers"]
+    status = solver.Solve(model)
+    result = {"ward": job["ward"], "status": status, "X": None, "shortfall": max(job["need"], 1)}
+    if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        result["X"] = np.array([solver.Value(v) for v in x.ravel()], dtype=bool).reshape(ctx.shape)[:, 0]
+        result["shortfall"] = sum(solver.Value(v) * h for v, h in slacks)
+    return result
+
+
+def _ward_job(ctx, e, members, lo, hi, objective, need, time_limit, num_workers):
+    dept = ctx.depts[e]
+    general = ctx.rules["general"]
+    core = general.get("core_skill", {})
+    rules = {
+        **ctx.rules,
+        "general": {**general, "departments": [dept], "core_skill": {dept: core[dept]} if dept in core else {}},
+    }
+    return {
+        "ward": e,
+        "inputs": ([ctx.nurses[n] for n in members], ctx.shift_def, rules, {dept: ctx.demand[dept]}),
+        "lo": lo[e : e + 1],
+        "hi": hi[e : e + 1],
+        "objective": objective[members][:, e : e + 1],
+        "need": int(need[e]),
+        "time_limit": time_limit,
+        "num_workers": num_workers,
+    }
+
+
+# ---- Coordination ----
+def solve_by_ward(ctx, objective, iterations, time_limit=WARD_TIME_LIMIT, workers=None):
+    """Roster as a boolean (nurse, dept, day, slot) array, solved ward by ward.
+
+    `objective` is the integer per-assignment weight grid of ctx.shape.
+    Returns None if some ward is still uncovered after `iterations` + 1 rounds,
+    or if the merged roster breaks a hard rule.
+    """
+    N, E, D, S = ctx.shape
+    pool = float_pool(ctx)
+    homes = home_wards(ctx, pool, objective.max(axis=(1, 2, 3)))
+    pool_idx = np.flatnonzero(pool)
+    lo, hi = balance_band(ctx, int(np.maximum(ctx.contracted, 0).sum()))
+    need = (lo * ctx.hours).sum(axis=(1, 2)).astype(int)
+    room = (hi * ctx.hours).sum(axis=(1, 2)).astype(int)
+    capacity = nurse_capacity(ctx)
+    print(f"🏥 {E} wards, {N - len(pool_idx)} home nurses, {len(pool_idx)} in the float pool")
+
+    workers = min(workers or os.cpu_count() or 1, E)
+    num_workers = max(1, (os.cpu_count() or 1) // workers)
+    prices = np.ones(E, dtype=int)
+    extra = np.zeros(E, dtype=int)
+    previous = None
+    solved = {}  # (ward, member ids) -> ward result
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for round_ in range(iterations + 1):
+            placement = allocate_pool(ctx, pool_idx, homes, need + extra, room, prices, previous)
+            if placement is None:
+                print("❌ Float pool cannot be placed within the wards' demand maximum")
+                return None
+            wards = homes.copy()
+            wards[pool_idx] = placement
+            members = [np.flatnonzero(wards == e) for e in range(E)]
+            keys = [(e, tuple(m.tolist())) for e, m in enumerate(members)]
+            jobs = [
+                _ward_job(ctx, e, members[e], lo, hi, objective, need, time_limit, num_workers)
+                for e, key in enumerate(keys)
+                if key not in solved
+            ]
+            for job, result in zip(jobs, executor.map(_solve_ward, jobs)):
+                solved[keys[job["ward"]]] = result
+            results = [solved[key] for key in keys]
+            shortfall = np.array([r["shortfall"] for r in results], dtype=int)
+            moved = 0 if previous is None else int((placement != previous).sum())
+            print(
+                f"🔁 Round {round_}: re-solved {len(jobs)} wards, {moved} float nurses moved, "
+                f"{int(shortfall.sum())} uncovered shift hours"
+            )
+            if not shortfall.any() or (previous is not None and moved == 0):
+                break
+            # The nurses a short ward had were not enough: it needs more capacity than that
+            held = np.array([capacity[m].sum() for m in members], dtype=int)
+            short = shortfall > 0
+            extra[short] = np.maximum(extra[short], held[short] - need[short] + shortfall[short])
+            prices += shortfall
+            previous = placement
+    if shortfall.any():
+        short = [ctx.depts[e] for e in np.flatnonzero(shortfall)]
+        print(f"⚠️ Wards still uncovered after {round_ + 1} rounds: {', '.join(short)}")
+        return None
+
+    X = np.zeros(ctx.shape, dtype=bool)
+    for e, result in enumerate(results):
+        X[members[e], e] = result["X"]
+    state = RosterState(ctx, X.astype(np.int64))
+    broken = [rule.name for rule in active_rules(ctx) if rule.violations(ctx, state).any()]
+    if broken:
+        print(f"⚠️ Merged ward rosters break {', '.join(broken)}")
+        return None
+    print(f"✅ All {E} wards covered after {round_ + 1} rounds")
+    return X
@@ -0,0 +1,479 @@
+# weeklyPatterns.py — Column generation over weekly shift patterns, one pattern per nurse
+import math
+import time
+
+import numpy as np
+from ortools.linear_solver import pywraplp
+from ortools.sat.python import cp_model
+
+from rosterRules import RosterState, RuleContext, active_rules, assignment_vars, nurse_rules, shift_rules
+
+# Most hard rules (daily/weekly caps, contract, one slot at a time,
+# unavailability, rest days, rest time) only look at one nurse's own week.
+# Here they are moved out of the roster model into the columns: a pattern is
+# one nurse's whole week, a boolean (dept, day, slot) array that already
+# satisfies every per-nurse rule. The master chooses one pattern per nurse
+# subject to the remaining shift rules (demand, core skill, skill mix,
+# department balance), so it has one variable per pattern and none of the
+# per-nurse constraints.
+#
+# Patterns are priced out rather than enumerated (a 44h contract alone has
+# tens of thousands of weeks):
+#   1. LP master (GLOP) over the patterns found so far; every coverage row
+#      has a penalised slack so it is feasible from the first round;
+#   2. pricing: per nurse, a small CP model over that nurse's cells with the
+#      per-nurse rules from rosterRules.py, maximising score minus the
+#      duals of the rows each cell appears in; patterns with positive
+#      reduced cost join the pool;
+#   3. repeat until no nurse prices out (ROOT_MAX_ROUNDS is only a safety cap;
+#      the root normally converges in a few dozen rounds);
+#   4. dive: fix batches of nurses to their heaviest LP pattern and re-price
+#      the rest, until every nurse is fixed (the LP alone is fractional for
+#      most nurses, and the integer master rarely finds a first roster
+#      unaided). If fixing loses coverage, or time runs out, the last few
+#      fixed nurses and the unfixed ones are solved together as one small
+#      CP model instead;
+#   5. solve the master as a CP model over the whole pool, hinted with the
+#      dive's roster, with the shift rules from rosterRules.py applied to
+#      x[n, e, d, s] = sum of the chosen patterns covering that cell.
+# All steps share one deadline: the root pricing (1-3) gets ROOT_SHARE of the
+# time limit, diving runs until MASTER_SHARE of it is left, and completion
+# and the master split the rest.
+# Only generated patterns are ever combined, so this can fail where the full
+# model would not; the caller then falls back to the full model.
+
+# ---- Config ----
+PRICING_TIME_LIMIT = 5  # per pricing solve, capped by the deadline
+TIME_LIMIT = 300
+ROOT_MAX_ROUNDS = 1000  # safety cap on root pricing rounds; the root deadline normally ends it first
+ROOT_SHARE = 0.4  # of the time limit, for pricing the root LP
+MASTER_SHARE = 0.3  # of the time limit, kept for completing and polishing the dive's roster
+ELASTIC_PENALTY = 1e6  # LP cost per unit of a violated coverage row; above any pattern score
+MIN_REDUCED_COST = 0.5  # objective units (score * 1000)
+DIVE_ROUNDS = 5  # pricing rounds after each fixing step
+DIVE_MIN_WEIGHT = 0.5  # nurses whose heaviest pattern has this LP weight are fixed together
+DIVE_FIX_FRACTION = 0.1  # of all nurses, fixed at least per step (heaviest first)
+RELEASE_NURSES = 4  # fixed nurses re-opened when diving loses coverage
+
+
+def _remaining(deadline, cap=None):
+    """Seconds left until `deadline` (time.time() value), at most `cap`"""
+    left = max(0.0, deadline - time.time())
+    return left if cap is None else min(cap, left)
+
+
+# ---- Pricing ----
+class PatternPricer:
+    """One small CP model per nurse over its own (dept, day, slot) cells and the per-nurse rules"""
+
+    def __init__(self, ctx):
+        self.models = []
+        for nurse in ctx.nurses:
+            sub = RuleContext([nurse], ctx.shift_def, ctx.rules, ctx.demand)
+            model = cp_model.CpModel()
+            x, _ = assignment_vars(sub, model)
+            for rule in nurse_rules(sub):
+                rule.add_constraints(sub, model, x)
+            self.models.append((model, x[0]))
+
+    def price(self, n, weights, deadline=None):
+        """Best (dept, day, slot) pattern of nurse `n` for the given cell weights; None if it has none"""
+        model, x = self.models[n]
+        model.Maximize(
+            cp_model.LinearExpr.WeightedSum(list(x.ravel()), [int(round(w)) for w in weights.ravel()])
+        )
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = (
+            PRICING_TIME_LIMIT if deadline is None else _remaining(deadline, PRICING_TIME_LIMIT)
+        )
+        status = solver.Solve(model)
+        if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            return None
+        return np.array([solver.Value(v) for v in x.ravel()], dtype=bool).reshape(x.shape)
+
+
+class PatternPool:
+    """Generated patterns: nurse index, (dept, day, slot) cells and score of each"""
+
+    def __init__(self, objective):
+        self.objective = objective
+        self.nurse = []
+        self.patterns = []
+        self.values = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def add(self, n, pattern):
+        """Add a pattern unless the nurse already has it; returns True if added"""
+        key = (n, pattern.tobytes())
+        if key in self._index:
+            return False
+        self._index[key] = len(self.patterns)
+        self.nurse.append(n)
+        self.patterns.append(pattern)
+        self.values.append(int((self.objective[n] * pattern).sum()))
+        return True
+
+    def index(self, n, pattern):
+        """Index of a nurse's pattern, added first if new"""
+        self.add(n, pattern)
+        return self._index[(n, pattern.tobytes())]
+
+    def cells(self, j):
+        return np.argwhere(self.patterns[j])
+
+
+# ---- LP master ----
+def _balance_signs(ctx):
+    """(pair, dept) matrix: +1 for the pair's first department, -1 for its second"""
+    signs = np.zeros((len(ctx.dept_pairs), len(ctx.depts)))
+    for q, (i, j) in enumerate(ctx.dept_pairs):
+        signs[q, i], signs[q, j] = 1, -1
+    return signs
+
+
+def solve_lp(ctx, pool, fixed=None):
+    """LP relaxation of the master over the pool: (pattern values, duals, objective, uncovered).
+
+    `fixed` maps nurse index -> the only pattern that nurse may take.
+    `uncovered` is the total slack of the coverage rows (0 if the LP is feasible).
+    """
+    fixed = fixed or {}
+    E, D, S = ctx.shape[1:]
+    K = len(ctx.skills)
+    active = {rule.name for rule in shift_rules(ctx)}
+    staffed = ctx.demand_min > 0
+    signs = _balance_signs(ctx)
+
+    lp = pywraplp.Solver.CreateSolver("GLOP")
+    objective = lp.Objective()
+    objective.SetMaximization()
+
+    slacks = []
+
+    def elastic(row, sign):
+        slack = lp.NumVar(0, lp.infinity(), "")
+        row.SetCoefficient(slack, sign)
+        objective.SetCoefficient(slack, -ELASTIC_PENALTY)
+        slacks.append(slack)
+
+    convexity = [lp.Constraint(1, 1) for _ in ctx.nurse_ids]
+    demand, core, link, balance = {}, {}, {}, {}
+    if "demand" in active:
+        for e, d, s in np.ndindex(E, D, S):
+            row = lp.Constraint(int(ctx.demand_min[e, d, s]), int(ctx.demand_max[e, d, s]))
+            elastic(row, 1)
+            elastic(row, -1)
+            demand[e, d, s] = row
+    if "core_skill_requirement" in active:
+        for e, d, s in np.argwhere(staffed):
+            row = lp.Constraint(1, lp.infinity())
+            elastic(row, 1)
+            core[e, d, s] = row
+    if "skill_mix_requirement" in active:
+        for e, d, s in np.argwhere(staffed):
+            count = lp.Constraint(ctx.min_distinct_skills, lp.infinity())
+            elastic(count, 1)
+            for k in np.flatnonzero(ctx.skill_matrix.any(axis=0)):
+                present = lp.NumVar(0, 1, "")
+                count.SetCoefficient(present, 1)
+                row = lp.Constraint(-lp.infinity(), 0)
+                row.SetCoefficient(present, 1)
+                link[e, d, s, k] = row
+    if "department_balance" in active:
+        for q, d, s in np.ndindex(len(ctx.dept_pairs), D, S):
+            row = lp.Constraint(-1, 1)
+            elastic(row, 1)
+            elastic(row, -1)
+            balance[q, d, s] = row
+
+    lam = [None] * len(pool)
+    for j, n in enumerate(pool.nurse):
+        if fixed.get(n, j) != j:
+            continue
+        # No upper bound: convexity already caps it, and a bound would absorb the reduced cost
+        v = lp.NumVar(0, lp.infinity(), "")
+        objective.SetCoefficient(v, pool.values[j])
+        convexity[n].SetCoefficient(v, 1)
+        for e, d, s in pool.cells(j):
+            if demand:
+                demand[e, d, s].SetCoefficient(v, 1)
+            if ctx.core_mask[n, e] and (e, d, s) in core:
+                core[e, d, s].SetCoefficient(v, 1)
+            for k in np.flatnonzero(ctx.skill_matrix[n]):
+                if (e, d, s, k) in link:
+                    link[e, d, s, k].SetCoefficient(v, -1)
+            for q in np.flatnonzero(signs[:, e]):
+                if balance:
+                    balance[q, d, s].SetCoefficient(v, signs[q, e])
+        lam[j] = v
+
+    if lp.Solve() != pywraplp.Solver.OPTIMAL:
+        return None
+
+    def duals(rows, shape):
+        out = np.zeros(shape)
+        for idx, row in rows.items():
+            out[idx] = row.dual_value()
+        return out
+
+    return (
+        np.array([0.0 if v is None else v.solution_value() for v in lam]),
+        {
+            "convexity": np.array([row.dual_value() for row in convexity]),
+            "demand": duals(demand, (E, D, S)),
+            "core": duals(core, (E, D, S)),
+            "link": duals(link, (E, D, S, K)),
+            "balance": duals(balance, (len(ctx.dept_pairs), D, S)),
+        },
+        objective.Value(),
+        sum(slack.solution_value() for slack in slacks),
+    )
+
+
+def reduced_weights(ctx, objective, duals):
+    """Per-cell (nurse, dept, day, slot) weight whose pattern sum minus the convexity dual is the reduced cost"""
+    return (
+        objective
+        - duals["demand"][None]
+        - ctx.core_mask[:, :, None, None] * duals["core"][None]
+        + np.einsum("nk,edsk->neds", ctx.skill_matrix.astype(float), duals["link"])
+        - np.einsum("qe,qds->eds", _balance_signs(ctx), duals["balance"])[None]
+    )
+
+
+# ---- Integer master ----
+def _roster(ctx, pool, chosen):
+    """Boolean (nurse, dept, day, slot) roster of one chosen pattern index per nurse"""
+    X = np.zeros(ctx.shape, dtype=bool)
+    for n, j in enumerate(chosen):
+        X[n] = pool.patterns[j]
+    return X
+
+
+def solve_master(ctx, pool, start=None, time_limit=TIME_LIMIT * MASTER_SHARE):
+    """One pattern per nurse under the shift rules; chosen pattern index per nurse, or None.
+
+    `start` (a chosen pattern per nurse, e.g. from dive()) is passed as a hint.
+    """
+    model = cp_model.CpModel()
+    lam = [model.NewBoolVar(f"pattern_{ctx.nurse_ids[n]}_{j}") for j, n in enumerate(pool.nurse)]
+    by_nurse = [[] for _ in ctx.nurse_ids]
+    for j, n in enumerate(pool.nurse):
+        by_nurse[n].append(j)
+    for columns in by_nurse:
+        model.AddExactlyOne([lam[j] for j in columns])
+
+    # x[n, e, d, s] as the sum of the nurse's patterns covering the cell
+    covering = {}
+    for j, n in enumerate(pool.nurse):
+        for e, d, s in pool.cells(j):
+            covering.setdefault((n, e, d, s), []).append(lam[j])
+    x = np.full(ctx.shape, model.NewConstant(0), dtype=object)
+    for idx, vars_ in covering.items():
+        x[idx] = cp_model.LinearExpr.Sum(vars_)
+    for rule in shift_rules(ctx):
+        rule.add_constraints(ctx, model, x)
+    model.Maximize(cp_model.LinearExpr.WeightedSum(lam, pool.values))
+
+    if start is not None:
+        for n, columns in enumerate(by_nurse):
+            for j in columns:
+                model.AddHint(lam[j], j == start[n])
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None
+    return [next(j for j in columns if solver.Value(lam[j])) for columns in by_nurse]
+
+
+# ---- Column generation ----
+def initial_pool(ctx, objective, pricer, deadline=None):
+    """Each nurse's best-scored week, ignoring coverage; None if a nurse has no feasible week"""
+    pool = PatternPool(objective)
+    for n, nid in enumerate(ctx.nurse_ids):
+        pattern = pricer.price(n, objective[n], deadline)
+        if pattern is None:
+            if deadline is not None and _remaining(deadline) <= 0:
+                print("⏱️ Out of time before every nurse had a first pattern")
+            else:
+                print(f"❌ Nurse {nid} has no week satisfying the per-nurse rules")
+            return None
+        pool.add(n, pattern)
+    return pool
+
+
+def column_generation(ctx, pricer, pool, rounds, fixed=None, deadline=None):
+    """Price out patterns for the unfixed nurses until none improves the LP master.
+
+    Stops early (as if out of rounds) once `deadline` passes.
+    Returns (LP values, LP objective, uncovered, rounds run), or None if the LP did not solve.
+    """
+    fixed = fixed or {}
+    objective = pool.objective.astype(float)
+    for round_ in range(rounds):
+        result = solve_lp(ctx, pool, fixed)
+        if result is None:
+            print("❌ Pattern LP did not solve")
+            return None
+        lp_values, duals, bound, uncovered = result
+        weights = reduced_weights(ctx, objective, duals)
+        if deadline is not None and _remaining(deadline) <= 0:
+            return lp_values, bound, uncovered, round_
+        added = 0
+        for n in range(len(ctx.nurse_ids)):
+            if n in fixed:
+                continue
+            pattern = pricer.price(n, weights[n], deadline)
+            if pattern is None:
+                continue
+            reduced_cost = (weights[n] * pattern).sum() - duals["convexity"][n]
+            if reduced_cost > MIN_REDUCED_COST and pool.add(n, pattern):
+                added += 1
+        if not added:
+            return lp_values, bound, uncovered, round_ + 1
+    # Out of rounds: values of the last LP, padded for the patterns it has not seen
+    lp_values = np.concatenate([lp_values, np.zeros(len(pool) - len(lp_values))])
+    return lp_values, bound, uncovered, rounds
+
+
+def complete(ctx, pool, fixed, free, time_limit):
+    """Best weeks for the `free` nurses around the fixed patterns, as one small CP model.
+
+    The free nurses get assignment variables and the per-nurse rules; the
+    fixed nurses' cells are constants. Their weeks join the pool. Returns the
+    chosen pattern per nurse, or None if there is no completion.
+    """
+    model = cp_model.CpModel()
+    sub = RuleContext([ctx.nurses[n] for n in free], ctx.shift_def, ctx.rules, ctx.demand)
+    x_free, _ = assignment_vars(sub, model)
+    for rule in nurse_rules(sub):
+        rule.add_constraints(sub, model, x_free)
+    x = np.full(ctx.shape, model.NewConstant(0), dtype=object)
+    one = model.NewConstant(1)
+    for n, j in fixed.items():
+        x[n][pool.patterns[j]] = one
+    x[free] = x_free
+    for rule in shift_rules(ctx):
+        rule.add_constraints(ctx, model, x)
+    weights = pool.objective[free]
+    model.Maximize(cp_model.LinearExpr.WeightedSum(list(x_free.ravel()), [int(w) for w in weights.ravel()]))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    status = solver.Solve(model)
+    if status not in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+        return None
+    values = np.array([solver.Value(v) for v in x_free.ravel()], dtype=bool).reshape(x_free.shape)
+    chosen = dict(fixed)
+    for n, pattern in zip(free, values):
+        chosen[n] = pool.index(n, pattern)
+    return [chosen[n] for n in range(len(ctx.nurse_ids))]
+
+
+def dive(ctx, pricer, pool, lp_values, rounds, dive_deadline, deadline):
+    """Fix nurses to their heaviest LP pattern in batches, re-pricing after each batch.
+
+    Each step fixes every unfixed nurse whose heaviest pattern has LP weight
+    DIVE_MIN_WEIGHT or more, and at least DIVE_FIX_FRACTION of all nurses
+    (heaviest first). Once coverage is lost or `dive_deadline` passes, the
+    last RELEASE_NURSES fixed nurses (doubling on failure) and the unfixed
+    ones are solved jointly by complete(), each attempt with half the time
+    left before `deadline` (the rest is for the master).
+    Returns the chosen pattern per nurse, or None.
+    """
+    N = len(ctx.nurse_ids)
+    per_step = max(1, math.ceil(N * DIVE_FIX_FRACTION))
+    order, fixed = [], {}
+    while len(fixed) < N and _remaining(dive_deadline) > 0:
+        best = {}
+        for j, n in enumerate(pool.nurse):
+            if n not in fixed and (n not in best or lp_values[j] > lp_values[best[n]]):
+                best[n] = j
+        ranked = sorted(best, key=lambda n: -lp_values[best[n]])
+        step = [n for n in ranked if lp_values[best[n]] >= DIVE_MIN_WEIGHT - 1e-6]
+        step = ranked[: max(len(step), per_step)]
+        fixed.update((n, best[n]) for n in step)
+        order.extend(step)
+        result = column_generation(ctx, pricer, pool, rounds, fixed, dive_deadline)
+        if result is None:
+            return None
+        lp_values, bound, uncovered, _ = result
+        if uncovered > 1e-6:
+            print(f"🤿 Coverage lost after fixing {len(fixed)}/{N} nurses")
+            break
+    else:
+        if len(fixed) == N:
+            print(f"🤿 Diving fixed all {N} nurses, objective {bound:.0f}")
+            return [fixed[n] for n in range(N)]
+        print(f"⏱️ Dive stopped at the deadline with {len(fixed)}/{N} nurses fixed")
+
+    unfixed = [n for n in range(N) if n not in fixed]
+    release = RELEASE_NURSES
+    while _remaining(deadline) > 0:
+        released = order[-release:]
+        free = sorted(unfixed + released)
+        kept = {n: j for n, j in fixed.items() if n not in released}
+        print(f"🤿 Completing {len(free)} nurses jointly around {len(kept)} fixed patterns")
+        chosen = complete(ctx, pool, kept, free, _remaining(deadline) / 2)
+        if chosen is not None or release >= len(order):
+            return chosen
+        release *= 2
+    return None
+
+
+def solve_by_patterns(ctx, objective, time_limit=TIME_LIMIT, rounds=ROOT_MAX_ROUNDS):
+    """Roster as a boolean (nurse, dept, day, slot) array from priced-out weekly patterns.
+
+    `objective` is the integer per-assignment weight grid of ctx.shape;
+    `time_limit` bounds the whole solve (pricing, dive, completion and master).
+    The root LP is priced until it converges, its deadline passes or `rounds`
+    rounds have run. Returns None if some nurse has no feasible week, the
+    converged LP cannot cover demand, or no roster was found from the
+    generated patterns in time.
+    """
+    start = time.time()
+    root_deadline = start + time_limit * ROOT_SHARE
+    dive_deadline = start + time_limit * (1 - MASTER_SHARE)
+    deadline = start + time_limit
+    pricer = PatternPricer(ctx)
+    pool = initial_pool(ctx, objective, pricer, root_deadline)
+    if pool is None:
+        return None
+    result = column_generation(ctx, pricer, pool, rounds, deadline=root_deadline)
+    if result is None:
+        return None
+    lp_values, bound, uncovered, rounds_run = result
+    converged = rounds_run < rounds and _remaining(root_deadline) > 0
+    print(
+        f"🧩 {rounds_run} pricing rounds{'' if converged else ' (stopped before convergence)'}: "
+        f"LP objective {bound:.0f}, {len(pool)} patterns "
+        f"(full model: {int(np.prod(ctx.shape))} assignment variables)"
+    )
+    if uncovered > 1e-6:
+        if converged:
+            print("⚠️ The pattern LP cannot cover demand")
+            return None
+        # Slack left only because pricing stopped early: the dive keeps pricing
+        # and its completion step can still cover demand
+        print(f"⚠️ Root LP still has {uncovered:.1f} uncovered demand; diving anyway")
+
+    first = dive(ctx, pricer, pool, lp_values, DIVE_ROUNDS, dive_deadline, deadline)
+    chosen = first
+    if _remaining(deadline) > 0:
+        print(f"🧮 Master over {len(pool)} patterns")
+        chosen = solve_master(ctx, pool, first, _remaining(deadline)) or first
+    if chosen is None:
+        print("⚠️ No roster from the generated patterns")
+        return None
+    X = _roster(ctx, pool, chosen)
+    state = RosterState(ctx, X.astype(np.int64))
+    broken = [rule.name for rule in active_rules(ctx) if rule.violations(ctx, state).any()]
+    if broken:
+        print(f"⚠️ Pattern roster breaks {', '.join(broken)}")
+        return None
+    return X
@@ -1,18 +1,32 @@
 import os
 import json
-import copy
 import datetime
 import random
 import time
+import sys
+import hashlib
+import argparse
+import subprocess
+import threading
 import concurrent.futures
 from typing import Dict, List, Optional
 from ortools.sat.python import cp_model
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Hard rules are shared with the container image code
+sys.path.insert(0, os.path.join(BASE_DIR, "nurse_roster_ECR_Image"))
+from rosterRules import ModelTemplate, RuleContext, add_hard_constraints, assignment_vars
+from scenarioOverlays import materialize_scenario
+from scenarioqueue import ScenarioQueue, default_worker_id
+from scenarioarchive import ArchiveWriter, archived_scenarios
+from timebudget import MIN_HISTORY, BudgetManager, SolveWatchdog, instance_features, precheck
+
 # -----------------------------
-# Paths
+# Paths (override with ROSTER_DATA_PATH / ROSTER_OUTPUT_PATH)
 # -----------------------------
-data_path = r"C:\Users\waiyi\OneDrive\Documents\GitHub\NurseRoster\Nurse Roster\data"
-output_path = r"C:\Users\waiyi\OneDrive\Documents\GitHub\NurseRoster\Nurse Roster\output"
+data_path = os.environ.get("ROSTER_DATA_PATH", os.path.join(BASE_DIR, "Nurse Roster", "data"))
+output_path = os.environ.get("ROSTER_OUTPUT_PATH", os.path.join(BASE_DIR, "Nurse Roster", "output"))
 os.makedirs(output_path, exist_ok=True)
 
 # Create subdirectory for 100 scenarios
@@ -23,8 +37,15 @@ os.makedirs(scenarios_output_path, exist_ok=True)
 # Configuration
 # -----------------------------
 TOTAL_SCENARIOS = 100
-PARALLEL_WORKERS = 4  # Adjust based on your CPU cores
-SOLVER_TIMEOUT = 60   # Reduced timeout for faster generation
+TOTAL_CORES = int(os.environ.get("ROSTER_CORES", os.cpu_count() or 1))
+SEARCH_WORKERS_PER_SOLVE = 2  # CP-SAT workers per solve while the queue is full
+PARALLEL_WORKERS = max(1, TOTAL_CORES // SEARCH_WORKERS_PER_SOLVE)  # concurrent solves
+SOLVER_TIMEOUT = int(os.environ.get("ROSTER_SOLVER_TIMEOUT", 60))   # Reduced timeout for faster generation
+LEASE_SECONDS = 60          # queue lease per scenario, renewed by worker heartbeats
+WORKER_POLL_SECONDS = 5     # idle worker wait while other workers hold the last leases
+COORDINATOR_POLL_SECONDS = 10
+BUDGET_HISTORY = "budget_history.jsonl"  # learned solve times, next to the batch directories
+ARCHIVE_DIR = "archive"                  # Parquet scenario archive, next to the batch directories
 
 # -----------------------------
 # Load JSON locally
@@ -36,9 +57,9 @@ def load_json_local(path):
 # -----------------------------
 # Save roster locally with progress tracking
 # -----------------------------
-def save_roster_local(roster, scenario_name):
+def save_roster_local(roster, scenario_name, out_dir=None):
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:17]  # Include microseconds
-    file_path = os.path.join(scenarios_output_path, f"roster_{scenario_name}_{timestamp}.json")
+    file_path = os.path.join(out_dir or scenarios_output_path, f"roster_{scenario_name}_{timestamp}.json")
     
     # Add generation metadata
     roster["generation_metadata"] = {
@@ -53,189 +74,93 @@ def save_roster_local(roster, scenario_name):
     return file_path
 
 # -----------------------------
-# Convert time to minutes
+# Objective and model template
 # -----------------------------
-def time_to_minutes(t):
-    h, m = map(int, t.split(":"))
-    return h * 60 + m
+def add_preference_objective(model, nurses, assignment, departments, days, time_slots):
+    """Maximize preference matches; returns False when no nurse has a usable preference"""
+    preference_terms = []
+    for n in nurses:
+        nid = n["nurse_id"]
+        prefs = set(n.get("preferences", []))
+        for dept in departments:
+            for d in days:
+                for s in time_slots:
+                    for p in prefs:
+                        if s.endswith(p):
+                            preference_terms.append(assignment[(nid, dept, d, s)])
+    
+    if preference_terms:
+        model.Maximize(cp_model.LinearExpr.Sum(preference_terms))
+    return bool(preference_terms)
+
+def build_template(nurses, shift, rules, demand):
+    """Base model (hard rules + preference objective) that scenario variants are cloned from"""
+    template = ModelTemplate(RuleContext(nurses, shift, rules, demand))
+    template.has_objective = add_preference_objective(
+        template.model, nurses, template.assignment,
+        template.ctx.depts, template.ctx.days, template.ctx.slots,
+    )
+    return template
+
+def _same_preferences(nurses_a, nurses_b):
+    return all(a.get("preferences") == b.get("preferences") for a, b in zip(nurses_a, nurses_b))
 
 # -----------------------------
 # Enhanced build and solve with better error handling
 # -----------------------------
-def build_and_solve(nurses, shift, rules, demand, scenario_name="default"):
-    """Enhanced version with better performance and error handling"""
+def build_and_solve(nurses, shift, rules, demand, scenario_name="default", num_search_workers=SEARCH_WORKERS_PER_SOLVE, output_dir=None, template=None, budget=None, save_json=True):
+    """Enhanced version with better performance and error handling.
+
+    With a `template` the model is a patched clone of the template's base
+    model; variants it cannot express are built from scratch as before.
+    With a `budget` (see timebudget.BudgetManager) the search stops early when
+    no first solution appears in time or the objective stalls. `save_json=False`
+    skips the per-roster JSON file (batch sweeps archive to Parquet instead).
+    """
     try:
         start_time = time.time()
-        model = cp_model.CpModel()
         
-        SHIFT_TIMES = shift["SHIFT_TIMES"]
         SHIFT_HOURS = shift["SHIFT_HOURS"]
         DAYS = rules["general"]["days"]
         DEPARTMENTS = rules["general"]["departments"]
-        ALL_SKILLS = rules["general"]["skills"]
-        CORE_SKILL = rules["general"]["core_skill"]
-        
-        DAILY_HOURS_CAP = rules["constraints"]["daily_hours_cap"]
-        WEEKLY_HOUR_CAP = rules["constraints"]["weekly_hours_cap"]
-        REST_TIME_HOURS = rules["constraints"]["rest_time_hours"]
-        WEEKLY_REST_DAYS = rules["constraints"]["weekly_rest_days"]
-        DEPARTMENT_BALANCE_RULE = rules["constraints"]["department_balance"]["enabled"]
-        CORE_SKILL_REQUIREMENT = rules["constraints"]["core_skill_requirement"]["enabled"]
-        SKILL_MIX_REQUIREMENT = rules["constraints"]["skill_mix_requirement"]["enabled"]
-        
         TIME_SLOTS = list(SHIFT_HOURS.keys())
         
-        # Assignment variables
-        assignment = {}
-        for n in nurses:
-            nid = n["nurse_id"]
-            for dept in DEPARTMENTS:
-                for d in DAYS:
-                    for s in TIME_SLOTS:
-                        assignment[(nid, dept, d, s)] = model.NewBoolVar(f"a_{nid}_{dept}_{d}_{s}")
-        
-        # Apply all constraints (same as your original)
-        # Daily hours
-        for n in nurses:
-            nid = n["nurse_id"]
-            for d in DAYS:
-                model.Add(sum(assignment[(nid, dept, d, s)] * SHIFT_HOURS[s] 
-                              for dept in DEPARTMENTS for s in TIME_SLOTS) <= DAILY_HOURS_CAP)
-        
-        # Weekly hours
-        for n in nurses:
-            nid = n["nurse_id"]
-            model.Add(sum(assignment[(nid, dept, d, s)] * SHIFT_HOURS[s] 
-                          for dept in DEPARTMENTS for d in DAYS for s in TIME_SLOTS) <= WEEKLY_HOUR_CAP)
-        
-        # Contracted hours
-        for n in nurses:
-            nid = n["nurse_id"]
-            contracted = int(n["contracted_hours"])
-            if contracted > 0:
-                model.Add(sum(assignment[(nid, dept, d, s)] * SHIFT_HOURS[s] 
-                              for dept in DEPARTMENTS for d in DAYS for s in TIME_SLOTS) == contracted)
-        
-        # One department per slot
-        for n in nurses:
-            nid = n["nurse_id"]
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    model.Add(sum(assignment[(nid, dept, d, s)] for dept in DEPARTMENTS) <= 1)
-        
-        # Coverage demand
-        for dept in DEPARTMENTS:
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    min_required = demand[dept][d][s]["min"]
-                    max_required = demand[dept][d][s]["max"]
-                    model.Add(sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses) >= min_required)
-                    model.Add(sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses) <= max_required)
-        
-        # Nurse unavailability (with safe handling)
-        for n in nurses:
-            for ua in n["unavailability"]:
-                if isinstance(ua, str) and "-" in ua:
-                    parts = ua.split("-")
-                    if len(parts) == 2:
-                        day_str, slot = parts
-                        if day_str in DAYS and slot in TIME_SLOTS:
-                            for dept in DEPARTMENTS:
-                                model.Add(assignment[(n["nurse_id"], dept, day_str, slot)] == 0)
-        
-        # Rest day constraint
-        for n in nurses:
-            rest_day_vars = []
-            for d in DAYS:
-                rest_day = model.NewBoolVar(f"rest_{n['nurse_id']}_{d}")
-                daily_assignments = [assignment[(n["nurse_id"], dept, d, s)] for dept in DEPARTMENTS for s in TIME_SLOTS]
-                model.Add(sum(daily_assignments) == 0).OnlyEnforceIf(rest_day)
-                model.Add(sum(daily_assignments) > 0).OnlyEnforceIf(rest_day.Not())
-                rest_day_vars.append(rest_day)
-            model.Add(sum(rest_day_vars) == WEEKLY_REST_DAYS)
-        
-        # Skill requirements
-        if CORE_SKILL_REQUIREMENT or SKILL_MIX_REQUIREMENT:
-            for dept in DEPARTMENTS:
-                core_skill = CORE_SKILL[dept]
-                for d in DAYS:
-                    for s in TIME_SLOTS:
-                        # At least 1 with core skill
-                        core_nurses = [n for n in nurses if core_skill in n["skills"]]
-                        if core_nurses:  # Only add constraint if there are nurses with core skill
-                            model.Add(sum(assignment[(n["nurse_id"], dept, d, s)] for n in core_nurses) >= 1)
-                        
-                        # At least 3 different skills
-                        skill_vars = {}
-                        for skill in ALL_SKILLS:
-                            skill_nurses = [n for n in nurses if skill in n["skills"]]
-                            if skill_nurses:  # Only create skill var if there are nurses with this skill
-                                skill_var = model.NewBoolVar(f"dept_{dept}_{d}_{s}_{skill}")
-                                model.AddMaxEquality(skill_var, [assignment[(n["nurse_id"], dept, d, s)] for n in skill_nurses])
-                                skill_vars[skill] = skill_var
-                        
-                        if len(skill_vars) >= 3:  # Only add constraint if we have at least 3 skills
-                            model.Add(sum(skill_vars.values()) >= 3)
-        
-        # Rest time between shifts
-        shift_minutes = {}
-        for shift_name, (start, end) in SHIFT_TIMES.items():
-            start_min = time_to_minutes(start)
-            end_min = time_to_minutes(end)
-            if end_min <= start_min:
-                end_min += 24*60
-            shift_minutes[shift_name] = (start_min, end_min)
-        
-        for nurse in nurses:
-            nid = nurse["nurse_id"]
-            for i in range(len(DAYS)):
-                day = DAYS[i]
-                next_day = DAYS[(i+1) % len(DAYS)]
-                for s1 in TIME_SLOTS:
-                    for s2 in TIME_SLOTS:
-                        end_s1 = shift_minutes[s1][1]
-                        start_s2 = shift_minutes[s2][0]
-                        rest_minutes = (24*60 - (end_s1 % (24*60))) + start_s2
-                        if rest_minutes < REST_TIME_HOURS*60:
-                            model.Add(sum(assignment[(nid, dept, day, s1)] for dept in DEPARTMENTS) +
-                                      sum(assignment[(nid, dept, next_day, s2)] for dept in DEPARTMENTS) <= 1)
-        
-        # Department balance
-        if DEPARTMENT_BALANCE_RULE:
-            for d in DAYS:
-                for s in TIME_SLOTS:
-                    dept_counts = [sum(assignment[(n["nurse_id"], dept, d, s)] for n in nurses) for dept in DEPARTMENTS]
-                    for i in range(len(DEPARTMENTS)):
-                        for j in range(i+1, len(DEPARTMENTS)):
-                            model.Add(dept_counts[i] - dept_counts[j] <= 1)
-                            model.Add(dept_counts[j] - dept_counts[i] <= 1)
-        
-        # Objective: maximize preference matches
-        preference_terms = []
-        for n in nurses:
-            nid = n["nurse_id"]
-            prefs = set(n.get("preferences", []))
-            for dept in DEPARTMENTS:
-                for d in DAYS:
-                    for s in TIME_SLOTS:
-                        for p in prefs:
-                            if s.endswith(p):
-                                preference_terms.append(assignment[(nid, dept, d, s)])
-        
-        if preference_terms:
-            model.Maximize(sum(preference_terms))
+        ctx = RuleContext(nurses, shift, rules, demand)
+        model = None
+        if template is not None and _same_preferences(template.ctx.nurses, nurses):
+            model = template.instantiate(ctx)
+        
+        if model is not None:
+            assignment = template.assignment
+            has_objective = template.has_objective
+            model_build = "template"
+        else:
+            model = cp_model.CpModel()
+            
+            # Assignment variables
+            x, assignment = assignment_vars(ctx, model)
+            
+            # Hard constraints (shared with generateRoster and evaluateRoster)
+            add_hard_constraints(ctx, model, x)
+            
+            # Objective: maximize preference matches
+            has_objective = add_preference_objective(model, nurses, assignment, DEPARTMENTS, DAYS, TIME_SLOTS)
+            model_build = "full"
+        build_time = time.time() - start_time
         
         # Solve with optimized parameters
         solver = cp_model.CpSolver()
         solver.parameters.max_time_in_seconds = SOLVER_TIMEOUT
-        solver.parameters.num_search_workers = 2  # Use fewer workers per solve for parallel execution
+        solver.parameters.num_search_workers = num_search_workers  # Budgeted by the scenario runner
         solver.parameters.cp_model_presolve = True  # Enable presolve
         solver.parameters.linearization_level = 2  # Better linearization
         
-        status = solver.Solve(model)
+        with SolveWatchdog(solver, budget) as watchdog:
+            status = solver.Solve(model, watchdog)
         
         if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-            print(f"❌ No solution found for {scenario_name}")
+            reason = " (no first solution within budget)" if watchdog.stop_reason else ""
+            print(f"❌ No solution found for {scenario_name}{reason}")
             return None
         
         # Build roster
@@ -257,15 +182,22 @@ def build_and_solve(nurses, shift, rules, demand, scenario_name="default"):
         solve_time = time.time() - start_time
         roster["solver_stats"] = {
             "status": solver.StatusName(status),
-            "objective_value": solver.ObjectiveValue() if preference_terms else 0,
+            "objective_value": solver.ObjectiveValue() if has_objective else 0,
             "wall_time": solver.WallTime(),
             "total_time": solve_time,
             "num_conflicts": solver.NumConflicts(),
-            "num_branches": solver.NumBranches()
+            "num_branches": solver.NumBranches(),
+            "model_build": model_build,
+            "build_time": build_time,
+            "first_solution_time": watchdog.first_solution_time,
+            "num_solutions": watchdog.num_solutions,
+            "stop_reason": watchdog.stop_reason,
+            "budget": budget
         }
         
         # Save roster
-        file_path = save_roster_local(roster, scenario_name)
+        if save_json:
+            save_roster_local(roster, scenario_name, output_dir)
         print(f"✅ {scenario_name}: {roster['solver_stats']['status']} ({solve_time:.1f}s)")
         
         return roster
@@ -275,156 +207,337 @@ def build_and_solve(nurses, shift, rules, demand, scenario_name="default"):
         return None
 
 # -----------------------------
-# Create 100 diverse scenarios with enhanced variety
+# Scenario overlays: small deltas over the shared base data
 # -----------------------------
-def create_100_scenarios(base_nurses, base_shift, base_rules, base_demand):
-    """Create 100 diverse scenarios with different characteristics"""
-    scenarios = []
+# Overlays and materialize_scenario live in nurse_roster_ECR_Image/scenarioOverlays.py,
+# shared with the training-data builder.
+
+def _random_unavailability(rng, base_nurses, days, time_slots, probability, max_extra, cap=None):
+    extra = {}
+    for nurse in base_nurses:
+        if rng.random() < probability:
+            existing = list(nurse["unavailability"])
+            added = []
+            for _ in range(rng.randint(1, max_extra)):
+                ua_str = f"{rng.choice(days)}-{rng.choice(time_slots)}"
+                if ua_str not in existing and (cap is None or len(existing) < cap):
+                    existing.append(ua_str)
+                    added.append(ua_str)
+            if added:
+                extra[nurse["nurse_id"]] = added
+    return extra
+
+def scenario_seed(batch_seed, i):
+    """Seed of scenario i in a batch; depends only on (batch_seed, i)"""
+    return random.Random(f"{batch_seed}:{i}").randrange(2**32)
+
+def scenario_overlay(i, seed, base_nurses, departments, days, time_slots):
+    """Overlay for scenario index i; the scenario type cycles through 10 kinds.
+
+    All randomness comes from random.Random(seed), so the same (i, seed)
+    always rebuilds the same scenario.
+    """
+    rng = random.Random(seed)
+    scenario_type = i % 10  # 10 different scenario types
+    overlay = {"name": f"scenario_{i+1:03d}", "index": i, "seed": seed, "type": scenario_type}
+    
+    if scenario_type == 0:  # High demand scenarios
+        overlay["demand_ops"] = [{"op": "scale", "factor": rng.uniform(1.2, 1.5)}]
+    
+    elif scenario_type == 1:  # Low demand scenarios
+        overlay["demand_ops"] = [{"op": "scale", "factor": rng.uniform(0.6, 0.8)}]
+    
+    elif scenario_type == 2:  # Weekend heavy scenarios
+        weekend_days = [d for d in days if d.startswith(("Sat", "Sun"))]
+        overlay["demand_ops"] = [{"op": "scale", "factor": 1.3, "days": weekend_days, "min_only": True}]
+    
+    elif scenario_type == 3:  # High unavailability scenarios
+        # 40% of nurses get 1-3 additional unavailable slots (at most 10 in total)
+        overlay["extra_unavailability"] = _random_unavailability(rng, base_nurses, days, time_slots, 0.4, 3, cap=10)
+    
+    elif scenario_type == 4:  # Flexible hours scenarios
+        overlay["rule_overrides"] = {
+            "weekly_hours_cap": rng.choice([44, 48, 52]),
+            "daily_hours_cap": rng.choice([10, 12]),
+        }
+    
+    elif scenario_type == 5:  # Emergency scenarios (tight staffing)
+        overlay["demand_ops"] = [{"op": "max_to_min"}]
+    
+    elif scenario_type == 6:  # Variable demand across days
+        overlay["demand_ops"] = [
+            {"op": "scale", "factor": 0.7 + (day_idx * 0.1), "days": [day]}  # Gradual increase through the week
+            for day_idx, day in enumerate(days)
+        ]
+    
+    elif scenario_type == 7:  # Night shift heavy scenarios
+        night_shifts = [slot for slot in time_slots if "Night" in slot]
+        if night_shifts:
+            overlay["demand_ops"] = [{"op": "scale", "factor": 1.4, "slots": night_shifts, "min_only": True}]
+    
+    elif scenario_type == 8:  # Reduced rest time scenarios
+        overlay["rule_overrides"] = {"rest_time_hours": rng.choice([8, 10])}
+    
+    else:  # Mixed random scenarios
+        # Random demand variation
+        factors = {
+            f"{dept}|{day}|{slot}": rng.uniform(0.8, 1.2)
+            for dept in departments
+            for day in days
+            for slot in time_slots
+        }
+        overlay["demand_ops"] = [{"op": "cell_factors", "factors": factors}]
+        # Random nurse unavailability (20% chance)
+        overlay["extra_unavailability"] = _random_unavailability(rng, base_nurses, days, time_slots, 0.2, 1)
+    
+    return overlay
+
+def create_100_scenarios(base_nurses, base_shift, base_rules, base_demand, total=None, batch_seed=0, skip=()):
+    """Lazily yield `total` (default TOTAL_SCENARIOS) diverse scenario overlays.
+
+    Scenario i is seeded with scenario_seed(batch_seed, i); indices in `skip`
+    (e.g. already completed in a resumed batch) are not generated.
+    """
+    total = total or TOTAL_SCENARIOS
     days = base_rules["general"]["days"]
     time_slots = list(base_shift["SHIFT_HOURS"].keys())
+    skip = set(skip)
     
-    # Set random seed for reproducibility (optional)
-    #random.seed(42)
+    print(f"🎯 Creating {total - len(skip & set(range(total)))} diverse scenarios (batch seed {batch_seed})...")
     
-    print(f"🎯 Creating {TOTAL_SCENARIOS} diverse scenarios...")
-    
-    for i in range(TOTAL_SCENARIOS):
-        scenario_name = f"scenario_{i+1:03d}"  # 001, 002, etc.
-        
-        # Deep copy base data
-        nurses_copy = copy.deepcopy(base_nurses)
-        demand_copy = copy.deepcopy(base_demand)
-        rules_copy = copy.deepcopy(base_rules)
-        
-        # Scenario type based on index to ensure variety
-        scenario_type = i % 10  # 10 different scenario types
-        
-        if scenario_type == 0:  # High demand scenarios
-            factor = random.uniform(1.2, 1.5)
-            for dept in demand_copy:
-                for day in days:
-                    for slot in time_slots:
-                        min_val = demand_copy[dept][day][slot]["min"]
-                        max_val = demand_copy[dept][day][slot]["max"]
-                        demand_copy[dept][day][slot]["min"] = max(1, int(min_val * factor))
-                        demand_copy[dept][day][slot]["max"] = max(demand_copy[dept][day][slot]["min"], int(max_val * factor))
-        
-        elif scenario_type == 1:  # Low demand scenarios
-            factor = random.uniform(0.6, 0.8)
-            for dept in demand_copy:
-                for day in days:
-                    for slot in time_slots:
-                        min_val = demand_copy[dept][day][slot]["min"]
-                        max_val = demand_copy[dept][day][slot]["max"]
-                        demand_copy[dept][day][slot]["min"] = max(1, int(min_val * factor))
-                        demand_copy[dept][day][slot]["max"] = max(demand_copy[dept][day][slot]["min"], int(max_val * factor))
-        
-        elif scenario_type == 2:  # Weekend heavy scenarios
-            weekend_days = ["Saturday", "Sunday"]
-            for dept in demand_copy:
-                for day in weekend_days:
-                    if day in demand_copy[dept]:
-                        for slot in time_slots:
-                            current_min = demand_copy[dept][day][slot]["min"]
-                            demand_copy[dept][day][slot]["min"] = max(1, int(current_min * 1.3))
-        
-        elif scenario_type == 3:  # High unavailability scenarios
-            for nurse in nurses_copy:
-                if random.random() < 0.4:  # 40% of nurses get additional unavailability
-                    for _ in range(random.randint(1, 3)):  # 1-3 additional unavailable slots
-                        ua_day = random.choice(days)
-                        ua_slot = random.choice(time_slots)
-                        ua_str = f"{ua_day}-{ua_slot}"
-                        if ua_str not in nurse["unavailability"] and len(nurse["unavailability"]) < 10:
-                            nurse["unavailability"].append(ua_str)
-        
-        elif scenario_type == 4:  # Flexible hours scenarios
-            rules_copy["constraints"]["weekly_hours_cap"] = random.choice([44, 48, 52])
-            rules_copy["constraints"]["daily_hours_cap"] = random.choice([10, 12])
-        
-        elif scenario_type == 5:  # Emergency scenarios (tight staffing)
-            for dept in demand_copy:
-                for day in days:
-                    for slot in time_slots:
-                        min_val = demand_copy[dept][day][slot]["min"]
-                        demand_copy[dept][day][slot]["max"] = min_val  # max = min
-        
-        elif scenario_type == 6:  # Variable demand across days
-            for dept in demand_copy:
-                for day_idx, day in enumerate(days):
-                    factor = 0.7 + (day_idx * 0.1)  # Gradual increase through the week
-                    for slot in time_slots:
-                        min_val = demand_copy[dept][day][slot]["min"]
-                        max_val = demand_copy[dept][day][slot]["max"]
-                        demand_copy[dept][day][slot]["min"] = max(1, int(min_val * factor))
-                        demand_copy[dept][day][slot]["max"] = max(demand_copy[dept][day][slot]["min"], int(max_val * factor))
-        
-        elif scenario_type == 7:  # Night shift heavy scenarios
-            night_shifts = [slot for slot in time_slots if "Night" in slot]
-            if night_shifts:
-                for dept in demand_copy:
-                    for day in days:
-                        for slot in night_shifts:
-                            current_min = demand_copy[dept][day][slot]["min"]
-                            demand_copy[dept][day][slot]["min"] = max(1, int(current_min * 1.4))
-        
-        elif scenario_type == 8:  # Reduced rest time scenarios
-            rules_copy["constraints"]["rest_time_hours"] = random.choice([8, 10])
-        
-        else:  # Mixed random scenarios
-            # Random demand variation
-            for dept in demand_copy:
-                for day in days:
-                    for slot in time_slots:
-                        factor = random.uniform(0.8, 1.2)
-                        min_val = demand_copy[dept][day][slot]["min"]
-                        max_val = demand_copy[dept][day][slot]["max"]
-                        demand_copy[dept][day][slot]["min"] = max(1, int(min_val * factor))
-                        demand_copy[dept][day][slot]["max"] = max(demand_copy[dept][day][slot]["min"], int(max_val * factor))
-            
-            # Random nurse unavailability
-            for nurse in nurses_copy:
-                if random.random() < 0.2:  # 20% chance
-                    ua_day = random.choice(days)
-                    ua_slot = random.choice(time_slots)
-                    ua_str = f"{ua_day}-{ua_slot}"
-                    if ua_str not in nurse["unavailability"]:
-                        nurse["unavailability"].append(ua_str)
-        
-        scenarios.append({
-            "name": scenario_name,
-            "nurses": nurses_copy,
-            "shift": copy.deepcopy(base_shift),
-            "rules": rules_copy,
-            "demand": demand_copy,
-            "type": scenario_type
-        })
+    for i in range(total):
+        if i in skip:
+            continue
+        yield scenario_overlay(i, scenario_seed(batch_seed, i), base_nurses, list(base_demand), days, time_slots)
         
         # Progress indicator
         if (i + 1) % 20 == 0:
             print(f"📊 Created {i + 1} scenarios...")
     
-    print(f"✅ Created all {TOTAL_SCENARIOS} scenarios!")
-    return scenarios
+    print(f"✅ Created all {total} scenarios!")
 
 # -----------------------------
-# Parallel processing function
+# Process-pool workers (base data loaded once per worker)
 # -----------------------------
-def solve_scenario(scenario_data):
-    """Solve a single scenario - for parallel processing"""
-    return build_and_solve(
-        scenario_data["nurses"],
-        scenario_data["shift"],
-        scenario_data["rules"],
-        scenario_data["demand"],
-        scenario_name=scenario_data["name"]
+_worker_base = None
+_worker_template = None
+
+def init_worker(base_data_path):
+    """Process pool initializer: load the shared base data once per worker process"""
+    global _worker_base, _worker_template
+    _worker_base = {
+        "nurses": load_json_local(os.path.join(base_data_path, "nurse.json")),
+        "shift": load_json_local(os.path.join(base_data_path, "shift.json")),
+        "rules": load_json_local(os.path.join(base_data_path, "rules.json")),
+        "demand": load_json_local(os.path.join(base_data_path, "demand.json")),
+    }
+    _worker_template = build_template(
+        _worker_base["nurses"], _worker_base["shift"], _worker_base["rules"], _worker_base["demand"]
     )
 
+def solve_scenario(overlay, num_search_workers=SEARCH_WORKERS_PER_SOLVE):
+    """Solve a single scenario overlay - for parallel processing.
+
+    The overlay is materialized here, inside the worker, and only the solver
+    stats and saved file path travel back to the parent process.
+    """
+    nurses, shift, rules, demand = materialize_scenario(_worker_base, overlay)
+    roster = build_and_solve(
+        nurses, shift, rules, demand,
+        scenario_name=overlay["name"],
+        num_search_workers=num_search_workers,
+        output_dir=overlay.get("output_dir"),
+        template=_worker_template,
+        budget=overlay.get("budget"),
+        save_json=overlay.get("save_json", True),
+    )
+    if roster is None:
+        return None
+    return {
+        "solver_stats": roster["solver_stats"],
+        "file_path": roster.get("generation_metadata", {}).get("file_path"),
+        "assignments": [
+            (n["id"], dept["name"], s["day"], s["shift"])
+            for dept in roster["departments"]
+            for n in dept["nurses"]
+            for s in n["shifts"]
+        ],
+    }
+
+# -----------------------------
+# Adaptive time budgets
+# -----------------------------
+def budget_history_path(batch_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(batch_dir)), BUDGET_HISTORY)
+
+def archive_path(batch_dir):
+    return os.path.join(os.path.dirname(os.path.abspath(batch_dir)), ARCHIVE_DIR)
+
+def archive_batch_name(batch_dir):
+    return os.path.basename(os.path.abspath(batch_dir))
+
+def slim_result(result):
+    """Result without the assignment list, for completed.jsonl / the queue / the summary"""
+    if not result:
+        return result
+    return {k: v for k, v in result.items() if k != "assignments"}
+
+def plan_scenario(base, overlay, manager):
+    """(overlay with features/budget, None) or (overlay, reason) when the precheck proves it infeasible"""
+    ctx = RuleContext(*materialize_scenario(base, overlay))
+    reason = precheck(ctx)
+    if reason:
+        return overlay, reason
+    features = instance_features(ctx)
+    return {**overlay, "features": features, "budget": manager.budget_for(features)}, None
+
+# -----------------------------
+# Core-aware solver budgeting
+# -----------------------------
+def search_workers_for_next(free_cores, free_slots, pending):
+    """CP-SAT search workers for the next submitted solve.
+
+    The cores not held by running solves are split evenly over the solves
+    about to start (the free slots, or fewer if fewer scenarios are pending).
+    With the queue full that is SEARCH_WORKERS_PER_SOLVE per solve; a batch
+    smaller than the pool, or a tail where several solves finished at once,
+    gets every free core. Running solves keep their workers, so cores freed
+    after the last submission stay idle. Never below SEARCH_WORKERS_PER_SOLVE:
+    a single CP-SAT worker has no LNS portfolio and rarely finds a feasible
+    roster within SOLVER_TIMEOUT.
+    """
+    starting = max(1, min(free_slots, pending))
+    return max(SEARCH_WORKERS_PER_SOLVE, free_cores // starting)
+
+def run_scenarios(scenarios, on_result, total=None, base_data_path=None):
+    """Solve scenario overlays on a process pool, keeping at most PARALLEL_WORKERS solves in flight.
+
+    `scenarios` may be a lazy iterator (pass `total` when it has no len()); overlays
+    are only pulled from it as solve slots free up. on_result(overlay, result_or_None)
+    is called in the parent as each solve finishes.
+    """
+    remaining = total if total is not None else len(scenarios)
+    scenarios = iter(scenarios)
+    in_flight = {}
+    
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=PARALLEL_WORKERS,
+        initializer=init_worker,
+        initargs=(base_data_path or data_path,),
+    ) as executor:
+        while remaining or in_flight:
+            while remaining and len(in_flight) < PARALLEL_WORKERS:
+                busy = sum(workers for _, workers in in_flight.values())
+                workers = search_workers_for_next(
+                    TOTAL_CORES - busy, PARALLEL_WORKERS - len(in_flight), remaining
+                )
+                scenario = next(scenarios, None)
+                if scenario is None:
+                    remaining = 0
+                    break
+                remaining -= 1
+                in_flight[executor.submit(solve_scenario, scenario, workers)] = (scenario, workers)
+            if not in_flight:
+                break
+            
+            done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                scenario, _ = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ Exception in {scenario['name']}: {e}")
+                    result = None
+                on_result(scenario, result)
+
+# -----------------------------
+# Batch manifest and checkpointing
+# -----------------------------
+# A batch directory holds the rosters of one sweep plus:
+#   manifest.json   - batch seed, size, solver settings and per-scenario seeds
+#   completed.jsonl - one line per finished scenario, appended as results arrive
+# Resuming a batch re-reads both and only solves indices missing from completed.jsonl.
+BATCH_MANIFEST = "manifest.json"
+BATCH_COMPLETED = "completed.jsonl"
+BASE_DATA_FILES = ["nurse.json", "shift.json", "rules.json", "demand.json"]
+
+def data_digest(base_data_path):
+    """sha256 over the base data files, to detect input changes between runs of a batch"""
+    digest = hashlib.sha256()
+    for name in BASE_DATA_FILES:
+        with open(os.path.join(base_data_path, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def create_batch(batch_seed, total, base_data_path=None, batch_dir=None):
+    """Create a new batch directory with its manifest; returns (batch_dir, manifest)"""
+    base_data_path = base_data_path or data_path
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    batch_dir = batch_dir or os.path.join(scenarios_output_path, f"batch_{timestamp}_seed{batch_seed}")
+    os.makedirs(batch_dir, exist_ok=True)
+    manifest = {
+        "batch_seed": batch_seed,
+        "batch_dir": batch_dir,
+        "total_scenarios": total,
+        "created_at": datetime.datetime.now().isoformat(),
+        "data_path": base_data_path,
+        "data_digest": data_digest(base_data_path),
+        "solver_timeout": SOLVER_TIMEOUT,
+        "scenarios": [
+            {"index": i, "name": f"scenario_{i+1:03d}", "seed": scenario_seed(batch_seed, i)}
+            for i in range(total)
+        ],
+    }
+    tmp_path = os.path.join(batch_dir, BATCH_MANIFEST + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(batch_dir, BATCH_MANIFEST))
+    return batch_dir, manifest
+
+def load_batch(batch_dir):
+    """(manifest, {index: completed entry}) for an existing batch directory"""
+    manifest = load_json_local(os.path.join(batch_dir, BATCH_MANIFEST))
+    completed = {}
+    completed_path = os.path.join(batch_dir, BATCH_COMPLETED)
+    if os.path.exists(completed_path):
+        valid_bytes = 0
+        with open(completed_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # partial line from an interrupted write
+                if not line.endswith(b"\n"):
+                    break
+                completed[entry["index"]] = entry
+                valid_bytes += len(line)
+        # Drop the torn tail so new entries start on a fresh line
+        if valid_bytes < os.path.getsize(completed_path):
+            with open(completed_path, "r+b") as f:
+                f.truncate(valid_bytes)
+    return manifest, completed
+
+def record_completed(batch_dir, entry):
+    """Append one finished scenario to completed.jsonl and flush it to disk"""
+    with open(os.path.join(batch_dir, BATCH_COMPLETED), "a") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
 # -----------------------------
 # Generate 100 rosters with parallel processing
 # -----------------------------
-def generate_100_rosters():
-    """Generate 100 roster scenarios with optimized parallel processing"""
+def generate_100_rosters(batch_seed=None, total=None, resume_dir=None, retry_failed=False, adaptive=True, json_rosters=False):
+    """Generate a batch of roster scenarios with optimized parallel processing.
+
+    A new batch gets a manifest in its own directory; with `resume_dir` the
+    scenarios already in its completed.jsonl are skipped (failed ones too,
+    unless `retry_failed`) and only the rest are solved. With `adaptive`,
+    provably infeasible scenarios are skipped and each solve gets a learned
+    time budget instead of the flat SOLVER_TIMEOUT. Rosters, scenario params and
+    solver stats are appended to the Parquet archive next to the batch
+    directory; `json_rosters` also writes the old per-roster JSON files.
+    """
     print("🏥 Hospital Roster Generator - 100 Scenarios")
     print("=" * 60)
     
@@ -437,78 +550,136 @@ def generate_100_rosters():
     
     print(f"✅ Loaded: {len(nurses)} nurses, {len(shift['SHIFT_HOURS'])} shifts")
     
-    # Create scenarios
+    # Create or resume the batch
+    if resume_dir:
+        batch_dir = resume_dir
+        manifest, completed = load_batch(batch_dir)
+        if manifest["data_digest"] != data_digest(data_path):
+            print("⚠️ Base data changed since this batch was started; resumed scenarios will use the new data")
+        if retry_failed:
+            completed = {i: entry for i, entry in completed.items() if entry["status"] == "solved"}
+        # Scenarios whose archive part was lost in the interruption are solved again
+        archived = archived_scenarios(archive_path(batch_dir), archive_batch_name(batch_dir))
+        completed = {i: entry for i, entry in completed.items() if entry["name"] in archived}
+        print(f"🔁 Resuming {batch_dir}: {len(completed)}/{manifest['total_scenarios']} scenarios already done")
+    else:
+        if batch_seed is None:
+            batch_seed = random.SystemRandom().randrange(2**32)
+        batch_dir, manifest = create_batch(batch_seed, total or TOTAL_SCENARIOS)
+        completed = {}
+        print(f"📁 New batch: {batch_dir}")
+    batch_seed = manifest["batch_seed"]
+    batch_total = manifest["total_scenarios"]
+    to_run = batch_total - len(completed)
+    
+    base = {"nurses": nurses, "shift": shift, "rules": rules, "demand": demand}
+    manager = BudgetManager(SOLVER_TIMEOUT, budget_history_path(batch_dir)) if adaptive else None
+    archive = ArchiveWriter(archive_path(batch_dir), archive_batch_name(batch_dir))
+    
     start_time = time.time()
-    scenarios = create_100_scenarios(nurses, shift, rules, demand)
+    
+    def planned_scenarios():
+        for overlay in create_100_scenarios(nurses, shift, rules, demand, total=batch_total, batch_seed=batch_seed, skip=completed):
+            overlay = {**overlay, "output_dir": batch_dir, "save_json": json_rosters}
+            if manager is not None:
+                overlay, reason = plan_scenario(base, overlay, manager)
+                if reason:
+                    print(f"⛔ {overlay['name']}: infeasible by precheck - {reason}")
+                    on_result(overlay, None, reason)
+                    continue
+            yield overlay
     
     # Generate rosters
-    print(f"\n🚀 Starting generation of {TOTAL_SCENARIOS} rosters...")
-    print(f"⚙️ Using {PARALLEL_WORKERS} parallel workers")
-    print(f"⏱️ Solver timeout: {SOLVER_TIMEOUT}s per scenario")
+    print(f"\n🚀 Starting generation of {to_run} rosters...")
+    print(f"⚙️ Using {PARALLEL_WORKERS} parallel solves on {TOTAL_CORES} cores")
+    if manager is not None:
+        learned = "learned" if manager.coef is not None else f"flat until {MIN_HISTORY} solves are recorded"
+        print(f"⏱️ Adaptive time budgets ({learned}), base timeout {SOLVER_TIMEOUT}s")
+    else:
+        print(f"⏱️ Solver timeout: {SOLVER_TIMEOUT}s per scenario")
     print("=" * 60)
     
-    results = {}
-    successful = 0
-    failed = 0
+    counters = {"successful": 0, "failed": 0}
+    
+    def on_result(scenario, result, reason=None):
+        archive.write_scenario(scenario, result, reason)
+        entry = {
+            "index": scenario["index"],
+            "name": scenario["name"],
+            "seed": scenario["seed"],
+            "status": "solved" if result else "failed",
+            "completed_at": datetime.datetime.now().isoformat(),
+            **(slim_result(result) or {}),
+        }
+        if reason:
+            entry["reason"] = reason
+        record_completed(batch_dir, entry)
+        completed[scenario["index"]] = entry
+        if manager is not None and "features" in scenario:
+            manager.record(scenario["features"], result and result["solver_stats"])
+        if result:
+            counters["successful"] += 1
+        else:
+            counters["failed"] += 1
+        
+        # Progress update
+        total_completed = counters["successful"] + counters["failed"]
+        if total_completed % 10 == 0:
+            elapsed = time.time() - start_time
+            avg_time = elapsed / total_completed
+            eta = avg_time * (to_run - total_completed)
+            print(f"📊 Progress: {total_completed}/{to_run} ({counters['successful']} successful, {counters['failed']} failed) - ETA: {eta:.1f}s")
     
     # Process scenarios in parallel
-    with concurrent.futures.ThreadPoolExecutor(max_workers=PARALLEL_WORKERS) as executor:
-        # Submit all scenarios
-        future_to_scenario = {executor.submit(solve_scenario, scenario): scenario for scenario in scenarios}
-        
-        # Collect results as they complete
-        for future in concurrent.futures.as_completed(future_to_scenario):
-            scenario = future_to_scenario[future]
-            try:
-                result = future.result()
-                if result:
-                    results[scenario["name"]] = result
-                    successful += 1
-                else:
-                    failed += 1
-                
-                # Progress update
-                total_completed = successful + failed
-                if total_completed % 10 == 0:
-                    elapsed = time.time() - start_time
-                    avg_time = elapsed / total_completed
-                    eta = avg_time * (TOTAL_SCENARIOS - total_completed)
-                    print(f"📊 Progress: {total_completed}/{TOTAL_SCENARIOS} ({successful} successful, {failed} failed) - ETA: {eta:.1f}s")
-                    
-            except Exception as e:
-                print(f"❌ Exception in {scenario['name']}: {e}")
-                failed += 1
+    try:
+        run_scenarios(planned_scenarios(), on_result, total=to_run)
+    finally:
+        archive.close()
     
-    # Final summary
-    total_time = time.time() - start_time
+    # Final summary, over the whole batch including earlier runs
+    return summarize_batch(batch_dir, manifest, completed, time.time() - start_time, to_run, counters)
+
+def summarize_batch(batch_dir, manifest, completed, total_time, scenarios_run, run_counters=None):
+    """Print and save the summary of a batch from its {index: completed entry} map; returns solved results by name"""
+    batch_total = manifest["total_scenarios"]
+    results = {
+        entry["name"]: entry
+        for _, entry in sorted(completed.items())
+        if entry["status"] == "solved"
+    }
+    successful = len(results)
+    failed = len(completed) - successful
     print(f"\n🎉 GENERATION COMPLETE!")
     print("=" * 60)
     print(f"📊 Results:")
-    print(f"   Total scenarios: {TOTAL_SCENARIOS}")
+    print(f"   Total scenarios: {batch_total}")
+    if run_counters is not None:
+        print(f"   Solved this run: {run_counters['successful']} ({run_counters['failed']} failed)")
     print(f"   Successful: {successful}")
     print(f"   Failed: {failed}")
-    print(f"   Success rate: {(successful/TOTAL_SCENARIOS)*100:.1f}%")
+    print(f"   Success rate: {(successful/batch_total)*100:.1f}%")
     print(f"   Total time: {total_time:.1f} seconds")
-    print(f"   Average time per scenario: {total_time/TOTAL_SCENARIOS:.1f} seconds")
-    print(f"📁 Output directory: {scenarios_output_path}")
+    print(f"   Average time per scenario: {total_time/max(1, scenarios_run):.1f} seconds")
+    print(f"📁 Output directory: {batch_dir}")
     
     # Save summary report
     summary = {
         "generation_summary": {
-            "total_scenarios": TOTAL_SCENARIOS,
+            "batch_seed": manifest["batch_seed"],
+            "total_scenarios": batch_total,
             "successful": successful,
             "failed": failed,
-            "success_rate": (successful/TOTAL_SCENARIOS)*100,
+            "success_rate": (successful/batch_total)*100,
             "total_time_seconds": total_time,
-            "average_time_per_scenario": total_time/TOTAL_SCENARIOS,
+            "average_time_per_scenario": total_time/max(1, scenarios_run),
             "generated_at": datetime.datetime.now().isoformat(),
-            "output_directory": scenarios_output_path
+            "output_directory": batch_dir
         },
         "successful_scenarios": [name for name in results.keys()],
-        "scenario_stats": {name: roster["solver_stats"] for name, roster in results.items()}
+        "scenario_stats": {name: result["solver_stats"] for name, result in results.items()}
     }
     
-    summary_path = os.path.join(scenarios_output_path, f"generation_summary_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    summary_path = os.path.join(batch_dir, f"generation_summary_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
     with open(summary_path, "w") as f:
         json.dump(summary, f, indent=2)
     
@@ -516,26 +687,219 @@ def generate_100_rosters():
     
     return results
 
+# -----------------------------
+# Distributed sweep: coordinator + workers over a shared queue
+# -----------------------------
+# The coordinator creates the batch next to the queue database and watches
+# progress; workers on any host with the same base data lease scenario
+# indices, rebuild the overlay from (index, seed) and write rosters into the
+# shared batch directory. Expired leases (crashed workers) are re-queued.
+def overlay_for(base, index, seed):
+    """Rebuild scenario `index` of a batch from its recorded seed"""
+    days = base["rules"]["general"]["days"]
+    time_slots = list(base["shift"]["SHIFT_HOURS"].keys())
+    return scenario_overlay(index, seed, base["nurses"], list(base["demand"]), days, time_slots)
+
+class _Heartbeat:
+    """Renews a queue lease from a background thread while a scenario is solving"""
+    
+    def __init__(self, queue_path, worker_id, index, lease_seconds):
+        self.args = (queue_path, worker_id, index, lease_seconds)
+        self.stop = threading.Event()
+        self.lost = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self):
+        queue_path, worker_id, index, lease_seconds = self.args
+        queue = ScenarioQueue(queue_path)  # sqlite connections are per thread
+        try:
+            while not self.stop.wait(lease_seconds / 3):
+                if not queue.heartbeat(worker_id, index, lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+    
+    def __enter__(self):
+        self.thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+        return False
+
+def run_worker(queue_path, worker_id=None, lease_seconds=LEASE_SECONDS, search_workers=None, adaptive=True, json_rosters=False):
+    """Lease and solve scenarios from the queue until none are left; returns the number solved"""
+    global SOLVER_TIMEOUT
+    worker_id = worker_id or default_worker_id()
+    search_workers = search_workers or max(SEARCH_WORKERS_PER_SOLVE, TOTAL_CORES)
+    queue = ScenarioQueue(queue_path)
+    
+    manifest = queue.manifest()
+    while manifest is None:  # coordinator has not created the batch yet
+        time.sleep(WORKER_POLL_SECONDS)
+        manifest = queue.manifest()
+    if manifest["data_digest"] != data_digest(data_path):
+        print(f"❌ {worker_id}: base data in {data_path} does not match the batch; not joining")
+        return 0
+    SOLVER_TIMEOUT = manifest["solver_timeout"]  # same budget on every node
+    init_worker(data_path)
+    manager = BudgetManager(SOLVER_TIMEOUT, budget_history_path(manifest["batch_dir"])) if adaptive else None
+    archive = ArchiveWriter(archive_path(manifest["batch_dir"]), archive_batch_name(manifest["batch_dir"]))
+    print(f"👷 {worker_id} joined {manifest['batch_dir']} ({search_workers} search workers per solve)")
+    
+    try:
+        solved = _work_queue(queue, queue_path, worker_id, lease_seconds, search_workers, manifest, manager, archive, json_rosters)
+    finally:
+        archive.close()
+        queue.close()
+    print(f"👷 {worker_id} finished: {solved} scenarios solved")
+    return solved
+
+def _work_queue(queue, queue_path, worker_id, lease_seconds, search_workers, manifest, manager, archive, json_rosters):
+    solved = 0
+    while True:
+        task = queue.lease(worker_id, lease_seconds)
+        if task is None:
+            if not queue.unfinished():
+                break
+            time.sleep(WORKER_POLL_SECONDS)
+            continue
+        
+        overlay = {
+            **overlay_for(_worker_base, task["index"], task["seed"]),
+            "output_dir": manifest["batch_dir"],
+            "save_json": json_rosters,
+        }
+        if manager is not None:
+            overlay, reason = plan_scenario(_worker_base, overlay, manager)
+            if reason:
+                print(f"⛔ {task['name']}: infeasible by precheck - {reason}")
+                if queue.complete(worker_id, task["index"], None, reason):
+                    archive.write_scenario(overlay, None, reason)
+                    archive.rotate()
+                continue
+        with _Heartbeat(queue_path, worker_id, task["index"], lease_seconds) as heartbeat:
+            try:
+                result = solve_scenario(overlay, search_workers)
+            except Exception as e:
+                print(f"❌ Exception in {task['name']}: {e}")
+                result = None
+        
+        if manager is not None:
+            manager.record(overlay["features"], result and result["solver_stats"])
+        if heartbeat.lost or not queue.complete(worker_id, task["index"], slim_result(result)):
+            print(f"⚠️ {worker_id}: lease on {task['name']} was lost; result not recorded")
+            continue
+        # Close the parts right away: the queue already counts this scenario as done,
+        # so rows left in an "_inprogress-" part would be lost with this process
+        archive.write_scenario(overlay, result)
+        archive.rotate()
+        if result:
+            solved += 1
+    return solved
+
+def run_coordinator(queue_path, batch_seed=None, total=None, local_workers=0, worker_args=()):
+    """Create (or reopen) the batch behind `queue_path`, watch it to completion and summarize it.
+
+    `local_workers` starts that many worker processes on this machine, e.g. to
+    stand in for several nodes when testing; `worker_args` are extra CLI flags for them.
+    """
+    queue = ScenarioQueue(queue_path)
+    manifest = queue.manifest()
+    if manifest is None:
+        if batch_seed is None:
+            batch_seed = random.SystemRandom().randrange(2**32)
+        batch_dir = os.path.join(os.path.dirname(os.path.abspath(queue_path)), f"batch_seed{batch_seed}")
+        batch_dir, manifest = create_batch(batch_seed, total or TOTAL_SCENARIOS, batch_dir=batch_dir)
+        queue.create(manifest)
+        print(f"📁 New distributed batch: {batch_dir}")
+    else:
+        print(f"🔁 Reopened distributed batch: {manifest['batch_dir']}")
+    
+    start_time = time.time()
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), "--worker", queue_path, *worker_args])
+        for _ in range(local_workers)
+    ]
+    batch_dir = manifest["batch_dir"]
+    try:
+        while True:
+            if not queue.unfinished():
+                # Give the last workers a poll interval to close their parts, then
+                # solve again whatever was completed but never reached the archive
+                time.sleep(COORDINATOR_POLL_SECONDS)
+                archived = archived_scenarios(archive_path(batch_dir), archive_batch_name(batch_dir))
+                reopened = queue.reopen_unarchived(set(archived))
+                if not reopened:
+                    break
+                print(f"🔁 {reopened} finished scenarios are missing from the archive; re-queued")
+            requeued = queue.requeue_expired()
+            counts = queue.counts()
+            note = f", {requeued} expired leases re-queued" if requeued else ""
+            print(f"📊 Queue: {counts['solved']} solved, {counts['failed']} failed, {counts['leased']} running, {counts['pending']} pending{note}")
+            if workers and all(w.poll() is not None for w in workers) and not counts["leased"]:
+                print("⚠️ All local workers exited with scenarios still pending")
+                break
+            time.sleep(COORDINATOR_POLL_SECONDS)
+    finally:
+        for w in workers:
+            w.wait()
+    
+    results = summarize_batch(batch_dir, manifest, queue.results(), time.time() - start_time, manifest["total_scenarios"])
+    queue.close()
+    return results
+
 # -----------------------------
 # Main execution
 # -----------------------------
 if __name__ == "__main__":
-    print(f"🎯 Target: {TOTAL_SCENARIOS} scenarios")
-    print(f"⚙️ Parallel workers: {PARALLEL_WORKERS}")
+    parser = argparse.ArgumentParser(description="Generate a batch of roster scenarios")
+    parser.add_argument("--seed", type=int, default=None, help="batch seed (random if omitted)")
+    parser.add_argument("--scenarios", type=int, default=TOTAL_SCENARIOS, help="scenarios in a new batch")
+    parser.add_argument("--resume", metavar="BATCH_DIR", default=None, help="continue an interrupted batch")
+    parser.add_argument("--retry-failed", action="store_true", help="with --resume, also re-solve failed scenarios")
+    parser.add_argument("-y", "--yes", action="store_true", help="start without asking for confirmation")
+    parser.add_argument("--coordinator", metavar="QUEUE_DB", default=None, help="run a distributed batch through this queue database")
+    parser.add_argument("--worker", metavar="QUEUE_DB", default=None, help="solve scenarios from this queue database")
+    parser.add_argument("--local-workers", type=int, default=0, help="with --coordinator, start this many local worker processes")
+    parser.add_argument("--worker-id", default=None, help="with --worker, name recorded on leases (default host-pid)")
+    parser.add_argument("--fixed-timeout", action="store_true", help="no precheck or learned budgets; every solve gets SOLVER_TIMEOUT")
+    parser.add_argument("--json-rosters", action="store_true", help="also write one JSON file per roster next to the Parquet archive")
+    args = parser.parse_args()
+    
+    if args.worker:
+        run_worker(args.worker, worker_id=args.worker_id, adaptive=not args.fixed_timeout, json_rosters=args.json_rosters)
+        sys.exit(0)
+    if args.coordinator:
+        worker_args = [flag for flag, on in (("--fixed-timeout", args.fixed_timeout), ("--json-rosters", args.json_rosters)) if on]
+        run_coordinator(args.coordinator, batch_seed=args.seed, total=args.scenarios, local_workers=args.local_workers, worker_args=worker_args)
+        sys.exit(0)
+    
+    print(f"🎯 Target: {args.scenarios if not args.resume else 'resume ' + args.resume}")
+    print(f"⚙️ Parallel solves: {PARALLEL_WORKERS} on {TOTAL_CORES} cores")
     print(f"⏱️ Solver timeout: {SOLVER_TIMEOUT}s")
     
     # Ask for confirmation
-    response = input("\n🚀 Start generation? (y/N): ").strip().lower()
+    response = "y" if args.yes else input("\n🚀 Start generation? (y/N): ").strip().lower()
     if response in ['y', 'yes']:
-        results = generate_100_rosters()
+        results = generate_100_rosters(
+            batch_seed=args.seed,
+            total=args.scenarios,
+            resume_dir=args.resume,
+            retry_failed=args.retry_failed,
+            adaptive=not args.fixed_timeout,
+            json_rosters=args.json_rosters,
+        )
         
         if results:
             print(f"\n📈 TOP 10 FASTEST SCENARIOS:")
             sorted_results = sorted(results.items(), key=lambda x: x[1]["solver_stats"]["total_time"])
-            for i, (name, roster) in enumerate(sorted_results[:10]):
-                stats = roster["solver_stats"]
+            for i, (name, result) in enumerate(sorted_results[:10]):
+                stats = result["solver_stats"]
                 print(f"  {i+1}. {name}: {stats['total_time']:.1f}s - {stats['status']}")
         
-        print(f"\n✅ All done! Check {scenarios_output_path} for your 100 roster scenarios.")
+        print(f"\n✅ All done! Check {scenarios_output_path} for your roster batches.")
     else:
-        print("👋 Generation cancelled.")
\ No newline at end of file
+        print("👋 Generation cancelled.")
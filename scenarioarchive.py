@@ -0,0 +1,212 @@
+import json
+import os
+import socket
+import time
+from typing import Dict, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# -----------------------------
+# Columnar scenario archive
+# -----------------------------
+# Three Parquet datasets under one root, hive-partitioned by batch:
+#   assignments/batch=<batch>/part-*.parquet  one row per (scenario, nurse, dept, day, shift)
+#   scenarios/batch=<batch>/part-*.parquet    one row per scenario: seed, type, overlay params, features
+#   solver_stats/batch=<batch>/part-*.parquet one row per scenario: status, timings, budget, reason
+# Each writer streams rows into its own part files. A part is written as
+# "_inprogress-..." and renamed when closed, so a crashed writer never leaves
+# an unreadable file in the scan (pyarrow skips "_"-prefixed files). Parts
+# are rotated every ROTATE_SCENARIOS scenarios to bound what a crash can lose.
+
+ROTATE_SCENARIOS = 25
+WRITE_BATCH_ROWS = 20000
+
+ASSIGNMENT_SCHEMA = pa.schema(
+    [
+        ("scenario", pa.string()),
+        ("nurse_id", pa.string()),
+        ("dept", pa.string()),
+        ("day", pa.string()),
+        ("shift", pa.string()),
+    ]
+)
+
+SCENARIO_SCHEMA = pa.schema(
+    [
+        ("scenario", pa.string()),
+        ("index", pa.int64()),
+        ("seed", pa.int64()),
+        ("type", pa.int64()),
+        ("demand_ops", pa.string()),            # JSON
+        ("extra_unavailability", pa.string()),  # JSON
+        ("rule_overrides", pa.string()),        # JSON
+        ("features", pa.string()),              # JSON
+    ]
+)
+
+SOLVER_STATS_SCHEMA = pa.schema(
+    [
+        ("scenario", pa.string()),
+        ("status", pa.string()),
+        ("reason", pa.string()),
+        ("objective_value", pa.float64()),
+        ("wall_time", pa.float64()),
+        ("total_time", pa.float64()),
+        ("num_conflicts", pa.int64()),
+        ("num_branches", pa.int64()),
+        ("model_build", pa.string()),
+        ("build_time", pa.float64()),
+        ("first_solution_time", pa.float64()),
+        ("num_solutions", pa.int64()),
+        ("stop_reason", pa.string()),
+        ("budget", pa.string()),                # JSON
+        ("num_assignments", pa.int64()),
+    ]
+)
+
+TABLES = {
+    "assignments": ASSIGNMENT_SCHEMA,
+    "scenarios": SCENARIO_SCHEMA,
+    "solver_stats": SOLVER_STATS_SCHEMA,
+}
+
+
+def _json_or_none(value):
+    return json.dumps(value) if value else None
+
+
+class _PartWriter:
+    """Streams row dicts of one table into rotating part files of one batch partition"""
+
+    def __init__(self, root, table, batch, tag):
+        self.dir = os.path.join(root, table, f"batch={batch}")
+        self.schema = TABLES[table]
+        self.tag = tag
+        self.parts = 0
+        self.writer = None
+        self.rows = []
+
+    def _open(self):
+        os.makedirs(self.dir, exist_ok=True)
+        name = f"part-{self.tag}-{self.parts:04d}.parquet"
+        self.final_path = os.path.join(self.dir, name)
+        self.tmp_path = os.path.join(self.dir, "_inprogress-" + name)
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema)
+        self.parts += 1
+
+    def extend(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= WRITE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.writer is None:
+            self._open()
+        self.writer.write_table(pa.Table.from_pylist(self.rows, schema=self.schema))
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+            os.replace(self.tmp_path, self.final_path)
+            self.writer = None
+
+
+class ArchiveWriter:
+    """Appends finished scenarios of one batch to the archive datasets"""
+
+    def __init__(self, root, batch):
+        self.root = root
+        self.batch = batch
+        tag = f"{socket.gethostname()}-{os.getpid()}-{int(time.time() * 1000)}"
+        self.writers = {table: _PartWriter(root, table, batch, tag) for table in TABLES}
+        self.scenarios_in_part = 0
+
+    def write_scenario(self, overlay, result, reason=None):
+        """Archive one scenario: its overlay params and, when solved, assignments and stats"""
+        name = overlay["name"]
+        stats = (result or {}).get("solver_stats") or {}
+        assignments = (result or {}).get("assignments") or []
+        self.writers["assignments"].extend(
+            {"scenario": name, "nurse_id": nid, "dept": dept, "day": day, "shift": shift}
+            for nid, dept, day, shift in assignments
+        )
+        self.writers["scenarios"].extend([{
+            "scenario": name,
+            "index": overlay.get("index"),
+            "seed": overlay.get("seed"),
+            "type": overlay.get("type"),
+            "demand_ops": _json_or_none(overlay.get("demand_ops")),
+            "extra_unavailability": _json_or_none(overlay.get("extra_unavailability")),
+            "rule_overrides": _json_or_none(overlay.get("rule_overrides")),
+            "features": _json_or_none(overlay.get("features")),
+        }])
+        self.writers["solver_stats"].extend([{
+            "scenario": name,
+            "status": stats.get("status", "NO_SOLUTION"),
+            "reason": reason,
+            "objective_value": stats.get("objective_value"),
+            "wall_time": stats.get("wall_time"),
+            "total_time": stats.get("total_time"),
+            "num_conflicts": stats.get("num_conflicts"),
+            "num_branches": stats.get("num_branches"),
+            "model_build": stats.get("model_build"),
+            "build_time": stats.get("build_time"),
+            "first_solution_time": stats.get("first_solution_time"),
+            "num_solutions": stats.get("num_solutions"),
+            "stop_reason": stats.get("stop_reason"),
+            "budget": _json_or_none(stats.get("budget")),
+            "num_assignments": len(assignments),
+        }])
+        self.scenarios_in_part += 1
+        if self.scenarios_in_part >= ROTATE_SCENARIOS:
+            self.rotate()
+
+    def rotate(self):
+        """Close the current parts so everything written so far survives a crash"""
+        for writer in self.writers.values():
+            writer.close()
+        self.scenarios_in_part = 0
+
+    def close(self):
+        self.rotate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+def dataset(root, table):
+    """pyarrow Dataset over every batch of one archive table (batch as a partition column)"""
+    return ds.dataset(
+        os.path.join(root, table),
+        format="parquet",
+        partitioning="hive",
+        schema=TABLES[table].append(pa.field("batch", pa.string())),
+    )
+
+
+def load_table(root, table, batch=None, columns: Optional[List[str]] = None) -> pa.Table:
+    """Whole table in one scan, optionally restricted to one batch"""
+    path = os.path.join(root, table)
+    if not os.path.isdir(path):
+        return TABLES[table].append(pa.field("batch", pa.string())).empty_table()
+    filter_ = ds.field("batch") == batch if batch is not None else None
+    return dataset(root, table).to_table(columns=columns, filter=filter_)
+
+
+def archived_scenarios(root, batch) -> Dict[str, str]:
+    """{scenario name: status} already archived for a batch"""
+    table = load_table(root, "solver_stats", batch=batch, columns=["scenario", "status"])
+    return dict(zip(table.column("scenario").to_pylist(), table.column("status").to_pylist()))
@@ -0,0 +1,203 @@
+import json
+import os
+import socket
+import sqlite3
+import time
+from typing import Dict, Optional
+
+# -----------------------------
+# Shared scenario work queue (SQLite)
+# -----------------------------
+# One database file per sweep, placed on storage every node can reach. Workers
+# lease a scenario index, renew the lease with heartbeats while solving and
+# mark it solved/failed; a lease that is not renewed in time (crashed or
+# disconnected worker) goes back to pending for the next lease() call.
+#
+# Task states: pending -> leased -> solved | failed
+# A task whose lease expires MAX_ATTEMPTS times is marked failed. A finished
+# task whose rows are missing from the archive (worker died before closing its
+# part files) is put back to pending by the coordinator.
+
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batch (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    idx INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires);
+"""
+
+
+class ScenarioQueue:
+    """Lease-based scenario queue shared by a coordinator and any number of workers"""
+
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        # Rollback journal (not WAL) so the file also works on shared filesystems
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self):
+        """Exclusive write transaction: serializes lease/complete across processes and hosts"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        return _Transaction(self.conn)
+
+    # ---- Coordinator side ----
+    def create(self, manifest):
+        """Store the batch manifest and enqueue its scenarios (no-op for indices already queued)"""
+        with self._write():
+            self.conn.execute(
+                "INSERT OR REPLACE INTO batch (key, value) VALUES ('manifest', ?)",
+                (json.dumps(manifest),),
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (idx, name, seed, updated_at) VALUES (?, ?, ?, ?)",
+                [(s["index"], s["name"], s["seed"], time.time()) for s in manifest["scenarios"]],
+            )
+
+    def manifest(self) -> Optional[Dict]:
+        row = self.conn.execute("SELECT value FROM batch WHERE key = 'manifest'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def requeue_expired(self, now=None):
+        """Return expired leases to pending (or failed after MAX_ATTEMPTS); returns the count"""
+        with self._write():
+            return self._expire(now or time.time())
+
+    def _expire(self, now):
+        failed = self.conn.execute(
+            "UPDATE tasks SET status = 'failed', worker = NULL, updated_at = ?, "
+            "result = json_object('error', 'lease expired ' || attempts || ' times') "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, now, MAX_ATTEMPTS),
+        ).rowcount
+        requeued = self.conn.execute(
+            "UPDATE tasks SET status = 'pending', worker = NULL, updated_at = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now),
+        ).rowcount
+        return requeued + failed
+
+    def reopen_unarchived(self, archived):
+        """Return tasks a worker finished but whose archive rows never landed to pending; returns the count
+
+        `archived` is the set of scenario names present in the archive. Tasks
+        failed by lease expiry (no worker) are never archived and are left alone.
+        """
+        now = time.time()
+        with self._write():
+            rows = self.conn.execute(
+                "SELECT idx, name FROM tasks WHERE status IN ('solved', 'failed') AND worker IS NOT NULL"
+            ).fetchall()
+            missing = [idx for idx, name in rows if name not in archived]
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'pending', worker = NULL, result = NULL, lease_expires = NULL, "
+                "updated_at = ? WHERE idx = ?",
+                [(now, idx) for idx in missing],
+            )
+        return len(missing)
+
+    def counts(self):
+        counts = {"pending": 0, "leased": 0, "solved": 0, "failed": 0}
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status"):
+            counts[status] = count
+        return counts
+
+    def unfinished(self):
+        counts = self.counts()
+        return counts["pending"] + counts["leased"]
+
+    def results(self):
+        """{index: task row dict} for every finished task"""
+        rows = self.conn.execute(
+            "SELECT idx, name, seed, status, worker, attempts, result FROM tasks "
+            "WHERE status IN ('solved', 'failed') ORDER BY idx"
+        )
+        return {
+            idx: {
+                "index": idx,
+                "name": name,
+                "seed": seed,
+                "status": status,
+                "worker": worker,
+                "attempts": attempts,
+                **(json.loads(result) if result else {}),
+            }
+            for idx, name, seed, status, worker, attempts, result in rows
+        }
+
+    # ---- Worker side ----
+    def lease(self, worker_id, lease_seconds):
+        """Claim the lowest pending scenario (after reclaiming expired leases); returns {index, name, seed} or None"""
+        now = time.time()
+        with self._write():
+            self._expire(now)
+            row = self.conn.execute(
+                "SELECT idx, name, seed FROM tasks WHERE status = 'pending' ORDER BY idx LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE idx = ?",
+                (worker_id, now + lease_seconds, now, row[0]),
+            )
+        return {"index": row[0], "name": row[1], "seed": row[2]}
+
+    def heartbeat(self, worker_id, index, lease_seconds):
+        """Extend a held lease; False if the lease was lost (expired and re-leased)"""
+        now = time.time()
+        with self._write():
+            updated = self.conn.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? "
+                "WHERE idx = ? AND worker = ? AND status = 'leased'",
+                (now + lease_seconds, now, index, worker_id),
+            ).rowcount
+        return updated == 1
+
+    def complete(self, worker_id, index, result, reason=None):
+        """Record a finished solve (result None = no solution, optionally why); False if the lease was lost"""
+        now = time.time()
+        if not result:
+            result = {"reason": reason} if reason else {}
+            status = "failed"
+        else:
+            status = "solved"
+        with self._write():
+            updated = self.conn.execute(
+                "UPDATE tasks SET status = ?, result = ?, lease_expires = NULL, updated_at = ? "
+                "WHERE idx = ? AND worker = ? AND status = 'leased'",
+                (status, json.dumps(result), now, index, worker_id),
+            ).rowcount
+        return updated == 1
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
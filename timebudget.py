@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+# -----------------------------
+# Adaptive per-scenario time budgets
+# -----------------------------
+# 1. precheck() rejects scenarios that are provably infeasible from simple
+#    counting bounds (demand vs. available nurses/hours, contracts vs. demand),
+#    so they never reach the solver.
+# 2. BudgetManager predicts time-to-first-solution from instance_features()
+#    with a least-squares fit on log time over earlier solves, and turns it
+#    into a budget: stop if no solution appears by `first_solution`, stop once
+#    the objective stalls for `stall` seconds, never run past `max_time`.
+#    The margin uses leave-one-out residuals (in-sample ones understate the
+#    error of a fit with few solves per feature), predictions are kept inside
+#    the range of observed times, and `first_solution` never drops below
+#    FIRST_SOLUTION_PERCENTILE of the observed first-solution times.
+# 3. SolveWatchdog enforces that budget inside CpSolver.Solve.
+# Until MIN_HISTORY solves have been recorded the budget is SOLVER_TIMEOUT flat.
+
+MIN_FIRST_SOLUTION = 5.0   # never give up on a first solution sooner than this
+FIRST_SOLUTION_MARGIN = 2.0  # x predicted time, on top of 2 residual std devs
+FIRST_SOLUTION_PERCENTILE = 95  # of observed first-solution times, floor of the cutoff
+STALL_FRACTION = 0.25      # of the base timeout without objective improvement
+EXTENSION_FACTOR = 1.5     # promising (already feasible, still improving) runs may use this x timeout
+RIDGE = 1e-3
+
+FEATURE_NAMES = [
+    "min_demand_slack",
+    "contract_slack",
+    "slot_slack",
+    "unavailability_density",
+    "tight_cell_fraction",
+    "daily_cap",
+    "weekly_cap",
+    "rest_hours",
+]
+MIN_HISTORY = 5 * (len(FEATURE_NAMES) + 1)  # solves per fitted coefficient, intercept included
+
+
+def _capacity_hours(ctx):
+    """Max hours each nurse can work in the week under caps, rest days and contracts"""
+    work_days = len(ctx.days) - ctx.weekly_rest_days
+    cap = min(ctx.weekly_cap, work_days * ctx.daily_cap)
+    return np.where(ctx.contracted > 0, ctx.contracted, cap)
+
+
+def _slot_availability(ctx):
+    """(day, slot) -> number of nurses not unavailable"""
+    return (~ctx.unavailable).sum(axis=0)
+
+
+def instance_features(ctx) -> Dict[str, float]:
+    """Scenario difficulty features from a RuleContext, keyed by FEATURE_NAMES"""
+    hours = ctx.hours[None, None, :]
+    min_hours = float((ctx.demand_min * hours).sum())
+    max_hours = float((ctx.demand_max * hours).sum())
+    capacity = float(_capacity_hours(ctx).sum())
+    contracted = float(ctx.contracted.sum())
+    slot_need = ctx.demand_min.sum(axis=0)  # (day, slot) over departments
+    available = _slot_availability(ctx)
+    return {
+        "min_demand_slack": capacity / max(min_hours, 1.0) - 1.0,
+        "contract_slack": (max_hours - contracted) / max(max_hours, 1.0),
+        "slot_slack": float(((available - slot_need) / max(len(ctx.nurse_ids), 1)).min()),
+        "unavailability_density": float(ctx.unavailable.mean()),
+        "tight_cell_fraction": float((ctx.demand_max == ctx.demand_min).mean()),
+        "daily_cap": float(ctx.daily_cap),
+        "weekly_cap": float(ctx.weekly_cap),
+        "rest_hours": ctx.rest_minutes / 60.0,
+    }
+
+
+def precheck(ctx) -> Optional[str]:
+    """Reason the scenario cannot be feasible, or None if the counting bounds pass"""
+    work_days = len(ctx.days) - ctx.weekly_rest_days
+    over = np.flatnonzero(
+        (ctx.contracted > ctx.weekly_cap) | (ctx.contracted > work_days * ctx.daily_cap)
+    )
+    if len(over):
+        return f"contracted hours of {ctx.nurse_ids[over[0]]} exceed the weekly/daily caps"
+
+    hours = ctx.hours[None, None, :]
+    max_hours = int((ctx.demand_max * hours).sum())
+    if ctx.contracted.sum() > max_hours:
+        return f"contracted hours {int(ctx.contracted.sum())}h exceed maximum demand {max_hours}h"
+    min_hours = int((ctx.demand_min * hours).sum())
+    capacity = int(_capacity_hours(ctx).sum())
+    if min_hours > capacity:
+        return f"minimum demand {min_hours}h exceeds nurse capacity {capacity}h"
+
+    short = np.argwhere(ctx.demand_min.sum(axis=0) > _slot_availability(ctx))
+    if len(short):
+        d, s = short[0]
+        return f"{ctx.days[d]} {ctx.slots[s]} needs more nurses than are available"
+
+    core_enabled = ctx.rules["constraints"].get("core_skill_requirement", {}).get("enabled", False)
+    if core_enabled:
+        core_available = np.einsum("ne,nds->eds", ctx.core_mask, ~ctx.unavailable)
+        missing = np.argwhere((ctx.demand_min > 0) & (core_available == 0))
+        if len(missing):
+            e, d, s = missing[0]
+            return f"no {ctx.depts[e]} core-skill nurse available on {ctx.days[d]} {ctx.slots[s]}"
+    return None
+
+
+class BudgetManager:
+    """Learns time-to-first-solution from recorded solves and hands out per-scenario budgets"""
+
+    def __init__(self, base_timeout, history_path=None):
+        self.base_timeout = base_timeout
+        self.history_path = history_path
+        self.history: List[Dict] = []
+        self.coef = None
+        self.resid_std = 0.0
+        self.log_range = (0.0, 0.0)
+        self.first_solution_floor = 0.0
+        if history_path and os.path.exists(history_path):
+            with open(history_path, "r") as f:
+                for line in f:
+                    try:
+                        self.history.append(json.loads(line))
+                    except ValueError:
+                        continue
+        self._fit()
+
+    def _matrix(self, rows):
+        X = np.array([[r["features"][k] for k in FEATURE_NAMES] for r in rows], dtype=float)
+        return np.hstack([X, np.ones((len(rows), 1))])
+
+    def _fit(self):
+        solved = [r for r in self.history if r.get("first_solution_time") is not None]
+        if len(solved) < MIN_HISTORY:
+            self.coef = None
+            return
+        X = self._matrix(solved)
+        y = np.log1p([r["first_solution_time"] for r in solved])
+        # Standardize so the ridge term treats features alike
+        self.mean = X[:, :-1].mean(axis=0)
+        self.scale = X[:, :-1].std(axis=0) + 1e-9
+        Z = np.hstack([(X[:, :-1] - self.mean) / self.scale, X[:, -1:]])
+        inverse = np.linalg.inv(Z.T @ Z + RIDGE * np.eye(Z.shape[1]))
+        self.coef = inverse @ Z.T @ y
+        # Leave-one-out residuals e_i / (1 - h_ii) from the diagonal of the hat matrix
+        leverage = np.einsum("ij,jk,ik->i", Z, inverse, Z)
+        loo = (y - Z @ self.coef) / np.maximum(1.0 - leverage, 1e-6)
+        self.resid_std = float(np.sqrt(np.mean(loo ** 2)))
+        self.log_range = (float(y.min()), float(y.max()))
+        self.first_solution_floor = float(np.percentile(np.expm1(y), FIRST_SOLUTION_PERCENTILE))
+
+    def predict_first_solution(self, features) -> Optional[float]:
+        if self.coef is None:
+            return None
+        x = (np.array([features[k] for k in FEATURE_NAMES], dtype=float) - self.mean) / self.scale
+        # No extrapolation beyond the fastest and slowest first solutions seen
+        return float(np.expm1(np.clip(np.append(x, 1.0) @ self.coef, *self.log_range)))
+
+    def budget_for(self, features) -> Dict[str, float]:
+        """{"first_solution", "stall", "max_time", "predicted_first_solution"} in seconds"""
+        predicted = self.predict_first_solution(features)
+        if predicted is None:
+            first = self.base_timeout
+        else:
+            upper = np.expm1(np.log1p(predicted) + 2 * self.resid_std)
+            first = max(FIRST_SOLUTION_MARGIN * upper, self.first_solution_floor)
+            first = float(np.clip(first, MIN_FIRST_SOLUTION, self.base_timeout))
+        return {
+            "first_solution": first,
+            "stall": max(MIN_FIRST_SOLUTION, STALL_FRACTION * self.base_timeout),
+            "max_time": self.base_timeout * (EXTENSION_FACTOR if predicted is not None else 1.0),
+            "predicted_first_solution": predicted,
+        }
+
+    def record(self, features, solver_stats):
+        """Add one finished solve (solver_stats None = no solution) to the history and refit"""
+        entry = {
+            "features": features,
+            "first_solution_time": (solver_stats or {}).get("first_solution_time"),
+            "wall_time": (solver_stats or {}).get("wall_time"),
+            "status": (solver_stats or {}).get("status", "NO_SOLUTION"),
+        }
+        self.history.append(entry)
+        if self.history_path:
+            with open(self.history_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        self._fit()
+
+
+class SolveWatchdog(cp_model.CpSolverSolutionCallback):
+    """Solution callback that timestamps solutions and stops the search per a budget.
+
+    Without a budget it only records first_solution_time / num_solutions.
+    """
+
+    def __init__(self, solver, budget=None, poll_seconds=0.5):
+        super().__init__()
+        self.solver = solver
+        self.budget = budget
+        self.poll_seconds = poll_seconds
+        self.start = time.time()
+        self.first_solution_time = None
+        self.last_solution_time = None
+        self.num_solutions = 0
+        self.stop_reason = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def on_solution_callback(self):
+        now = time.time() - self.start
+        if self.first_solution_time is None:
+            self.first_solution_time = now
+        self.last_solution_time = now
+        self.num_solutions += 1
+
+    def _watch(self):
+        while not self._done.wait(self.poll_seconds):
+            elapsed = time.time() - self.start
+            if self.first_solution_time is None and elapsed > self.budget["first_solution"]:
+                self.stop_reason = "no_first_solution"
+            elif (
+                self.last_solution_time is not None
+                and elapsed - self.last_solution_time > self.budget["stall"]
+            ):
+                self.stop_reason = "stalled"
+            else:
+                continue
+            self.solver.StopSearch()
+            return
+
+    def __enter__(self):
+        self.start = time.time()
+        if self.budget is not None:
+            self.solver.parameters.max_time_in_seconds = self.budget["max_time"]
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._done.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False